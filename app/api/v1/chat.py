@@ -1,50 +1,142 @@
-from typing import Dict, Any, List
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import json
+import math
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import deque
+from datetime import datetime
+from typing import AsyncGenerator, Callable, Dict, Any, List, Optional, Tuple, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 from sse_starlette.sse import EventSourceResponse
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from uuid import uuid4
 
-from app.database.base import get_db
-from app.models.models import ModelProvider, ChatHistory
-from app.schemas.schemas import ChatRequest, ChatHistoryResponse, ModelProviderBase
+from app.database.base import AsyncSessionLocal, get_db
+from app.database.replicas import get_read_db, replica_router
+from app.database.stream_recorder import StreamRecorder
+from app.database.writer import chat_history_writer, reserve_chat_history_ids
+from app.api.v1.routing_groups import get_routing_group_or_404
+from app.models.models import ChatHistory, RoutingGroup
+from app.schemas.schemas import (
+    BatchChatRequest, ChatRequest, ChatHistoryResponse, ModelProviderBase, ModelProviderInDB, StreamOptions
+)
+from app.services import generation
+from app.services.base import BaseModelService
 from app.services.factory import ModelServiceFactory
+from app.services.conversation_cache import conversation_cache
+from app.services.invalidation import invalidation_bus
+from app.services.provider_cache import provider_cache
+from app.services.rate_limiter import PRIORITIES, RateLimitExceeded
+from app.services.routing import provider_router
+from app.services.sse_writer import CoalescingSSEWriter, encode_event
+from app.services.stream_registry import ResumableStream, stream_registry
 from app.core.config import settings
+from app.core.metrics import streams_in_flight
+from app.core.tracing import span
 
 router = APIRouter()
 
 
 async def get_conversation_history(conversation_id: str, db: AsyncSession) -> List[ChatHistory]:
-    """Get all messages from a conversation ordered by creation time."""
+    """Get the complete turns of a conversation ordered by creation time."""
     from sqlalchemy import select
     stmt = (
         select(ChatHistory)
-        .where(ChatHistory.conversation_id == conversation_id)
+        .where(ChatHistory.conversation_id == conversation_id, ChatHistory.status == "complete")
         .order_by(ChatHistory.created_at.asc())
     )
     result = await db.execute(stmt)
     return result.scalars().all()
 
-async def get_provider_or_404(provider_id: int, db: AsyncSession) -> ModelProvider:
-    """Get provider or raise 404 error."""
-    from sqlalchemy import select
-    stmt = select(ModelProvider).where(ModelProvider.id == provider_id)
-    result = await db.execute(stmt)
-    provider = result.scalar_one_or_none()
+
+async def get_conversation_messages(conversation_id: str, db: AsyncSession) -> List[BaseMessage]:
+    """Get a conversation's history as LangChain messages, served from the cache when warm."""
+    messages = conversation_cache.get(conversation_id)
+    if messages is None:
+        # A turn saved while the history loads is missing from it, so it is then not cached
+        version = conversation_cache.version(conversation_id)
+        # Snapshot queued rows before reading, so a row written in between is not missed
+        pending = chat_history_writer.pending_rows(conversation_id)
+        history = list(await get_conversation_history(conversation_id, db))
+        written = {row.id for row in history}
+        history.extend(ChatHistory(**row) for row in pending if row["id"] not in written)
+        history.sort(key=lambda row: row.created_at)
+
+        messages = []
+        for row in history:
+            messages.extend([
+                HumanMessage(content=row.user_message),
+                AIMessage(content=row.assistant_message)
+            ])
+        conversation_cache.put(conversation_id, messages, version)
+    return messages
+
+
+def record_turn(
+    conversation_id: str,
+    user_message: str,
+    assistant_message: str,
+    create: bool = False,
+    queued: bool = False
+) -> None:
+    """Add a saved turn to the cached history here, and drop the history cached by other workers.
+
+    Other workers would reload a queued row's conversation without it, so for turns queued
+    for write-behind that is left to publish_written_turns, once the row is committed.
+    """
+    conversation_cache.append_turn(conversation_id, user_message, assistant_message, create=create)
+    replica_router.stick(conversation_id)
+    if not queued:
+        invalidation_bus.publish("conversation", conversation_id)
+
+
+def publish_written_turns(rows: List[Dict[str, Any]]) -> None:
+    """Drop the conversations of rows the write-behind writer has committed from other workers' caches."""
+    for conversation_id in {row["conversation_id"] for row in rows}:
+        invalidation_bus.publish("conversation", conversation_id)
+
+
+async def save_chat_history(chat_history: ChatHistory, db: AsyncSession) -> bool:
+    """Persist a chat history row, handing it to the write-behind writer when it is running.
+
+    Returns True when the row was queued rather than committed.
+    """
+    if chat_history_writer.running:
+        chat_history.id = await chat_history_writer.reserve_id()
+        await chat_history_writer.enqueue(chat_history)
+        return True
+    db.add(chat_history)
+    await db.commit()
+    return False
+
+
+def build_chat_history_response(chat_history: ChatHistory, model_provider: ModelProviderBase) -> ChatHistoryResponse:
+    """Build the response for a chat history row from data already in memory."""
+    return ChatHistoryResponse(
+        id=chat_history.id,
+        user_message=chat_history.user_message,
+        assistant_message=chat_history.assistant_message,
+        conversation_id=chat_history.conversation_id,
+        chat_metadata=chat_history.chat_metadata,
+        tool_request=chat_history.tool_request,
+        tool_response=chat_history.tool_response,
+        status=chat_history.status,
+        created_at=chat_history.created_at,
+        model_provider=model_provider
+    )
+
+
+async def get_provider_or_404(provider_id: int, db: AsyncSession) -> ModelProviderInDB:
+    """Get provider from the provider cache or raise 404 error."""
+    provider = await provider_cache.get(provider_id, db)
     if not provider:
         raise HTTPException(status_code=404, detail="Provider not found")
     return provider
 
 
-@router.post("/chat", response_model=ChatHistoryResponse)
-async def chat(
-    request: ChatRequest,
-    db: AsyncSession = Depends(get_db)
-):
-    """Generate a chat response using the specified model provider."""
-    provider = await get_provider_or_404(request.model_provider_id, db)
-
-    # Get API key from environment/config, not from DB
+def get_provider_api_key(provider: ModelProviderInDB) -> str:
+    """Get the API key for a provider from environment/config, not from DB."""
     api_key = None
     if provider.name.lower() == "openai":
         api_key = settings.OPENAI_API_KEY
@@ -52,77 +144,237 @@ async def chat(
         api_key = settings.ANTHROPIC_API_KEY
     elif provider.name.lower() == "perplexity":
         api_key = settings.PERPLEXITY_API_KEY
+    elif provider.name.lower() == "fake" and settings.FAKE_PROVIDER_ENABLED:
+        # The offline provider makes no upstream calls, so the stored key is only a placeholder
+        api_key = provider.api_key
     else:
         raise HTTPException(status_code=400, detail="Unknown provider for API key")
     if not api_key:
         raise HTTPException(status_code=500, detail=f"API key for {provider.name} not set in environment")
+    return api_key
 
-    try:
+
+async def get_provider_service(provider: ModelProviderInDB) -> BaseModelService:
+    """Get the model service for a provider."""
+    return await ModelServiceFactory.get_service(
+        provider_id=provider.id,
+        provider_name=provider.name,
+        api_key=get_provider_api_key(provider),
+        config=provider.config
+    )
+
+
+async def get_routing_candidates(group: RoutingGroup, db: AsyncSession) -> List[ModelProviderInDB]:
+    """Get the members of a routing group, best first, skipping providers that no longer exist."""
+    candidates = []
+    for provider_id in provider_router.rank(group.provider_ids):
+        provider = await provider_cache.get(provider_id, db)
+        if provider:
+            candidates.append(provider)
+    if not candidates:
+        raise HTTPException(status_code=503, detail="Routing group has no available providers")
+    return candidates
+
+
+def routing_decision(group: RoutingGroup, candidates: List[ModelProviderInDB], **outcome: Any) -> Dict[str, Any]:
+    """Describe how a request was routed, for chat_metadata["routing"]."""
+    return {
+        "routing_group_id": group.id,
+        "ranking": [provider.id for provider in candidates],
+        "scores": {str(provider.id): provider_router.score(provider.id) for provider in candidates},
+        **outcome
+    }
+
+
+def with_routing_metadata(chat_metadata: Optional[Dict[str, Any]], routing: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if routing is None:
+        return chat_metadata
+    return {**(chat_metadata or {}), "routing": routing}
+
+
+async def generate_routed_response(
+    group: RoutingGroup,
+    candidates: List[ModelProviderInDB],
+    request: ChatRequest,
+    messages: List[BaseMessage]
+) -> Tuple[ModelProviderInDB, BaseModelService, str, Dict[str, Any]]:
+    """Generate a response from the best member of a routing group, hedging to the next when it is slow."""
+    decision = routing_decision(group, candidates)
+    services: Dict[int, BaseModelService] = {}
+
+    def call(provider: ModelProviderInDB):
+        async def generate() -> str:
+            service = services[provider.id] = await get_provider_service(provider)
+            return await generation.generate_response(
+                service, request.message, messages=messages, priority=request.priority
+            )
+        return generate
+
+    hedge_delay = group.hedge_delay if group.hedge_delay is not None else settings.ROUTING_HEDGE_DELAY
+    provider_id, response, outcome = await provider_router.run(
+        [(provider.id, call(provider)) for provider in candidates], hedge_delay
+    )
+    provider = next(provider for provider in candidates if provider.id == provider_id)
+    return provider, services[provider_id], response, {**decision, "provider_id": provider_id, **outcome}
+
+
+async def complete_chat(request: ChatRequest, db: AsyncSession) -> ChatHistoryResponse:
+    """Generate and persist a chat turn; unknown providers or groups raise HTTPException."""
+    routing = None
+    with span("provider"):
+        if request.routing_group_id:
+            group = await get_routing_group_or_404(request.routing_group_id, db)
+            candidates = await get_routing_candidates(group, db)
+        else:
+            provider = await get_provider_or_404(request.model_provider_id, db)
+            api_key = get_provider_api_key(provider)
+
+    # Get conversation context if conversation_id is provided; the service appends the current message
+    messages = []
+    if request.conversation_id:
+        with span("history"):
+            messages = await get_conversation_messages(request.conversation_id, db)
+
+    if request.routing_group_id:
+        with span("generate"):
+            provider, service, response, routing = await generate_routed_response(
+                group, candidates, request, messages
+            )
+    else:
         # Get model service
+        with span("service"):
+            service = await ModelServiceFactory.get_service(
+                provider_id=provider.id,
+                provider_name=provider.name,
+                api_key=api_key,
+                config=provider.config
+            )
+
+        # Generate response with conversation context
+        with span("generate"):
+            response = await generation.generate_response(
+                service, request.message, messages=messages, priority=request.priority
+            )
+
+    # Optionally, handle tool request/response if your service returns them
+    tool_request = getattr(service, 'last_tool_request', None)
+    tool_response = getattr(service, 'last_tool_response', None)
+
+    # Generate conversation_id if not provided
+    conversation_id = request.conversation_id or str(uuid4())
+    
+    # Save chat history
+    with span("persist"):
+        chat_history = ChatHistory(
+            model_provider_id=provider.id,
+            conversation_id=conversation_id,
+            user_message=request.message,
+            assistant_message=response,
+            chat_metadata=with_routing_metadata(request.chat_metadata, routing),
+            tool_request=tool_request,
+            tool_response=tool_response,
+            status="complete",
+            created_at=datetime.utcnow()
+        )
+        queued = await save_chat_history(chat_history, db)
+        record_turn(
+            conversation_id, request.message, response, create=request.conversation_id is None, queued=queued
+        )
+
+    # Build the response from memory instead of re-reading the row
+    with span("response"):
+        return build_chat_history_response(chat_history, ModelProviderBase.from_orm(provider))
+
+
+async def prepare_chat_stream(request: ChatRequest, db: AsyncSession) -> Callable[[], AsyncGenerator[str, None]]:
+    """Resolve the provider, service and context of a streamed chat turn.
+
+    Returns a function that starts the generation. Its chunks are recorded as they are
+    produced, and the turn is persisted with its final status, all without ``db``.
+    """
+    routing = None
+    with span("provider"):
+        if request.routing_group_id:
+            # Streams are not hedged: they go to the best member, whose outcome is recorded
+            group = await get_routing_group_or_404(request.routing_group_id, db)
+            candidates = await get_routing_candidates(group, db)
+            provider = candidates[0]
+            routing = routing_decision(group, candidates, provider_id=provider.id, attempts=[provider.id], hedged=False)
+        else:
+            provider = await get_provider_or_404(request.model_provider_id, db)
+
+    # Get model service
+    with span("service"):
         service = await ModelServiceFactory.get_service(
             provider_id=provider.id,
             provider_name=provider.name,
-            api_key=api_key,
+            api_key=get_provider_api_key(provider),
             config=provider.config
         )
-        
-        # Get conversation history if conversation_id is provided
-        conversation_history = []
-        if request.conversation_id:
-            conversation_history = await get_conversation_history(request.conversation_id, db)
 
-        # Prepare conversation context
-        messages = []
-        for history in conversation_history:
-            messages.extend([
-                {"role": "user", "content": history.user_message},
-                {"role": "assistant", "content": history.assistant_message}
-            ])
-        messages.append({"role": "user", "content": request.message})
-
-        # Generate response with conversation context
-        response = await service.generate_response(request.message, messages=messages)
-
-        # Optionally, handle tool request/response if your service returns them
-        tool_request = getattr(service, 'last_tool_request', None)
-        tool_response = getattr(service, 'last_tool_response', None)
+    # Get conversation context if conversation_id is provided; the service appends the current message
+    messages = []
+    if request.conversation_id:
+        with span("history"):
+            messages = await get_conversation_messages(request.conversation_id, db)
 
-        # Generate conversation_id if not provided
+    async def recorded_chunks() -> AsyncGenerator[str, None]:
         conversation_id = request.conversation_id or str(uuid4())
-        
-        # Save chat history
-        chat_history = ChatHistory(
+        recorder = StreamRecorder(ChatHistory(
             model_provider_id=provider.id,
             conversation_id=conversation_id,
             user_message=request.message,
-            assistant_message=response,
-            chat_metadata=request.chat_metadata,
-            tool_request=tool_request,
-            tool_response=tool_response
+            assistant_message="",
+            chat_metadata=with_routing_metadata(request.chat_metadata, routing),
+            status="streaming",
+            created_at=datetime.utcnow()
+        ))
+        stream = generation.generate_stream(
+            service, request.message, messages=messages, priority=request.priority
         )
-        db.add(chat_history)
-        await db.commit()
-        await db.refresh(chat_history)
-
-        # Eagerly load model_provider relationship
-        from sqlalchemy import select
-        stmt = (
-            select(ChatHistory)
-            .options(selectinload(ChatHistory.model_provider))
-            .where(ChatHistory.id == chat_history.id)
+        if routing is not None:
+            stream = provider_router.track_stream(provider.id, stream)
+
+        status = "failed"
+        in_flight = streams_in_flight.labels(f"{provider.name.lower()}:{provider.id}")
+        in_flight.inc()
+        try:
+            async for chunk in stream:
+                recorder.append(chunk)
+                yield chunk
+            status = "complete"
+        except (asyncio.CancelledError, GeneratorExit):
+            status = "interrupted"
+            raise
+        finally:
+            in_flight.dec()
+            # Optionally, pick up tool_request/tool_response if your service provides them during streaming
+            await recorder.finish(
+                status,
+                tool_request=getattr(service, 'last_tool_request', None),
+                tool_response=getattr(service, 'last_tool_response', None)
+            )
+
+        record_turn(
+            conversation_id, request.message, recorder.text, create=request.conversation_id is None
         )
-        result = await db.execute(stmt)
-        chat_history_with_provider = result.scalar_one()
-
-        # Manually construct the response to ensure model_provider is a Pydantic model
-        return ChatHistoryResponse(
-            id=chat_history_with_provider.id,
-            user_message=chat_history_with_provider.user_message,
-            assistant_message=chat_history_with_provider.assistant_message,
-            conversation_id=chat_history_with_provider.conversation_id,
-            chat_metadata=chat_history_with_provider.chat_metadata,
-            created_at=chat_history_with_provider.created_at,
-            model_provider=ModelProviderBase.from_orm(chat_history_with_provider.model_provider)
+
+    return recorded_chunks
+
+
+@router.post("/chat", response_model=ChatHistoryResponse)
+async def chat(
+    request: ChatRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Generate a chat response using the specified model provider or routing group."""
+    try:
+        return await complete_chat(request, db)
+    except HTTPException:
+        raise
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))}
         )
     except Exception as e:
         await db.rollback()
@@ -134,118 +386,299 @@ async def chat_stream(
     request: ChatRequest,
     db: AsyncSession = Depends(get_db)
 ):
-    """Generate a streaming chat response using the specified model provider."""
+    """Generate a streaming chat response using the specified model provider.
+
+    The stream's ID is returned in the X-Stream-ID header and events carry IDs of the form
+    <stream_id>:<number>, so a client that drops can resume at GET /chat/stream/{stream_id}.
+    """
     if not request.stream:
         raise HTTPException(status_code=400, detail="Streaming must be enabled for this endpoint")
-    
-    provider = await get_provider_or_404(request.model_provider_id, db)
 
-    # Get API key from environment/config, not from DB
-    api_key = None
-    if provider.name.lower() == "openai":
-        api_key = settings.OPENAI_API_KEY
-    elif provider.name.lower() == "anthropic":
-        api_key = settings.ANTHROPIC_API_KEY
-    elif provider.name.lower() == "perplexity":
-        api_key = settings.PERPLEXITY_API_KEY
-    else:
-        raise HTTPException(status_code=400, detail="Unknown provider for API key")
-    if not api_key:
-        raise HTTPException(status_code=500, detail=f"API key for {provider.name} not set in environment")
-    
     try:
-        # Get model service
-        service = await ModelServiceFactory.get_service(
-            provider_id=provider.id,
-            provider_name=provider.name,
-            api_key=api_key,
-            config=provider.config
-        )
-        
-        # Get conversation history if conversation_id is provided
-        conversation_history = []
-        if request.conversation_id:
-            conversation_history = await get_conversation_history(request.conversation_id, db)
-
-        # Prepare conversation context
-        messages = []
-        for history in conversation_history:
-            messages.extend([
-                {"role": "user", "content": history.user_message},
-                {"role": "assistant", "content": history.assistant_message}
-            ])
-        messages.append({"role": "user", "content": request.message})
-
-        # Create generator function for streaming
-        async def event_generator():
-            full_response = []
-            tool_request = None
-            tool_response = None
-            async for chunk in service.generate_stream(request.message, messages=messages):
-                full_response.append(chunk)
-                # Optionally, update tool_request/tool_response if your service provides them during streaming
-                if hasattr(service, 'last_tool_request'):
-                    tool_request = service.last_tool_request
-                if hasattr(service, 'last_tool_response'):
-                    tool_response = service.last_tool_response
-                yield {
-                    "event": "message",
-                    "data": chunk
-                }
-            
-            # Generate conversation_id if not provided
-            conversation_id = request.conversation_id or str(uuid4())
-            
-            # Save chat history after completion
-            chat_history = ChatHistory(
-                model_provider_id=provider.id,
-                conversation_id=conversation_id,
-                user_message=request.message,
-                assistant_message="".join(full_response),
-                chat_metadata=request.chat_metadata,
-                tool_request=tool_request,
-                tool_response=tool_response
-            )
-            db.add(chat_history)
-            await db.commit()
-        
-        return EventSourceResponse(event_generator())
+        open_stream = await prepare_chat_stream(request, db)
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+    # Return the connection to the pool before generation; the turn is written by the recorder
+    await db.close()
+
+    # Generation runs as its own task, so a client that drops can reconnect to it
+    async def produce(resumable: ResumableStream):
+        # Chunks are coalesced into pre-encoded, numbered events, which EventSourceResponse sends as is
+        options = request.stream_options or StreamOptions()
+        writer = CoalescingSSEWriter(
+            open_stream(), max_bytes=options.coalesce_bytes, flush_interval=options.flush_interval, id_prefix=resumable.id
+        )
+        try:
+            async for event in writer:
+                await resumable.publish(writer.events, event)
+        except Exception as e:
+            # The response has already started, so report the failure as an event
+            error = {"detail": str(e)}
+            if isinstance(e, RateLimitExceeded):
+                error["retry_after"] = e.retry_after
+            seq = writer.events + 1
+            await resumable.publish(seq, encode_event(json.dumps(error), "error", f"{resumable.id}:{seq}"))
+
+    resumable = stream_registry.start(produce)
+    return EventSourceResponse(resumable.subscribe(), headers={"X-Stream-ID": resumable.id})
+
+
+def parse_last_event_id(last_event_id: Optional[str], stream_id: str) -> int:
+    """Get the event number from a Last-Event-ID of the form <stream_id>:<number> (or just <number>)."""
+    if not last_event_id:
+        return 0
+    prefix, _, number = last_event_id.rpartition(":")
+    if (prefix and prefix != stream_id) or not number.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    return int(number)
+
+
+@router.get("/chat/stream/{stream_id}")
+async def resume_chat_stream(
+    stream_id: str,
+    last_event_id: Optional[str] = Header(None),
+    after: Optional[str] = Query(None, description="Last event ID received, for clients that cannot set Last-Event-ID")
+):
+    """Reattach to a running or just finished stream, receiving only the events after Last-Event-ID."""
+    resumable = stream_registry.get(stream_id)
+    if resumable is None:
+        raise HTTPException(status_code=404, detail="Stream not found or expired")
+    seq = parse_last_event_id(last_event_id or after, stream_id)
+    if not resumable.can_replay(seq):
+        raise HTTPException(status_code=409, detail="The events after Last-Event-ID are no longer buffered")
+    stream_registry.resumed += 1
+    return EventSourceResponse(resumable.subscribe(seq), headers={"X-Stream-ID": resumable.id})
+
+
+@router.post("/batch")
+async def chat_batch(
+    request: BatchChatRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Generate chat responses for many independent requests, streamed back as NDJSON.
+
+    Each item produces one line, {"index": ..., "chat": ...} or {"index": ..., "error": ...},
+    as soon as it finishes. Prompts are sent to each provider in multi-prompt batches with at
+    most max_concurrency prompts in flight, and all results are persisted with one bulk
+    insert, reported by a final {"persisted": ...} line. Items sharing a conversation_id do
+    not see each other's turns. Items for a routing group all go to its best member, without
+    hedging.
+    """
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch can hold at most {settings.BATCH_MAX_ITEMS} items")
+    max_concurrency = request.max_concurrency or settings.BATCH_PROVIDER_CONCURRENCY
+
+    # Resolve routing, providers, services and conversation context while the request session is open
+    routes: Dict[int, Union[Tuple[int, Dict[str, Any]], str]] = {}
+    services: Dict[int, Union[Tuple[ModelProviderInDB, Any], str]] = {}
+    provider_ids: Dict[int, int] = {}
+    routings: Dict[int, Dict[str, Any]] = {}
+    groups: Dict[int, List[int]] = {}
+    contexts: Dict[int, List[BaseMessage]] = {}
+    errors: Dict[int, str] = {}
+    for index, item in enumerate(request.items):
+        try:
+            provider_id = item.model_provider_id
+            if item.routing_group_id:
+                if item.routing_group_id not in routes:
+                    try:
+                        group = await get_routing_group_or_404(item.routing_group_id, db)
+                        candidates = await get_routing_candidates(group, db)
+                        routes[item.routing_group_id] = (candidates[0].id, routing_decision(
+                            group, candidates, provider_id=candidates[0].id, attempts=[candidates[0].id], hedged=False
+                        ))
+                    except HTTPException as e:
+                        routes[item.routing_group_id] = e.detail
+                if isinstance(routes[item.routing_group_id], str):
+                    errors[index] = routes[item.routing_group_id]
+                    continue
+                provider_id, routings[index] = routes[item.routing_group_id]
+            if provider_id not in services:
+                try:
+                    provider = await get_provider_or_404(provider_id, db)
+                    services[provider_id] = (provider, await get_provider_service(provider))
+                except HTTPException as e:
+                    services[provider_id] = e.detail
+            if isinstance(services[provider_id], str):
+                errors[index] = services[provider_id]
+                continue
+            contexts[index] = []
+            if item.conversation_id:
+                contexts[index] = await get_conversation_messages(item.conversation_id, db)
+            provider_ids[index] = provider_id
+            groups.setdefault(provider_id, []).append(index)
+        except Exception as e:
+            errors[index] = str(e)
+
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def run_provider(provider_id: int, indices: List[int]) -> None:
+        """Work through one provider's prompts in multi-prompt calls under its concurrency cap."""
+        service = services[provider_id][1]
+        per_call = min(settings.BATCH_PROMPTS_PER_CALL, max_concurrency)
+        calls = deque(indices[start:start + per_call] for start in range(0, len(indices), per_call))
+
+        async def worker() -> None:
+            while calls:
+                call = calls.popleft()
+                prompts = [(request.items[index].message, contexts[index]) for index in call]
+                priority = min((request.items[index].priority for index in call), key=PRIORITIES.get)
+                try:
+                    responses = await generation.generate_batch(service, prompts, priority=priority)
+                except RateLimitExceeded as e:
+                    responses = [e] * len(call)
+                except Exception:
+                    # One failed prompt fails the whole call, so retry the prompts one by one
+                    responses = []
+                    for message, messages in prompts:
+                        try:
+                            responses.append(await generation.generate_response(
+                                service, message, messages=messages, priority=priority
+                            ))
+                        except Exception as e:
+                            responses.append(e)
+                for index, response in zip(call, responses):
+                    await results.put((index, response))
+
+        await asyncio.gather(*(worker() for _ in range(max(1, max_concurrency // per_call))))
+
+    async def result_generator():
+        for index, error in errors.items():
+            yield json.dumps({"index": index, "error": error}) + "\n"
+
+        pending = len(request.items) - len(errors)
+        if not pending:
+            yield json.dumps({"persisted": 0}) + "\n"
+            return
+        # The request session is closed before the body is sent, so use our own
+        async with AsyncSessionLocal() as session:
+            ids = deque(await reserve_chat_history_ids(session, pending))
+
+        tasks = [asyncio.ensure_future(run_provider(provider_id, indices)) for provider_id, indices in groups.items()]
+        chat_histories = []
+        try:
+            for _ in range(pending):
+                index, response = await results.get()
+                if isinstance(response, Exception):
+                    yield json.dumps({"index": index, "error": str(response)}) + "\n"
+                    continue
+                item = request.items[index]
+                provider = services[provider_ids[index]][0]
+                chat_history = ChatHistory(
+                    id=ids.popleft(),
+                    model_provider_id=provider.id,
+                    conversation_id=item.conversation_id or str(uuid4()),
+                    user_message=item.message,
+                    assistant_message=response,
+                    chat_metadata=with_routing_metadata(item.chat_metadata, routings.get(index)),
+                    status="complete",
+                    created_at=datetime.utcnow()
+                )
+                chat_histories.append((item, chat_history))
+                chat = build_chat_history_response(chat_history, ModelProviderBase.from_orm(provider))
+                yield json.dumps({"index": index, "chat": chat.model_dump(mode="json")}) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        # Persist every result with one bulk insert
+        if chat_histories:
+            queued = chat_history_writer.running
+            try:
+                if queued:
+                    for _, chat_history in chat_histories:
+                        await chat_history_writer.enqueue(chat_history)
+                else:
+                    from sqlalchemy import insert
+                    async with AsyncSessionLocal() as session:
+                        await session.execute(insert(ChatHistory), [
+                            {column.key: getattr(chat_history, column.key) for column in ChatHistory.__table__.columns}
+                            for _, chat_history in chat_histories
+                        ])
+                        await session.commit()
+            except Exception as e:
+                yield json.dumps({"persisted": 0, "error": str(e)}) + "\n"
+                return
+            for item, chat_history in chat_histories:
+                record_turn(
+                    chat_history.conversation_id,
+                    chat_history.user_message,
+                    chat_history.assistant_message,
+                    create=item.conversation_id is None,
+                    queued=queued
+                )
+        yield json.dumps({"persisted": len(chat_histories)}) + "\n"
+
+    return StreamingResponse(result_generator(), media_type="application/x-ndjson")
+
+
+def encode_history_cursor(chat_history: ChatHistory) -> str:
+    """Encode the keyset position of a chat history row as an opaque cursor."""
+    position = f"{chat_history.created_at.isoformat()}|{chat_history.id}"
+    return urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor into the (created_at, id) position it points at."""
+    try:
+        created_at, row_id = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
 @router.get("/history/{provider_id}", response_model=list[ChatHistoryResponse])
 async def get_chat_history(
     provider_id: int,
+    response: Response,
     conversation_id: str = Query(None, description="Filter by conversation ID"),
-    db: AsyncSession = Depends(get_db)
+    limit: Optional[int] = Query(
+        None, ge=1, le=settings.CHAT_HISTORY_MAX_PAGE_SIZE, description="Maximum number of rows to return"
+    ),
+    after: Optional[str] = Query(None, description="Cursor from X-Next-Cursor of the previous page"),
+    stream: bool = Query(False, description="Stream every matching row as NDJSON"),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db)
 ):
-    """Get chat history for a specific provider, optionally filtered by conversation_id."""
-    await get_provider_or_404(provider_id, db)
-    from sqlalchemy import select
-    from sqlalchemy.orm import selectinload
-    stmt = (
-        select(ChatHistory)
-        .options(selectinload(ChatHistory.model_provider))
-        .where(ChatHistory.model_provider_id == provider_id)
-    )
+    """Get chat history for a specific provider, newest first, optionally filtered by conversation_id.
+
+    Rows are paginated by keyset on (created_at, id); when more rows follow, the cursor for
+    the next page is returned in the X-Next-Cursor header. With stream=true the rows are
+    read from a server-side cursor and emitted as NDJSON, without a default limit. Rows are
+    read from a replica when one is configured; the provider is not, as it fills the provider cache.
+    """
+    provider = await get_provider_or_404(provider_id, db)
+    model_provider = ModelProviderBase.from_orm(provider)
+
+    from sqlalchemy import select, tuple_
+    stmt = select(ChatHistory).where(ChatHistory.model_provider_id == provider_id)
     if conversation_id:
         stmt = stmt.where(ChatHistory.conversation_id == conversation_id)
-    stmt = stmt.order_by(ChatHistory.created_at.desc())
-    result = await db.execute(stmt)
+    if after:
+        stmt = stmt.where(tuple_(ChatHistory.created_at, ChatHistory.id) < decode_history_cursor(after))
+    stmt = stmt.order_by(ChatHistory.created_at.desc(), ChatHistory.id.desc())
+
+    if stream:
+        if limit:
+            stmt = stmt.limit(limit)
+        stmt = stmt.execution_options(yield_per=settings.CHAT_HISTORY_STREAM_BATCH_SIZE)
+
+        async def row_generator():
+            # The request session is closed before the body is sent, so stream from our own
+            async with replica_router.session(conversation_id) as session:
+                result = await session.stream(stmt)
+                async for ch in result.scalars():
+                    yield build_chat_history_response(ch, model_provider).model_dump_json() + "\n"
+
+        return StreamingResponse(row_generator(), media_type="application/x-ndjson")
+
+    limit = limit or settings.CHAT_HISTORY_PAGE_SIZE
+    result = await read_db.execute(stmt.limit(limit))
     chat_histories = result.scalars().all()
-    return [
-        ChatHistoryResponse(
-            id=ch.id,
-            user_message=ch.user_message,
-            assistant_message=ch.assistant_message,
-            chat_metadata=ch.chat_metadata,
-            created_at=ch.created_at,
-            model_provider=ModelProviderBase.from_orm(ch.model_provider),
-            conversation_id=ch.conversation_id,
-            tool_request=ch.tool_request,
-            tool_response=ch.tool_response
-        )
-        for ch in chat_histories
-    ]
+    if len(chat_histories) == limit:
+        response.headers["X-Next-Cursor"] = encode_history_cursor(chat_histories[-1])
+    return [build_chat_history_response(ch, model_provider) for ch in chat_histories]
@@ -0,0 +1,172 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.api.v1.chat import complete_chat, prepare_chat_stream
+from app.core.config import settings
+from app.database.base import AsyncSessionLocal
+from app.schemas.schemas import ChatRequest
+from app.services.rate_limiter import RateLimitExceeded
+
+router = APIRouter()
+
+
+class CreditWindow:
+    """Chunk frames a turn may still send; the client grants more with credit frames."""
+
+    def __init__(self, credits: int):
+        self.credits = credits
+        self._granted = asyncio.Event()
+
+    async def take(self) -> None:
+        while self.credits <= 0:
+            self._granted.clear()
+            await self._granted.wait()
+        self.credits -= 1
+
+    def grant(self, credits: int) -> None:
+        self.credits += credits
+        self._granted.set()
+
+
+class ChatConnection:
+    """One WebSocket carrying many concurrent chat turns, each identified by the client's turn ID.
+
+    Client frames:
+        {"type": "chat", "id": ..., "request": {ChatRequest}, "credits": n}
+        {"type": "credit", "id": ..., "credits": n}
+        {"type": "cancel", "id": ...}
+
+    Server frames:
+        {"type": "chunk", "id": ..., "seq": n, "data": ...}  (streamed turns)
+        {"type": "done", "id": ...}
+        {"type": "response", "id": ..., "chat": {ChatHistoryResponse}}  (non-streamed turns)
+        {"type": "cancelled", "id": ...}
+        {"type": "error", "id": ..., "status_code": ..., "detail": ...}
+
+    Each chunk frame uses one of its turn's credits; a turn without credits stops reading
+    from its provider until the client grants more, without holding up the other turns.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.turns: Dict[str, asyncio.Task] = {}
+        self.windows: Dict[str, CreditWindow] = {}
+        self.closed = False
+        self._send_lock = asyncio.Lock()
+
+    async def serve(self) -> None:
+        """Read frames until the client disconnects, then cancel its unfinished turns."""
+        try:
+            while True:
+                try:
+                    frame = json.loads(await self.websocket.receive_text())
+                    frame_type = frame.get("type")
+                except (ValueError, AttributeError):
+                    await self.send_error(None, 400, "Frames must be JSON objects")
+                    continue
+                if frame_type == "chat":
+                    await self.start_turn(frame)
+                elif frame_type == "credit":
+                    window = self.windows.get(frame.get("id"))
+                    credits = frame.get("credits")
+                    if not isinstance(credits, int) or credits < 0:
+                        await self.send_error(frame.get("id"), 400, "credits must be a non-negative integer")
+                    elif window is not None:
+                        window.grant(credits)
+                elif frame_type == "cancel":
+                    task = self.turns.get(frame.get("id"))
+                    if task is not None:
+                        task.cancel()
+                else:
+                    await self.send_error(frame.get("id"), 400, f"Unknown frame type: {frame_type}")
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.closed = True
+            tasks = list(self.turns.values())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def start_turn(self, frame: Dict[str, Any]) -> None:
+        turn_id = frame.get("id")
+        if not isinstance(turn_id, str) or not turn_id:
+            await self.send_error(None, 400, "Chat frames need a string id")
+            return
+        if turn_id in self.turns:
+            await self.send_error(turn_id, 409, "A turn with this id is still running")
+            return
+        if len(self.turns) >= settings.WS_MAX_CONCURRENT_TURNS:
+            await self.send_error(turn_id, 429, f"At most {settings.WS_MAX_CONCURRENT_TURNS} turns can run at once")
+            return
+        try:
+            request = ChatRequest(**(frame.get("request") or {}))
+        except (ValidationError, TypeError) as e:
+            await self.send_error(turn_id, 422, str(e))
+            return
+
+        credits = frame.get("credits", settings.WS_INITIAL_CREDITS)
+        if not isinstance(credits, int) or credits < 0:
+            await self.send_error(turn_id, 400, "credits must be a non-negative integer")
+            return
+        self.windows[turn_id] = CreditWindow(credits)
+        self.turns[turn_id] = asyncio.ensure_future(self.run_turn(turn_id, request))
+
+    async def run_turn(self, turn_id: str, request: ChatRequest) -> None:
+        """Generate one turn with the same service and persistence logic as the HTTP endpoints."""
+        try:
+            async with AsyncSessionLocal() as db:
+                if not request.stream:
+                    chat = await complete_chat(request, db)
+                    await self.send({"type": "response", "id": turn_id, "chat": chat.model_dump(mode="json")})
+                    return
+                open_stream = await prepare_chat_stream(request, db)
+
+            # The session is closed before generation; the turn is written by the recorder
+            window = self.windows[turn_id]
+            chunks = open_stream()
+            try:
+                seq = 0
+                async for chunk in chunks:
+                    await window.take()
+                    seq += 1
+                    await self.send({"type": "chunk", "id": turn_id, "seq": seq, "data": chunk})
+            finally:
+                await chunks.aclose()
+            await self.send({"type": "done", "id": turn_id})
+        except asyncio.CancelledError:
+            await self.send({"type": "cancelled", "id": turn_id})
+            raise
+        except HTTPException as e:
+            await self.send_error(turn_id, e.status_code, e.detail)
+        except RateLimitExceeded as e:
+            await self.send_error(turn_id, 429, str(e), retry_after=e.retry_after)
+        except Exception as e:
+            await self.send_error(turn_id, 500, str(e))
+        finally:
+            self.turns.pop(turn_id, None)
+            self.windows.pop(turn_id, None)
+
+    async def send(self, frame: Dict[str, Any]) -> None:
+        """Send a frame; once the connection is gone, frames are dropped until serve() cancels the turns."""
+        if self.closed:
+            return
+        async with self._send_lock:
+            try:
+                await self.websocket.send_text(json.dumps(frame))
+            except (WebSocketDisconnect, RuntimeError):
+                self.closed = True
+
+    async def send_error(self, turn_id: Optional[str], status_code: int, detail: Any, **extra: Any) -> None:
+        await self.send({"type": "error", "id": turn_id, "status_code": status_code, "detail": detail, **extra})
+
+
+@router.websocket("/ws")
+async def chat_websocket(websocket: WebSocket):
+    """Multiplexed chat over one WebSocket; see ChatConnection for the frame protocol."""
+    await websocket.accept()
+    await ChatConnection(websocket).serve()
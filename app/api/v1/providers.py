@@ -1,15 +1,30 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.base import get_db
+from app.database.replicas import get_read_db, replica_router
 from app.models.models import ModelProvider
 from app.schemas.schemas import ModelProviderCreate, ModelProviderInDB, ModelProviderUpdate
 from app.services.factory import ModelServiceFactory
+from app.services.invalidation import invalidation_bus
+from app.services.provider_cache import provider_cache
+from app.tools.registry import ToolRegistry
 
 router = APIRouter()
 
 
+def evict_provider(provider_id: Optional[int] = None) -> None:
+    """Drop the cached row, model services and tool instances of a provider, or of every provider."""
+    provider_cache.invalidate(provider_id)
+    if provider_id is None:
+        ModelServiceFactory.clear()
+        ToolRegistry.clear()
+    else:
+        ModelServiceFactory.remove_service(provider_id)
+        ToolRegistry.remove_provider_tools(provider_id)
+
+
 @router.post("/", response_model=ModelProviderInDB)
 async def create_provider(
     provider: ModelProviderCreate,
@@ -17,9 +32,8 @@ async def create_provider(
 ):
     """Create a new model provider."""
     try:
-        # Validate the provider by initializing the service
-        await ModelServiceFactory.get_service(
-            provider_id=-1,  # Temporary ID for validation
+        # Validate the provider by initializing a throwaway service
+        await ModelServiceFactory.create_service(
             provider_name=provider.name,
             api_key=provider.api_key,
             config=provider.config
@@ -35,6 +49,8 @@ async def create_provider(
         db.add(db_provider)
         await db.commit()
         await db.refresh(db_provider)
+        provider_cache.invalidate(db_provider.id)
+        replica_router.stick()
         
         return db_provider
     except Exception as e:
@@ -44,7 +60,7 @@ async def create_provider(
 
 @router.get("/", response_model=List[ModelProviderInDB])
 async def list_providers(
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List all model providers."""
     from sqlalchemy import select
@@ -56,7 +72,7 @@ async def list_providers(
 @router.get("/{provider_id}", response_model=ModelProviderInDB)
 async def get_provider(
     provider_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific model provider."""
     from sqlalchemy import select
@@ -84,15 +100,11 @@ async def update_provider(
 
     # Update provider fields
     for field, value in provider_update.dict(exclude_unset=True).items():
-        print(field, value)  # Debug log
-        if field == "tool_ids":
-            print(f"Updating tool_ids to: {value}")  # Debug log
         setattr(db_provider, field, value)
 
     try:
-        # Validate the updated provider
-        await ModelServiceFactory.get_service(
-            provider_id=provider_id,
+        # Validate the updated provider by initializing a throwaway service
+        await ModelServiceFactory.create_service(
             provider_name=db_provider.name,
             api_key=db_provider.api_key,
             config=db_provider.config
@@ -100,6 +112,9 @@ async def update_provider(
         
         await db.commit()
         await db.refresh(db_provider)
+        evict_provider(provider_id)
+        replica_router.stick()
+        invalidation_bus.publish("provider", provider_id)
         
         return db_provider
     except Exception as e:
@@ -123,7 +138,9 @@ async def delete_provider(
     await db.delete(provider)
     await db.commit()
     
-    # Remove service instance if it exists
-    ModelServiceFactory.remove_service(provider_id)
+    # Remove the cached provider, service and tool instances here and in the other workers
+    evict_provider(provider_id)
+    replica_router.stick()
+    invalidation_bus.publish("provider", provider_id)
     
     return {"message": "Provider deleted successfully"}
@@ -0,0 +1,94 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.base import get_db
+from app.models.models import ModelProvider, RoutingGroup
+from app.schemas.schemas import RoutingGroupCreate, RoutingGroupInDB, RoutingGroupUpdate
+
+router = APIRouter()
+
+
+async def get_routing_group_or_404(group_id: int, db: AsyncSession) -> RoutingGroup:
+    """Get a routing group or raise 404 error."""
+    group = await db.get(RoutingGroup, group_id)
+    if not group:
+        raise HTTPException(status_code=404, detail="Routing group not found")
+    return group
+
+
+async def check_members_exist(provider_ids: List[int], db: AsyncSession) -> None:
+    """Raise 400 error unless every member provider exists."""
+    stmt = select(ModelProvider.id).where(ModelProvider.id.in_(provider_ids))
+    result = await db.execute(stmt)
+    missing = set(provider_ids) - set(result.scalars().all())
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Unknown provider IDs: {sorted(missing)}")
+
+
+@router.post("/", response_model=RoutingGroupInDB)
+async def create_routing_group(
+    group: RoutingGroupCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Create a routing group of model providers."""
+    await check_members_exist(group.provider_ids, db)
+    db_group = RoutingGroup(**group.model_dump())
+    db.add(db_group)
+    await db.commit()
+    await db.refresh(db_group)
+    return db_group
+
+
+@router.get("/", response_model=List[RoutingGroupInDB])
+async def list_routing_groups(
+    db: AsyncSession = Depends(get_db)
+):
+    """List all routing groups."""
+    stmt = select(RoutingGroup).order_by(RoutingGroup.id)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+@router.get("/{group_id}", response_model=RoutingGroupInDB)
+async def get_routing_group(
+    group_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a specific routing group."""
+    return await get_routing_group_or_404(group_id, db)
+
+
+@router.put("/{group_id}", response_model=RoutingGroupInDB)
+async def update_routing_group(
+    group_id: int,
+    group_update: RoutingGroupUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Update a routing group."""
+    db_group = await get_routing_group_or_404(group_id, db)
+    # Only the hedge delay can be cleared; a null name or member list leaves it unchanged
+    update = {
+        field: value for field, value in group_update.model_dump(exclude_unset=True).items()
+        if value is not None or field == "hedge_delay"
+    }
+    if "provider_ids" in update:
+        await check_members_exist(update["provider_ids"], db)
+    for field, value in update.items():
+        setattr(db_group, field, value)
+    await db.commit()
+    await db.refresh(db_group)
+    return db_group
+
+
+@router.delete("/{group_id}")
+async def delete_routing_group(
+    group_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete a routing group."""
+    db_group = await get_routing_group_or_404(group_id, db)
+    await db.delete(db_group)
+    await db.commit()
+    return {"message": "Routing group deleted successfully"}
@@ -1,12 +1,15 @@
+import time
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.metrics import tool_execution_seconds
+from app.core.tracing import record_span
 from app.database.base import get_db
-from app.models.models import ModelProvider
 from app.schemas.schemas import ToolExecuteRequest, ToolExecuteResponse, ToolListResponse
 from app.tools.registry import ToolRegistry
 from app.tools.base import ToolDefinition
+from app.services.provider_cache import provider_cache
 
 router = APIRouter()
 
@@ -29,10 +32,7 @@ async def get_provider_tools(
 ):
     """Get all tools enabled for a specific provider."""
     # Verify provider exists
-    from sqlalchemy import select
-    stmt = select(ModelProvider).where(ModelProvider.id == provider_id)
-    result = await db.execute(stmt)
-    provider = result.scalar_one_or_none()
+    provider = await provider_cache.get(provider_id, db)
     if not provider:
         raise HTTPException(status_code=404, detail="Provider not found")
     
@@ -47,10 +47,7 @@ async def execute_tool(
 ):
     """Execute a tool for a specific provider."""
     # Verify provider exists and has the tool enabled
-    from sqlalchemy import select
-    stmt = select(ModelProvider).where(ModelProvider.id == provider_id)
-    result = await db.execute(stmt)
-    provider = result.scalar_one_or_none()
+    provider = await provider_cache.get(provider_id, db)
     
     if not provider:
         raise HTTPException(status_code=404, detail="Provider not found")
@@ -61,7 +58,15 @@ async def execute_tool(
     try:
         # Get tool instance and execute
         tool = ToolRegistry.get_tool_instance(request.tool_id, provider_id)
-        result = await tool.execute(request.parameters)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await tool.execute(request.parameters)
+            outcome = "ok"
+        finally:
+            duration = time.perf_counter() - started
+            tool_execution_seconds.labels(request.tool_id, outcome).observe(duration)
+            record_span("tool", started, duration)
         
         return ToolExecuteResponse(
             result=result,
@@ -13,6 +13,12 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     LOG_LEVEL: str = "INFO"
+    WORKERS: int = 1  # worker processes forked by app.server
+    SERVER_BACKLOG: int = 2048  # pending connections the listening socket queues
+    SERVER_KEEPALIVE_TIMEOUT: int = 5  # seconds an idle keep-alive connection is kept open
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None  # connections per worker before new ones get 503
+    SHUTDOWN_DRAIN_TIMEOUT: float = 30.0  # seconds running SSE streams may take to finish on shutdown
+    SERVER_GRACEFUL_SHUTDOWN_TIMEOUT: Optional[float] = 10.0  # seconds then given to other requests
     
     # Database Settings
     POSTGRES_SERVER: str
@@ -20,11 +26,102 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     DATABASE_URL: Optional[str] = None
+    RUN_MIGRATIONS_ON_STARTUP: bool = True
+    DB_ECHO: bool = False  # log every SQL statement
 
     # Model Providers
     OPENAI_API_KEY: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
     PERPLEXITY_API_KEY: Optional[str] = None
+    FAKE_PROVIDER_ENABLED: bool = False  # register the offline "fake" provider for load tests
+
+    # Chat History Settings
+    CHAT_HISTORY_PAGE_SIZE: int = 100
+    CHAT_HISTORY_MAX_PAGE_SIZE: int = 1000
+    CHAT_HISTORY_STREAM_BATCH_SIZE: int = 500
+
+    # Cache Settings
+    CONVERSATION_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    PROVIDER_CACHE_TTL: float = 60.0  # seconds
+    RESPONSE_CACHE_ENABLED: bool = False  # only applies to requests with temperature 0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+    RESPONSE_CACHE_TTL: float = 3600.0  # seconds
+    RESPONSE_CACHE_DISK_PATH: Optional[str] = None  # SQLite file for a cache tier that survives restarts
+    SERVICE_CACHE_MAX_INSTANCES: int = 256  # initialized model services kept by ModelServiceFactory
+    SERVICE_CACHE_IDLE_TTL: float = 3600.0  # seconds an unused model service is kept
+
+    # Write-behind Persistence Settings
+    CHAT_WRITE_BEHIND: bool = False
+    CHAT_WRITE_BATCH_SIZE: int = 100
+    CHAT_WRITE_FLUSH_INTERVAL: float = 0.05  # seconds
+    CHAT_WRITE_QUEUE_SIZE: int = 10000
+    CHAT_WRITE_SPOOL_PATH: Optional[str] = "chat_history_spool.jsonl"
+    CHAT_WRITE_SPOOL_RETRY_INTERVAL: float = 30.0  # seconds between retries of spooled rows
+
+    # Generation Settings
+    SINGLE_FLIGHT_ENABLED: bool = True  # share one upstream call between identical in-flight requests
+
+    # HTTP Pool Settings
+    HTTP_POOL_MAX_CONNECTIONS: int = 100  # per upstream host
+    HTTP_POOL_MAX_KEEPALIVE: int = 20  # idle connections kept open per upstream host
+    HTTP_POOL_KEEPALIVE_EXPIRY: float = 60.0  # seconds
+    HTTP_POOL_HTTP2: bool = True  # offered when the h2 package is installed
+    HTTP_POOL_HOST_LIMITS: Dict[str, int] = {}  # max connections per host, e.g. {"api.openai.com": 200}
+
+    # Streaming Settings
+    SSE_COALESCE_BYTES: int = 512  # flush a coalesced event at this size; 0 sends one event per chunk
+    SSE_FLUSH_INTERVAL: float = 0.05  # seconds a chunk may wait to be coalesced with later ones
+    SSE_MAX_BUFFER_BYTES: int = 64 * 1024  # unsent bytes per stream before reading upstream pauses
+    STREAM_CHECKPOINT_INTERVAL: float = 2.0  # seconds between writes of a stream's partial response
+    STREAM_REPLAY_BUFFER_EVENTS: int = 256  # events per stream kept for clients that reconnect
+    STREAM_REPLAY_TTL: float = 60.0  # seconds a finished stream can still be resumed
+    STREAM_RESUME_TIMEOUT: float = 30.0  # seconds generation continues with no client attached
+
+    # WebSocket Settings
+    WS_MAX_CONCURRENT_TURNS: int = 32  # turns running at once on one connection
+    WS_INITIAL_CREDITS: int = 64  # chunk frames a turn may send before the client grants more
+
+    # Tracing Settings
+    SERVER_TIMING_ENABLED: bool = True  # report each request's spans in a Server-Timing header
+    TRACE_SAMPLE_RATE: float = 0.0  # share of requests whose trace is exported
+    TRACE_EXPORT_PATH: Optional[str] = "traces.jsonl"
+
+    # Warm-up Settings
+    WARMUP_ENABLED: bool = True  # initialize provider services and DB connections before reporting ready
+    WARMUP_DB_CONNECTIONS: int = 5  # pool connections opened on startup
+    WARMUP_PROBE: bool = False  # send each provider a one-word request, which is billed
+    WARMUP_TIMEOUT: float = 30.0  # seconds after which the worker is reported ready regardless
+
+    # Read Replica Settings
+    DATABASE_REPLICA_URLS: list[str] = []  # read-only endpoints are served from these when set
+    REPLICA_STICKY_SECONDS: float = 5.0  # reads go to the primary this long after a write they could miss
+    REPLICA_RETRY_SECONDS: float = 30.0  # a replica that failed to connect is skipped this long
+
+    # Invalidation Settings
+    INVALIDATION_BUS_ENABLED: bool = True  # propagate cache invalidations to other workers over LISTEN/NOTIFY
+    INVALIDATION_CHANNEL: str = "cache_invalidation"
+    INVALIDATION_HEARTBEAT: float = 5.0  # seconds between checks of an idle listener connection
+    INVALIDATION_RECONNECT_DELAY: float = 1.0  # seconds
+
+    # Rate Limit Settings
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REQUESTS_PER_MINUTE: Optional[int] = None  # default when the provider config sets none
+    RATE_LIMIT_TOKENS_PER_MINUTE: Optional[int] = None  # default when the provider config sets none
+    RATE_LIMIT_MAX_QUEUE: int = 1000  # requests waiting per provider
+    RATE_LIMIT_MAX_WAIT: float = 30.0  # seconds a request may wait to be admitted
+    RATE_LIMIT_MAX_RETRIES: int = 2  # retries of upstream 429s, re-admitted through the queue
+    RATE_LIMIT_COMPLETION_TOKENS: int = 256  # reserved per request when the config sets no max_tokens
+
+    # Routing Settings
+    ROUTING_HEDGE_DELAY: Optional[float] = None  # seconds, for groups that set none; None disables hedging
+    ROUTING_EWMA_ALPHA: float = 0.2  # weight of the newest latency and error observation
+    ROUTING_ERROR_PENALTY: float = 10.0  # seconds added to a member's score at a 100% error rate
+    ROUTING_ERROR_HALF_LIFE: float = 60.0  # seconds for an idle member's error rate to halve
+
+    # Batch Chat Settings
+    BATCH_MAX_ITEMS: int = 1000
+    BATCH_PROVIDER_CONCURRENCY: int = 16  # prompts in flight per provider
+    BATCH_PROMPTS_PER_CALL: int = 8  # prompts sent in one multi-prompt agenerate call
 
     # Security Settings
     CORS_ORIGINS: list[str] = ["*"]
@@ -46,4 +143,3 @@ def get_settings() -> Settings:
 
 
 settings = get_settings()
-print(settings.POSTGRES_SERVER)
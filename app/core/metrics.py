@@ -0,0 +1,203 @@
+import bisect
+import math
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# Seconds, from a fast cache read to a long generation
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+THROUGHPUT_BUCKETS = (1.0, 5.0, 10.0, 25.0, 50.0, 100.0, 200.0, 500.0, 1000.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Value:
+    """The value of one labelled counter or gauge."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramValue:
+    """The buckets, sum and count of one labelled histogram."""
+
+    __slots__ = ("upper_bounds", "counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Sequence[float]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the seconds spent in the block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Metric:
+    """A named metric with one value per combination of label values.
+
+    Values are plain attributes updated from the event loop thread, so recording takes no
+    lock; ``labels()`` is a dict lookup, and callers on hot paths can keep its result.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: object):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}")
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        return _Value()
+
+    def samples(self) -> Iterator[Tuple[str, List[Tuple[str, str]], float]]:
+        for key, child in list(self._children.items()):
+            yield self.name, list(zip(self.labelnames, key)), child.value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(
+            f"{name}{_format_labels(labels)} {_format_value(value)}" for name, labels, value in self.samples()
+        )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def samples(self) -> Iterator[Tuple[str, List[Tuple[str, str]], float]]:
+        for key, child in list(self._children.items()):
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for upper_bound, count in zip((*self.buckets, math.inf), list(child.counts)):
+                cumulative += count
+                yield f"{self.name}_bucket", labels + [("le", _format_value(upper_bound))], cumulative
+            yield f"{self.name}_sum", labels, child.sum
+            yield f"{self.name}_count", labels, child.count
+
+
+class MetricsRegistry:
+    """Metrics of this process, rendered in the Prometheus text exposition format.
+
+    Collectors are called at scrape time to report values that are already counted
+    elsewhere, such as cache statistics, so they cost nothing on the request path.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Metric]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        metrics = list(self._metrics.values())
+        for collector in self._collectors:
+            metrics.extend(collector())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+metrics = MetricsRegistry()
+
+generation_seconds = metrics.histogram(
+    "chat_generation_seconds", "Upstream generation latency", ["provider", "mode"]
+)
+time_to_first_token_seconds = metrics.histogram(
+    "chat_time_to_first_token_seconds", "Seconds from opening an upstream stream to its first chunk", ["provider"]
+)
+tokens_per_second = metrics.histogram(
+    "chat_tokens_per_second", "Estimated completion tokens per second of generation", ["provider", "mode"],
+    buckets=THROUGHPUT_BUCKETS
+)
+generation_errors_total = metrics.counter(
+    "chat_generation_errors_total", "Upstream generations that failed", ["provider", "mode"]
+)
+streams_in_flight = metrics.gauge(
+    "chat_streams_in_flight", "Streamed chat turns currently generating", ["provider"]
+)
+db_query_seconds = metrics.histogram(
+    "db_query_seconds", "Database statement latency", ["operation"]
+)
+tool_execution_seconds = metrics.histogram(
+    "tool_execution_seconds", "Tool execution latency", ["tool_id", "outcome"]
+)
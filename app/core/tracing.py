@@ -0,0 +1,140 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+from app.core.config import settings
+
+
+class Trace:
+    """The spans recorded while handling one request, as (name, start offset, duration) in seconds."""
+
+    __slots__ = ("id", "started", "started_at", "spans")
+
+    def __init__(self):
+        self.id = uuid4().hex
+        self.started = time.perf_counter()
+        self.started_at = datetime.utcnow()
+        self.spans: List[Tuple[str, float, float]] = []
+
+    def add(self, name: str, started: float, duration: float) -> None:
+        self.spans.append((name, started - self.started, duration))
+
+    def server_timing(self) -> str:
+        """Format the time per span name, plus the total so far, as a Server-Timing header value."""
+        totals: Dict[str, float] = {}
+        for name, _, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        totals["total"] = time.perf_counter() - self.started
+        return ", ".join(f"{name};dur={duration * 1000:.1f}" for name, duration in totals.items())
+
+    def to_dict(self, **attributes: Any) -> Dict[str, Any]:
+        return {
+            "trace_id": self.id,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            **attributes,
+            "spans": [
+                {"name": name, "start_ms": round(start * 1000, 3), "duration_ms": round(duration * 1000, 3)}
+                for name, start, duration in self.spans
+            ],
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the block as a span of the current request's trace; a no-op outside a traced request."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, started, time.perf_counter() - started)
+
+
+def record_span(name: str, started: float, duration: float) -> None:
+    """Add a span measured elsewhere, e.g. by event hooks, to the current trace."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, started, duration)
+
+
+class JSONLTraceExporter:
+    """Appends traces to a JSONL file from a worker thread, off the event loop."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.exported = 0
+
+    def export(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record) + "\n"
+        asyncio.get_running_loop().run_in_executor(None, self._write, line)
+
+    def _write(self, line: str) -> None:
+        with self._lock:
+            with open(self.path, "a") as traces:
+                traces.write(line)
+            self.exported += 1
+
+
+class TracingMiddleware:
+    """Traces every HTTP request, reporting its spans in a Server-Timing header.
+
+    A pure ASGI middleware, so the trace's context variable reaches the endpoint and
+    streamed bodies are passed through untouched. The header carries the spans finished
+    when the response starts; a ``sample_rate`` share of complete traces is exported.
+    """
+
+    def __init__(
+        self,
+        app,
+        server_timing: bool = True,
+        sample_rate: float = 0.0,
+        exporter: Optional[JSONLTraceExporter] = None
+    ):
+        self.app = app
+        self.server_timing = server_timing
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        token = _current_trace.set(trace)
+        status_code = None
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(token)
+            if self.exporter is not None and random.random() < self.sample_rate:
+                self.exporter.export(trace.to_dict(method=scope["method"], path=scope["path"], status=status_code))
+
+
+trace_exporter = JSONLTraceExporter(settings.TRACE_EXPORT_PATH) if settings.TRACE_EXPORT_PATH else None
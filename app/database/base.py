@@ -1,10 +1,33 @@
+import time
 from typing import Any
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, declared_attr, sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import db_query_seconds
+from app.core.tracing import record_span
 
-engine = create_async_engine(settings.get_database_url, echo=True)
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+    duration = time.perf_counter() - context._query_started
+    db_query_seconds.labels(operation).observe(duration)
+    record_span("db", context._query_started, duration)
+
+
+def instrument_engine(engine: AsyncEngine) -> AsyncEngine:
+    """Time the engine's queries in the db_query_seconds metric and the request's "db" span."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _start_query_timer)
+    event.listen(engine.sync_engine, "after_cursor_execute", _record_query_time)
+    return engine
+
+
+engine = instrument_engine(create_async_engine(settings.get_database_url, echo=settings.DB_ECHO))
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
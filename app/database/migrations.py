@@ -0,0 +1,39 @@
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Revision matching the schema the old create_all startup hook produced
+BASELINE_REVISION = "0001"
+
+
+def get_alembic_config(connection: Optional[Connection] = None) -> Config:
+    """Get the Alembic configuration, optionally bound to an existing connection."""
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def upgrade_to_head(connection: Connection) -> None:
+    """Upgrade the database schema to the latest migration.
+
+    Databases created before migrations existed have tables but no alembic_version, so
+    they are stamped with the baseline revision before upgrading.
+    """
+    config = get_alembic_config(connection)
+    current_revision = MigrationContext.configure(connection).get_current_revision()
+    created_without_migrations = current_revision is None and inspect(connection).has_table("chathistory")
+    # Alembic manages its own transactions and autocommit blocks from here on
+    connection.commit()
+
+    if created_without_migrations:
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
@@ -0,0 +1,147 @@
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.database.base import AsyncSessionLocal, instrument_engine
+
+
+def _is_disconnect(error: BaseException) -> bool:
+    return isinstance(error, OSError) or (isinstance(error, DBAPIError) and error.connection_invalidated)
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.engine = instrument_engine(create_async_engine(url, echo=settings.DB_ECHO))
+        self.session_factory = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.down_until = 0.0
+        self.sessions = 0
+        self.failures = 0
+        self.error: Optional[str] = None
+
+
+class ReplicaRouter:
+    """Hands out sessions for read-only requests, spread round-robin over the healthy replicas.
+
+    Reads fall back to the primary when no replica is configured or healthy. A replica is
+    skipped for ``retry_seconds`` after it fails to connect or drops a connection. Reads
+    that could miss a recent write on a lagging replica are pinned to the primary for
+    ``sticky_seconds``: those of a conversation after one of its turns is written, and all
+    reads after a write that is not tied to a conversation.
+    """
+
+    def __init__(
+        self,
+        primary_session_factory: Callable[[], AsyncSession],
+        urls: List[str],
+        sticky_seconds: float = settings.REPLICA_STICKY_SECONDS,
+        retry_seconds: float = settings.REPLICA_RETRY_SECONDS
+    ):
+        self.primary_session_factory = primary_session_factory
+        self.replicas = [Replica(url) for url in urls]
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self._sticky: Dict[str, float] = {}  # key -> monotonic time its stickiness ends
+        self._sticky_all_until = 0.0
+        self._next = 0
+        self.primary_sessions = 0
+        self.sticky_reads = 0
+
+    def stick(self, key: Optional[str] = None) -> None:
+        """Send reads of key, or every read when no key is given, to the primary for a while."""
+        if not self.replicas or self.sticky_seconds <= 0:
+            return
+        now = time.monotonic()
+        until = now + self.sticky_seconds
+        if key is None:
+            self._sticky_all_until = until
+            return
+        if len(self._sticky) >= 10000:
+            self._sticky = {k: t for k, t in self._sticky.items() if t > now}
+        self._sticky[key] = until
+
+    def choose(self, key: Optional[str] = None) -> Optional[Replica]:
+        """The replica to read from next, or None to read from the primary."""
+        if not self.replicas:
+            return None
+        now = time.monotonic()
+        if self._sticky_all_until > now or (key is not None and self._sticky.get(key, 0.0) > now):
+            self.sticky_reads += 1
+            return None
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if replica.down_until <= now:
+                return replica
+        return None
+
+    def mark_down(self, replica: Replica, error: BaseException) -> None:
+        replica.down_until = time.monotonic() + self.retry_seconds
+        replica.failures += 1
+        replica.error = str(error) or type(error).__name__
+
+    @asynccontextmanager
+    async def session(self, key: Optional[str] = None) -> AsyncIterator[AsyncSession]:
+        """A session on a replica, or on the primary when none is usable for this read."""
+        replica = self.choose(key)
+        session = await self._connect(replica) if replica is not None else None
+        if session is None:
+            self.primary_sessions += 1
+            async with self.primary_session_factory() as session:
+                yield session
+            return
+        try:
+            yield session
+        except BaseException as e:
+            if _is_disconnect(e):
+                self.mark_down(replica, e)
+            raise
+        finally:
+            await session.close()
+
+    async def aclose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "primary_sessions": self.primary_sessions,
+            "sticky_reads": self.sticky_reads,
+            "replicas": [
+                {
+                    "url": replica.engine.url.render_as_string(hide_password=True),
+                    "healthy": replica.down_until <= now,
+                    "sessions": replica.sessions,
+                    "failures": replica.failures,
+                    "error": replica.error,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+    async def _connect(self, replica: Replica) -> Optional[AsyncSession]:
+        """Open a session with its connection checked out, so an unreachable replica falls back now."""
+        session = replica.session_factory()
+        try:
+            await session.connection()
+        except Exception as e:
+            await session.close()
+            self.mark_down(replica, e)
+            return None
+        replica.sessions += 1
+        return session
+
+
+replica_router = ReplicaRouter(AsyncSessionLocal, settings.DATABASE_REPLICA_URLS)
+
+
+async def get_read_db(request: Request) -> AsyncSession:
+    """Session for read-only endpoints, on a replica unless the request's conversation_id was just written."""
+    async with replica_router.session(request.query_params.get("conversation_id")) as session:
+        yield session
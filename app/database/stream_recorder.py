@@ -0,0 +1,104 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.database.base import AsyncSessionLocal
+from app.models.models import ChatHistory
+
+# Final writes of streams whose client went away, kept referenced until they finish
+_finishing: Set[asyncio.Task] = set()
+
+
+def _forget(task: asyncio.Task) -> None:
+    _finishing.discard(task)
+    if not task.cancelled():
+        task.exception()  # retrieved here when nobody awaited the task
+
+
+class StreamRecorder:
+    """Persists a streamed chat turn while it is generated, each write in its own short-lived session.
+
+    The row is inserted with status "streaming" at the first checkpoint, its partial
+    assistant_message is checkpointed every ``checkpoint_interval`` seconds, and the final
+    text and status are written when the stream ends. No connection is held in between, so
+    the pool size does not limit the number of concurrent streams.
+    """
+
+    def __init__(
+        self,
+        chat_history: ChatHistory,
+        session_factory: Callable = AsyncSessionLocal,
+        checkpoint_interval: Optional[float] = None
+    ):
+        self.chat_history = chat_history
+        self.session_factory = session_factory
+        self.checkpoint_interval = (
+            settings.STREAM_CHECKPOINT_INTERVAL if checkpoint_interval is None else checkpoint_interval
+        )
+        self.parts: List[str] = []
+        self.checkpoints = 0
+        self.failed_checkpoints = 0
+        self._last_checkpoint = time.monotonic()
+        self._checkpoint: Optional[asyncio.Task] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def append(self, chunk: str) -> None:
+        """Record a chunk, starting a checkpoint in the background when one is due."""
+        self.parts.append(chunk)
+        now = time.monotonic()
+        if now - self._last_checkpoint >= self.checkpoint_interval and (
+            self._checkpoint is None or self._checkpoint.done()
+        ):
+            self._last_checkpoint = now
+            self._checkpoint = asyncio.ensure_future(self._save_checkpoint())
+
+    async def finish(self, status: str, **fields: Any) -> None:
+        """Write the final text, status and any other columns, even if the caller is cancelled meanwhile."""
+        task = asyncio.ensure_future(self._finish(status, fields))
+        _finishing.add(task)
+        task.add_done_callback(_forget)
+        await asyncio.shield(task)
+
+    async def _finish(self, status: str, fields: Dict[str, Any]) -> None:
+        if self._checkpoint is not None:
+            await self._checkpoint
+        if status != "complete" and self.chat_history.id is None and not self.parts:
+            # Nothing was generated or stored, e.g. the request was rate limited
+            return
+        for key, value in fields.items():
+            setattr(self.chat_history, key, value)
+        await self._save(status)
+
+    async def _save_checkpoint(self) -> None:
+        try:
+            await self._save("streaming")
+            self.checkpoints += 1
+        except Exception:
+            # The stream goes on; the next checkpoint or the final write tries again
+            self.failed_checkpoints += 1
+
+    async def _save(self, status: str) -> None:
+        chat_history = self.chat_history
+        chat_history.assistant_message = self.text
+        chat_history.status = status
+        async with self.session_factory() as session:
+            if chat_history.id is None:
+                session.add(chat_history)
+            else:
+                await session.execute(
+                    update(ChatHistory)
+                    .where(ChatHistory.id == chat_history.id)
+                    .values(
+                        assistant_message=chat_history.assistant_message,
+                        status=status,
+                        tool_request=chat_history.tool_request,
+                        tool_response=chat_history.tool_response
+                    )
+                )
+            await session.commit()
@@ -0,0 +1,270 @@
+import asyncio
+import glob
+import json
+import os
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.database.base import AsyncSessionLocal
+from app.models.models import ChatHistory
+
+_COLUMNS = [column.key for column in ChatHistory.__table__.columns]
+
+
+def _to_json(row: Dict[str, Any]) -> str:
+    """Serialize a row for the spool file."""
+    return json.dumps({
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in row.items()
+    })
+
+
+def _from_json(line: str) -> Dict[str, Any]:
+    """Deserialize a row from the spool file."""
+    row = json.loads(line)
+    if row.get("created_at"):
+        row["created_at"] = datetime.fromisoformat(row["created_at"])
+    row.setdefault("status", "complete")  # spooled before rows had a status
+    return row
+
+
+async def reserve_chat_history_ids(session: AsyncSession, count: int) -> List[int]:
+    """Reserve primary keys for chat history rows that will be inserted later."""
+    result = await session.execute(
+        text(
+            "SELECT nextval(pg_get_serial_sequence('chathistory', 'id')) "
+            "FROM generate_series(1, :count)"
+        ),
+        {"count": count}
+    )
+    return list(result.scalars().all())
+
+
+class ChatHistoryWriter:
+    """Write-behind persistence of chat history rows in batched multi-row INSERTs.
+
+    Rows are queued in memory and flushed by a background task once ``batch_size`` rows
+    are pending or ``flush_interval`` seconds have passed. Batches that cannot be written
+    are appended to a spool file, which is retried every ``spool_retry_interval`` seconds
+    and replayed the next time the writer starts. Spooled rows stay pending until they
+    are written, so reads of their conversation still see them.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+        max_queue_size: int = 10000,
+        spool_path: Optional[str] = None,
+        spool_retry_interval: float = 30.0
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path
+        self.spool_retry_interval = spool_retry_interval
+        # Pre-forked workers leave replay to the parent, which replays every worker's spool
+        self.replay_on_start = True
+        # Called with each batch of rows once it is committed
+        self.on_written: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._max_queue_size = max_queue_size
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._reserved_ids: Deque[int] = deque()
+        self._reserve_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._collecting: List[Dict[str, Any]] = []
+        self._writing: Optional[asyncio.Future] = None
+        self._retry_at: Optional[float] = None  # loop time of the next spool retry, if rows are spooled
+        self.rows_written = 0
+        self.rows_spooled = 0
+        self.rows_dropped = 0
+        self.batches_written = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Replay spooled rows and start the background flush task."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_queue_size)
+        self._reserve_lock = asyncio.Lock()
+        if self.replay_on_start:
+            await self.replay_spool()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush every queued row and stop the background task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._writing is not None:
+            await self._writing
+        batch, self._collecting = self._collecting, []
+        await self._write(batch)
+        await self.flush()
+
+    async def reserve_id(self) -> int:
+        """Reserve a primary key for a row that will be written later.
+
+        IDs are taken from the table's sequence a block at a time, so responses can carry
+        the final ID without waiting for the insert.
+        """
+        if not self._reserved_ids:
+            async with self._reserve_lock:
+                if not self._reserved_ids:
+                    async with self.session_factory() as session:
+                        self._reserved_ids.extend(await reserve_chat_history_ids(session, self.batch_size))
+        return self._reserved_ids.popleft()
+
+    async def enqueue(self, chat_history: ChatHistory) -> None:
+        """Queue a chat history row for writing, waiting if the queue is full."""
+        row = {key: getattr(chat_history, key) for key in _COLUMNS}
+        self._pending[row["id"]] = row
+        await self._queue.put(row)
+
+    def pending_rows(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Get the queued rows of a conversation that are not written yet."""
+        return [row for row in self._pending.values() if row["conversation_id"] == conversation_id]
+
+    async def flush(self) -> None:
+        """Write every queued row immediately."""
+        while self._queue is not None and not self._queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._write(batch)
+
+    async def replay_spool(self) -> None:
+        """Insert rows left by earlier failed flushes in the spool file and in per-worker spool files."""
+        if not self.spool_path:
+            return
+        worker_spools = {
+            path[:-len(".replay")] if path.endswith(".replay") else path
+            for path in glob.glob(f"{glob.escape(self.spool_path)}.worker*")
+        }
+        for path in [self.spool_path, *sorted(worker_spools)]:
+            await self._replay_file(path)
+
+    async def _replay_file(self, spool_path: str) -> None:
+        # A leftover replay file means an earlier replay was interrupted, so finish that one first
+        replay_path = f"{spool_path}.replay"
+        if not os.path.exists(replay_path):
+            if not os.path.exists(spool_path):
+                return
+            os.replace(spool_path, replay_path)
+        with open(replay_path) as spool:
+            rows = [_from_json(line) for line in spool if line.strip()]
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            try:
+                await self._insert(batch)
+            except Exception:
+                # Retry row by row, so one bad row is the only one spooled again
+                for row in batch:
+                    await self._write([row])
+        os.remove(replay_path)
+
+    async def _retry_spool(self) -> None:
+        """Replay this writer's own spool file while it runs."""
+        self._retry_at = None
+        await self._replay_file(self.spool_path)
+
+    async def _run(self) -> None:
+        """Collect rows into batches and write them on the size or time trigger."""
+        loop = asyncio.get_running_loop()
+        while True:
+            if self._retry_at is not None and loop.time() >= self._retry_at:
+                self._writing = asyncio.ensure_future(self._retry_spool())
+                await asyncio.shield(self._writing)
+            timeout = None if self._retry_at is None else max(self._retry_at - loop.time(), 0)
+            try:
+                self._collecting.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                continue
+            deadline = loop.time() + self.flush_interval
+            while len(self._collecting) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._collecting.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            batch, self._collecting = self._collecting, []
+            # Shield the insert so stopping the writer never interrupts a batch half way
+            self._writing = asyncio.ensure_future(self._write(batch))
+            await asyncio.shield(self._writing)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert a batch of rows, spooling them to disk if the insert fails."""
+        if not batch:
+            return
+        try:
+            await self._insert(batch)
+        except Exception:
+            if self.spool_path:
+                await asyncio.to_thread(self._spool, batch)
+                if self._retry_at is None:
+                    self._retry_at = asyncio.get_running_loop().time() + self.spool_retry_interval
+            else:
+                self.rows_dropped += len(batch)
+                self._forget(batch)
+
+    async def _insert(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert a batch of rows, raising if the insert fails."""
+        async with self.session_factory() as session:
+            # Rows carry reserved IDs, so replaying a partially written batch is harmless
+            await session.execute(insert(ChatHistory).on_conflict_do_nothing(), batch)
+            await session.commit()
+        self.rows_written += len(batch)
+        self.batches_written += 1
+        self._forget(batch)
+        if self.on_written is not None:
+            self.on_written(batch)
+
+    def _forget(self, batch: List[Dict[str, Any]]) -> None:
+        for row in batch:
+            self._pending.pop(row["id"], None)
+
+    def _spool(self, batch: List[Dict[str, Any]]) -> None:
+        """Durably append a batch of rows to the spool file."""
+        with open(self.spool_path, "a") as spool:
+            spool.writelines(f"{_to_json(row)}\n" for row in batch)
+            spool.flush()
+            os.fsync(spool.fileno())
+        self.rows_spooled += len(batch)
+
+    def stats(self) -> Dict[str, int]:
+        """Get queue depth and write counters."""
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "rows_written": self.rows_written,
+            "rows_spooled": self.rows_spooled,
+            "rows_dropped": self.rows_dropped,
+            "batches_written": self.batches_written,
+        }
+
+
+chat_history_writer = ChatHistoryWriter(
+    AsyncSessionLocal,
+    batch_size=settings.CHAT_WRITE_BATCH_SIZE,
+    flush_interval=settings.CHAT_WRITE_FLUSH_INTERVAL,
+    max_queue_size=settings.CHAT_WRITE_QUEUE_SIZE,
+    spool_path=settings.CHAT_WRITE_SPOOL_PATH,
+    spool_retry_interval=settings.CHAT_WRITE_SPOOL_RETRY_INTERVAL
+)
@@ -1,9 +1,29 @@
+from typing import List, Optional
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from app.api.v1 import providers, chat, tools
+from app.api.v1 import providers, chat, chat_ws, tools, routing_groups
+from app.api.v1.providers import evict_provider
+from app.api.v1.chat import get_provider_api_key, publish_written_turns
 from app.core.config import settings
-from app.database.base import Base, engine
+from app.core.metrics import Counter, Gauge, Metric, metrics
+from app.core.tracing import TracingMiddleware, trace_exporter
+from app.database.base import AsyncSessionLocal, engine
+from app.database.replicas import replica_router
+from app.database.writer import chat_history_writer
+from app.services.conversation_cache import conversation_cache
+from app.services.factory import ModelServiceFactory
+from app.services.http_pool import http_pool
+from app.services.invalidation import invalidation_bus
+from app.services.provider_cache import provider_cache
+from app.services.rate_limiter import rate_limiter
+from app.services.routing import provider_router
+from app.services.response_cache import response_cache
+from app.services.single_flight import single_flight
+from app.services.stream_registry import stream_registry
+from app.services.warmup import warm_up
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -23,17 +43,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Trace every request, reporting its spans in a Server-Timing header
+app.add_middleware(
+    TracingMiddleware,
+    server_timing=settings.SERVER_TIMING_ENABLED,
+    sample_rate=settings.TRACE_SAMPLE_RATE,
+    exporter=trace_exporter
+)
+
 # Include routers
 app.include_router(
     providers.router,
     prefix=f"{settings.API_V1_STR}/providers",
     tags=["providers"]
 )
+app.include_router(
+    routing_groups.router,
+    prefix=f"{settings.API_V1_STR}/routing-groups",
+    tags=["routing groups"]
+)
 app.include_router(
     chat.router,
     prefix=f"{settings.API_V1_STR}/chat",
     tags=["chat"]
 )
+app.include_router(
+    chat_ws.router,
+    prefix=f"{settings.API_V1_STR}/chat",
+    tags=["chat"]
+)
 app.include_router(
     tools.router,
     prefix=f"{settings.API_V1_STR}",
@@ -43,9 +81,83 @@ app.include_router(
 
 @app.on_event("startup")
 async def init_db():
-    """Initialize database tables."""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """Bring the database schema up to date by running the Alembic migrations."""
+    if settings.RUN_MIGRATIONS_ON_STARTUP:
+        # Alembic is only needed here, so workers that skip migrations never import it
+        from app.database.migrations import upgrade_to_head
+        async with engine.connect() as conn:
+            await conn.run_sync(upgrade_to_head)
+
+
+@app.on_event("startup")
+async def start_chat_history_writer():
+    """Start write-behind persistence of chat history when enabled."""
+    if settings.CHAT_WRITE_BEHIND:
+        await chat_history_writer.start()
+
+
+def apply_provider_change(provider_id: Optional[int]) -> None:
+    """Evict a provider changed by another worker, and read from the primary until replicas have the change."""
+    evict_provider(provider_id)
+    replica_router.stick()
+
+
+def apply_conversation_change(conversation_id: Optional[str]) -> None:
+    """Drop a conversation another worker added a turn to, and read it from the primary for a while."""
+    conversation_cache.invalidate(conversation_id)
+    replica_router.stick(conversation_id)
+
+
+@app.on_event("startup")
+async def start_invalidation_bus():
+    """Apply cache invalidations published by other workers, and publish this worker's."""
+    if settings.INVALIDATION_BUS_ENABLED:
+        invalidation_bus.subscribe("provider", apply_provider_change)
+        invalidation_bus.subscribe("conversation", apply_conversation_change)
+        chat_history_writer.on_written = publish_written_turns
+        invalidation_bus.start(engine.url.set(drivername="postgresql").render_as_string(hide_password=False))
+
+
+@app.on_event("startup")
+async def start_warm_up():
+    """Warm up provider services and database connections; /ready reports when it is done."""
+    if settings.WARMUP_ENABLED:
+        warm_up.start(engine, AsyncSessionLocal, get_provider_api_key)
+    else:
+        warm_up.skip()
+
+
+@app.on_event("shutdown")
+async def stop_warm_up():
+    await warm_up.aclose()
+
+
+@app.on_event("shutdown")
+async def stop_streams():
+    """Cancel running stream generations, which record their partial responses."""
+    await stream_registry.aclose()
+
+
+@app.on_event("shutdown")
+async def stop_chat_history_writer():
+    """Flush chat history rows that are still queued."""
+    await chat_history_writer.stop()
+
+
+@app.on_event("shutdown")
+async def stop_invalidation_bus():
+    await invalidation_bus.aclose()
+
+
+@app.on_event("shutdown")
+async def close_replicas():
+    await replica_router.aclose()
+
+
+@app.on_event("shutdown")
+async def close_http_pool():
+    """Close the pooled upstream connections."""
+    await http_pool.aclose()
 
 
 @app.get("/")
@@ -59,10 +171,84 @@ async def root():
     }
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until startup warm-up has finished, and again while shutting down."""
+    if getattr(app.state, "draining", False):
+        return JSONResponse({"status": "draining"}, status_code=503)
+    if not warm_up.ready:
+        return JSONResponse({"status": "warming_up"}, status_code=503)
+    return {"status": "ready", "warmup": warm_up.stats()}
+
+
+@app.get("/stats")
+async def stats():
+    """Statistics of the caches, pools, queues, rate limiter, routing, streams, warm-up, invalidation bus and replicas."""
+    return {
+        "provider_cache": provider_cache.stats(),
+        "conversation_cache": conversation_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "model_services": ModelServiceFactory.stats(),
+        "single_flight": single_flight.stats(),
+        "http_pool": http_pool.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "routing": provider_router.stats(),
+        "streams": stream_registry.stats(),
+        "chat_history_writer": chat_history_writer.stats(),
+        "warmup": warm_up.stats(),
+        "invalidation_bus": invalidation_bus.stats(),
+        "replicas": replica_router.stats(),
+    }
+
+
+def collect_cache_metrics() -> List[Metric]:
+    """Report cache hits, misses and hit ratios from the caches' own counters."""
+    hits = Counter("cache_hits_total", "Cache lookups that were hits", ["cache"])
+    misses = Counter("cache_misses_total", "Cache lookups that were misses", ["cache"])
+    ratio = Gauge("cache_hit_ratio", "Share of cache lookups that were hits", ["cache"])
+    response_stats = response_cache.stats().values()
+    caches = {
+        "provider": provider_cache.stats(),
+        "conversation": conversation_cache.stats(),
+        "model_service": ModelServiceFactory.stats(),
+        "response": {
+            "hits": sum(stats["hits"] for stats in response_stats),
+            "misses": sum(stats["misses"] for stats in response_stats),
+        },
+    }
+    for cache, stats in caches.items():
+        hits.labels(cache).set(stats["hits"])
+        misses.labels(cache).set(stats["misses"])
+        lookups = stats["hits"] + stats["misses"]
+        ratio.labels(cache).set(stats["hits"] / lookups if lookups else 0.0)
+    return [hits, misses, ratio]
+
+
+def collect_stream_metrics() -> List[Metric]:
+    """Report resumable SSE streams and the clients attached to them."""
+    stats = stream_registry.stats()
+    streams = Gauge("sse_streams", "Resumable SSE streams by state", ["state"])
+    streams.labels("running").set(stats["running"])
+    streams.labels("finished").set(stats["finished"])
+    subscribers = Gauge("sse_stream_subscribers", "Clients attached to SSE streams")
+    subscribers.labels().set(stats["subscribers"])
+    return [streams, subscribers]
+
+
+metrics.register_collector(collect_cache_metrics)
+metrics.register_collector(collect_stream_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 def start():
-    """Entry point for the application."""
+    """Entry point for development, with auto-reload; see app.server for production."""
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("app.main:app", host=settings.HOST, port=settings.PORT, reload=True)
 
 if __name__ == "__main__":
     start()
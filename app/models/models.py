@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional, Dict, List
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Table
+from sqlalchemy import Column, Float, Integer, String, DateTime, Text, ForeignKey, Index, Table
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
 from sqlalchemy.orm import DeclarativeBase, Mapped
@@ -21,26 +22,46 @@ class ModelProvider(Base):
     id: Mapped[int] = Column(Integer, primary_key=True, index=True)
     name: Mapped[str] = Column(String(50), index=True, nullable=False)  # Removed unique=True
     api_key: Mapped[str] = Column(String(255), nullable=False)
-    config: Mapped[Optional[Dict]] = Column(JSON, nullable=True)
+    config: Mapped[Optional[Dict]] = Column(JSONB, nullable=True)
     created_at: Mapped[datetime] = Column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     chat_histories = relationship("ChatHistory", back_populates="model_provider")
-    tool_ids = Column(JSON, nullable=True, default=list)  # List of tool IDs enabled for this provider
+    tool_ids = Column(JSONB, nullable=True, default=list)  # List of tool IDs enabled for this provider
+
+
+class RoutingGroup(Base):
+    """A logical provider that routes each request to one of several member providers."""
+    __tablename__ = "routinggroup"
+
+    id: Mapped[int] = Column(Integer, primary_key=True, index=True)
+    name: Mapped[str] = Column(String(50), nullable=False)
+    provider_ids: Mapped[List[int]] = Column(JSONB, nullable=False, default=list)  # Member ModelProvider IDs
+    hedge_delay: Mapped[Optional[float]] = Column(Float, nullable=True)  # Seconds before hedging to a second member
+    created_at: Mapped[datetime] = Column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class ChatHistory(Base):
     __tablename__ = "chathistory"
+    __table_args__ = (
+        # Conversation context: WHERE conversation_id = ? ORDER BY created_at
+        Index("ix_chathistory_conversation_id_created_at", "conversation_id", "created_at"),
+        # Provider history: WHERE model_provider_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_chathistory_model_provider_id_created_at_id", "model_provider_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = Column(Integer, primary_key=True, index=True)
-    conversation_id: Mapped[str] = Column(String(50), index=True, nullable=True)
+    conversation_id: Mapped[str] = Column(String(50), nullable=True)
     model_provider_id: Mapped[int] = Column(Integer, ForeignKey("modelprovider.id"))
     user_message: Mapped[str] = Column(Text, nullable=False)
     assistant_message: Mapped[str] = Column(Text, nullable=False)
-    chat_metadata: Mapped[Optional[Dict]] = Column(JSON, nullable=True)
-    tool_request: Mapped[Optional[Dict]] = Column(JSON, nullable=True)
-    tool_response: Mapped[Optional[Dict]] = Column(JSON, nullable=True)
+    chat_metadata: Mapped[Optional[Dict]] = Column(JSONB, nullable=True)
+    tool_request: Mapped[Optional[Dict]] = Column(JSONB, nullable=True)
+    tool_response: Mapped[Optional[Dict]] = Column(JSONB, nullable=True)
+    # streaming, complete, interrupted (client disconnected) or failed (upstream error)
+    status: Mapped[str] = Column(String(20), nullable=False, default="complete", server_default="complete")
     created_at: Mapped[datetime] = Column(DateTime, default=datetime.utcnow)
 
     # Relationship with ModelProvider
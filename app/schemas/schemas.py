@@ -1,6 +1,6 @@
 from datetime import datetime
-from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List, Literal
+from pydantic import BaseModel, Field, model_validator
 
 from app.tools.base import ToolParameter, ToolDefinition
 
@@ -52,6 +52,34 @@ class ModelProviderInDB(ModelProviderBase):
         populate_by_name = True
 
 
+# RoutingGroup Schemas
+class RoutingGroupBase(BaseModel):
+    name: str = Field(..., min_length=1, max_length=50)
+    provider_ids: List[int] = Field(..., min_length=1, description="IDs of the member model providers")
+    hedge_delay: Optional[float] = Field(
+        None, gt=0, description="Seconds before a slow request is hedged to a second member"
+    )
+
+    class Config:
+        from_attributes = True
+
+
+class RoutingGroupCreate(RoutingGroupBase):
+    pass
+
+
+class RoutingGroupUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=50)
+    provider_ids: Optional[List[int]] = Field(None, min_length=1)
+    hedge_delay: Optional[float] = Field(None, gt=0)
+
+
+class RoutingGroupInDB(RoutingGroupBase):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+
 # ChatHistory Schemas
 class ChatHistoryBase(BaseModel):
     user_message: str
@@ -68,6 +96,7 @@ class ChatHistoryResponse(ChatHistoryBase):
     id: int
     conversation_id: Optional[str]
     assistant_message: str
+    status: Literal["streaming", "complete", "interrupted", "failed"] = "complete"
     created_at: datetime
     model_provider: ModelProviderBase
 
@@ -76,9 +105,36 @@ class ChatHistoryResponse(ChatHistoryBase):
 
 
 # Chat Request Schema
+class StreamOptions(BaseModel):
+    coalesce_bytes: Optional[int] = Field(
+        None, ge=0, le=65536, description="Bytes of text per event, 0 for one event per chunk; defaults to SSE_COALESCE_BYTES"
+    )
+    flush_interval: Optional[float] = Field(
+        None, ge=0, le=5, description="Seconds a chunk may wait to be coalesced; defaults to SSE_FLUSH_INTERVAL"
+    )
+
+
 class ChatRequest(BaseModel):
     message: str = Field(..., min_length=1)
-    model_provider_id: int = Field(..., gt=0)
+    model_provider_id: Optional[int] = Field(None, gt=0)
+    routing_group_id: Optional[int] = Field(None, gt=0, description="Route to the best member of a routing group")
     stream: bool = Field(default=False)
     conversation_id: Optional[str] = Field(None, min_length=1, max_length=50)
     chat_metadata: Optional[Dict[str, Any]] = None
+    priority: Literal["high", "normal", "low"] = Field(
+        default="normal", description="Admission priority when the provider is rate limited"
+    )
+    stream_options: Optional[StreamOptions] = Field(None, description="How streamed chunks are grouped into events")
+
+    @model_validator(mode="after")
+    def check_target(self) -> "ChatRequest":
+        if (self.model_provider_id is None) == (self.routing_group_id is None):
+            raise ValueError("Exactly one of model_provider_id and routing_group_id must be set")
+        return self
+
+
+class BatchChatRequest(BaseModel):
+    items: List[ChatRequest] = Field(..., min_length=1, description="Independent chat requests")
+    max_concurrency: Optional[int] = Field(
+        None, gt=0, description="Maximum prompts in flight per provider, defaults to BATCH_PROVIDER_CONCURRENCY"
+    )
@@ -0,0 +1,171 @@
+"""Production launcher: pre-forked uvicorn workers sharing one listening socket.
+
+The parent imports the application once, runs the migrations and replays spooled chat
+history, binds the socket and forks ``WORKERS`` children, which inherit the loaded modules
+instead of importing them again. uvloop and
+httptools are used when installed (the ``server`` extra). On SIGTERM or SIGINT each
+worker stops reporting ready, lets running SSE streams finish for up to
+``SHUTDOWN_DRAIN_TIMEOUT`` seconds, then shuts down, which records streams still
+running and flushes queued chat history rows.
+"""
+import asyncio
+import importlib.util
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+import uvicorn
+
+from app.core.config import settings
+
+
+def _event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def _http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def build_config(app) -> uvicorn.Config:
+    """Uvicorn configuration from Settings, with the fastest loop and parser installed."""
+    return uvicorn.Config(
+        app,
+        host=settings.HOST,
+        port=settings.PORT,
+        loop=_event_loop(),
+        http=_http_protocol(),
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_TIMEOUT,
+        limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_TIMEOUT,
+        log_level=settings.LOG_LEVEL.lower(),
+        proxy_headers=True,
+    )
+
+
+async def drain_streams(timeout: float) -> None:
+    """Wait for running SSE streams to finish, for at most ``timeout`` seconds."""
+    from app.services.stream_registry import stream_registry
+
+    deadline = time.monotonic() + timeout
+    while stream_registry.stats()["running"] and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+
+
+async def prepare_database() -> None:
+    """Run the work that must happen once per deployment rather than once per worker."""
+    from app.database.base import engine
+    from app.database.writer import chat_history_writer
+
+    if settings.RUN_MIGRATIONS_ON_STARTUP:
+        from app.database.migrations import upgrade_to_head
+        async with engine.connect() as conn:
+            await conn.run_sync(upgrade_to_head)
+    if settings.CHAT_WRITE_BEHIND:
+        await chat_history_writer.replay_spool()
+    # Connections are bound to this event loop and must not be shared with the workers
+    await engine.dispose()
+
+
+class DrainingServer(uvicorn.Server):
+    """A uvicorn server that drains SSE streams before it stops accepting connections.
+
+    uvicorn closes streaming responses as soon as it starts shutting down, so the first
+    exit signal only starts draining; a second one exits at once.
+    """
+
+    def __init__(self, config: uvicorn.Config):
+        super().__init__(config)
+        self._draining: Optional[asyncio.Task] = None
+
+    def handle_exit(self, sig, frame) -> None:
+        if self._draining is not None or self.should_exit:
+            super().handle_exit(sig, frame)
+            return
+        self.config.app.state.draining = True
+        self._draining = asyncio.get_event_loop().create_task(self._drain_then_exit(sig))
+
+    async def _drain_then_exit(self, sig) -> None:
+        await drain_streams(settings.SHUTDOWN_DRAIN_TIMEOUT)
+        super().handle_exit(sig, None)
+
+
+class Supervisor:
+    """Forks the workers, replaces workers that die and forwards shutdown signals to them."""
+
+    def __init__(self, config: uvicorn.Config, workers: int):
+        self.config = config
+        self.workers = workers
+        self.children: Dict[int, int] = {}  # pid -> worker number
+        self.stopping = False
+
+    def run(self) -> None:
+        sock = self.config.bind_socket()
+        for number in range(self.workers):
+            self.spawn(number, sock)
+
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            number = self.children.pop(pid, None)
+            if number is not None and not self.stopping:
+                print(f"Worker {pid} exited with status {status}, restarting", file=sys.stderr)
+                time.sleep(1)
+                self.spawn(number, sock)
+        sock.close()
+
+    def spawn(self, number: int, sock: socket.socket) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = number
+            return
+        # In the worker: the parent's handlers would forward signals to workers it does not have
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        from app.database.writer import chat_history_writer
+        # Concurrent workers must not append to or replay the same spool file
+        if chat_history_writer.spool_path:
+            chat_history_writer.spool_path = f"{settings.CHAT_WRITE_SPOOL_PATH}.worker{number}"
+        chat_history_writer.replay_on_start = False
+        try:
+            DrainingServer(self.config).run(sockets=[sock])
+        finally:
+            os._exit(0)
+
+    def stop(self, signum, frame) -> None:
+        """Pass the signal on; a second one is passed on too and makes workers exit at once."""
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+
+
+def serve() -> None:
+    """Entry point for production: ``poetry run serve``."""
+    # Imported here, before any worker is forked, so the workers share the loaded modules
+    from app.main import app
+
+    config = build_config(app)
+    if settings.WORKERS <= 1 or not hasattr(os, "fork"):
+        DrainingServer(config).run()
+        return
+    asyncio.run(prepare_database())
+    # Done above; workers migrating concurrently would race on DDL and the baseline stamp
+    settings.RUN_MIGRATIONS_ON_STARTUP = False
+    Supervisor(config, settings.WORKERS).run()
+
+
+if __name__ == "__main__":
+    serve()
@@ -1,15 +1,18 @@
-from typing import AsyncGenerator, Dict, Any, Optional
+from typing import AsyncGenerator, Dict, Any, Optional, List
 import json
 
+import anthropic
 from langchain.chat_models import ChatAnthropic
-from langchain.schema import HumanMessage, SystemMessage
 
 from app.services.base import BaseModelService
+from app.services.http_pool import http_pool
 
 
 class AnthropicService(BaseModelService):
+    default_system_message = "You are Claude, a helpful AI assistant."
+
     async def initialize_model(self) -> None:
-        """Initialize the Anthropic chat model."""
+        """Initialize the Anthropic chat model on the shared HTTP connection pool."""
         model_name = self.config.get("model_name", "claude-2.1")
         temperature = self.config.get("temperature", 0.7)
         streaming = self.config.get("streaming", False)
@@ -22,34 +25,27 @@ class AnthropicService(BaseModelService):
             streaming=streaming,
             max_tokens_to_sample=max_tokens
         )
+        # ChatAnthropic builds its SDK clients itself, so swap in one on the pool afterwards
+        self.model.async_client = anthropic.AsyncAnthropic(
+            api_key=self.api_key,
+            base_url=self.model.anthropic_api_url,
+            timeout=self.model.default_request_timeout,
+            max_retries=self.model.max_retries,
+            http_client=http_pool.async_client(self.model.anthropic_api_url)
+        )
 
-    async def generate_response(self, message: str) -> str:
+    async def generate_response(self, message: str, messages: Optional[List[Dict[str, str]]] = None) -> str:
         """Generate a response using the Anthropic chat model."""
-        messages = [
-            SystemMessage(content=self.config.get("system_message", "You are Claude, a helpful AI assistant.")),
-            HumanMessage(content=message)
-        ]
+        langchain_messages = self._build_langchain_messages(message, messages)
         
-        response = await self.model.agenerate([messages])
+        response = await self.model.agenerate([langchain_messages])
         return response.generations[0][0].text
 
-    async def generate_stream(self, message: str) -> AsyncGenerator[str, None]:
+    async def generate_stream(self, message: str, messages: Optional[List[Dict[str, str]]] = None) -> AsyncGenerator[str, None]:
         """Generate a streaming response using the Anthropic chat model."""
-        # Ensure streaming is enabled
-        if not self.model.streaming:
-            self.model = ChatAnthropic(
-                anthropic_api_key=self.api_key,
-                model_name=self.config.get("model_name", "claude-2.1"),
-                temperature=self.config.get("temperature", 0.7),
-                streaming=True,
-                max_tokens_to_sample=self.config.get("max_tokens", 1024)
-            )
-
-        messages = [
-            SystemMessage(content=self.config.get("system_message", "You are Claude, a helpful AI assistant.")),
-            HumanMessage(content=message)
-        ]
-
-        async for chunk in await self.model.astream([messages]):
+        # astream streams whatever the model's streaming flag is, so the pooled client is kept
+        langchain_messages = self._build_langchain_messages(message, messages)
+
+        async for chunk in self.model.astream(langchain_messages):
             if chunk.content:
                 yield chunk.content
@@ -1,15 +1,25 @@
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator, Dict, Any, Optional, List
+from typing import TYPE_CHECKING, AsyncGenerator, Dict, Any, Optional, List, Tuple, Union
 
-from langchain.schema import BaseMessage, HumanMessage, AIMessage
-from langchain.chat_models.base import BaseChatModel
+# langchain_core.messages is what langchain.schema re-exports, without loading the rest of langchain
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+
+if TYPE_CHECKING:
+    # Only the provider services, which are imported on first use, need the model classes
+    from langchain_core.language_models.chat_models import BaseChatModel
 
 
 class BaseModelService(ABC):
+    # Name the service was registered under and the provider it serves, set by ModelServiceFactory
+    provider_name: Optional[str] = None
+    provider_id: Optional[int] = None
+    # System message used when the provider config does not set one
+    default_system_message: str = "You are a helpful AI assistant."
+
     def __init__(self, api_key: str, config: Optional[Dict[str, Any]] = None):
         self.api_key = api_key
         self.config = config or {}
-        self._model: Optional[BaseChatModel] = None
+        self._model: Optional["BaseChatModel"] = None
 
     @abstractmethod
     async def initialize_model(self) -> None:
@@ -24,6 +34,7 @@ class BaseModelService(ABC):
         Args:
             message: The current message to respond to
             messages: Optional list of previous messages in the conversation, each with 'role' and 'content'
+                or already converted to LangChain messages
         """
         pass
 
@@ -35,25 +46,54 @@ class BaseModelService(ABC):
         Args:
             message: The current message to respond to
             messages: Optional list of previous messages in the conversation, each with 'role' and 'content'
+                or already converted to LangChain messages
         """
         pass
 
-    def _convert_messages_to_langchain_format(self, messages: List[Dict[str, str]]) -> List[BaseMessage]:
-        """Convert messages to LangChain format."""
+    async def generate_batch(self, prompts: List[Tuple[str, Optional[List[Dict[str, str]]]]]) -> List[str]:
+        """
+        Generate responses for several independent prompts with one multi-prompt agenerate call.
+
+        Args:
+            prompts: List of (message, messages) pairs, as taken by generate_response
+        """
+        response = await self.model.agenerate([
+            self._build_langchain_messages(message, messages) for message, messages in prompts
+        ])
+        return [generations[0].text for generations in response.generations]
+
+    def _build_langchain_messages(self, message: str, messages: Optional[List[Dict[str, str]]] = None) -> List[BaseMessage]:
+        """Build the prompt from the system message, the conversation history and the current message."""
+        langchain_messages = [
+            SystemMessage(content=self.config.get("system_message", self.default_system_message))
+        ]
+
+        # Add conversation history if provided
+        if messages:
+            langchain_messages.extend(self._convert_messages_to_langchain_format(messages))
+
+        # Add current message
+        langchain_messages.append(HumanMessage(content=message))
+        return langchain_messages
+
+    def _convert_messages_to_langchain_format(self, messages: List[Union[Dict[str, str], BaseMessage]]) -> List[BaseMessage]:
+        """Convert messages to LangChain format, passing already converted messages through."""
         langchain_messages = []
         for msg in messages:
-            if msg["role"] == "user":
+            if isinstance(msg, BaseMessage):
+                langchain_messages.append(msg)
+            elif msg["role"] == "user":
                 langchain_messages.append(HumanMessage(content=msg["content"]))
             elif msg["role"] == "assistant":
                 langchain_messages.append(AIMessage(content=msg["content"]))
         return langchain_messages
 
     @property
-    def model(self) -> BaseChatModel:
+    def model(self) -> "BaseChatModel":
         if self._model is None:
             raise ValueError("Model not initialized. Call initialize_model() first.")
         return self._model
 
     @model.setter
-    def model(self, value: BaseChatModel) -> None:
+    def model(self, value: "BaseChatModel") -> None:
         self._model = value
@@ -0,0 +1,151 @@
+import sys
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from app.core.config import settings
+
+# Rough per-message cost of the LangChain message object itself, on top of its content
+_MESSAGE_OVERHEAD = 512
+
+# Conversations whose change counters are kept before the counters are reset
+_MAX_VERSIONS = 10000
+
+
+def _message_size(message: BaseMessage) -> int:
+    """Estimate the memory held by a cached message."""
+    return sys.getsizeof(message.content) + _MESSAGE_OVERHEAD
+
+
+class ConversationCache:
+    """LRU cache of converted LangChain message history, bounded by memory size.
+
+    Every saved turn and invalidation bumps the conversation's version, so a history
+    loaded from the database is only cached if nothing changed while it was loading.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[List[BaseMessage], int]]" = OrderedDict()
+        self._size = 0
+        self._versions: Dict[str, int] = {}
+        self._generation = 0  # bumped whenever every version is reset
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, conversation_id: str) -> Optional[List[BaseMessage]]:
+        """Get the cached message history of a conversation, or None on a miss.
+
+        The returned list is owned by the cache and must not be mutated by callers.
+        """
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(conversation_id)
+        self.hits += 1
+        return entry[0]
+
+    def version(self, conversation_id: str) -> Tuple[int, int]:
+        """Get the version of a conversation, to pass to put after loading its history."""
+        return self._generation, self._versions.get(conversation_id, 0)
+
+    def put(
+        self,
+        conversation_id: str,
+        messages: List[BaseMessage],
+        version: Optional[Tuple[int, int]] = None
+    ) -> List[BaseMessage]:
+        """Cache the full message history of a conversation.
+
+        When ``version`` is given, the history is only cached if the conversation has not
+        changed since that version was taken, since it could be missing a newer turn.
+        """
+        if version is not None and version != self.version(conversation_id):
+            return messages
+        self._remove(conversation_id)
+        size = sum(_message_size(message) for message in messages)
+        if size <= self.max_bytes:
+            self._entries[conversation_id] = (messages, size)
+            self._size += size
+            self._evict()
+        return messages
+
+    def append_turn(
+        self,
+        conversation_id: str,
+        user_message: str,
+        assistant_message: str,
+        create: bool = False
+    ) -> None:
+        """Append a persisted turn to a cached conversation.
+
+        Conversations that are not cached are left alone, since appending to them would
+        produce an incomplete history, unless ``create`` marks the turn as the first one.
+        """
+        self._bump(conversation_id)
+        turn = [HumanMessage(content=user_message), AIMessage(content=assistant_message)]
+        entry = self._entries.get(conversation_id)
+        if entry is None:
+            if create:
+                self.put(conversation_id, turn)
+            return
+
+        messages, size = entry
+        # Copy on write so lists handed out to in-flight requests never change under them
+        messages = messages + turn
+        turn_size = sum(_message_size(message) for message in turn)
+        self._entries[conversation_id] = (messages, size + turn_size)
+        self._entries.move_to_end(conversation_id)
+        self._size += turn_size
+        if size + turn_size > self.max_bytes:
+            self.invalidate(conversation_id)
+        self._evict()
+
+    def invalidate(self, conversation_id: Optional[str] = None) -> None:
+        """Drop one conversation, or every conversation when no ID is given."""
+        if conversation_id is None:
+            self._entries.clear()
+            self._size = 0
+            self._reset_versions()
+            return
+        self._bump(conversation_id)
+        self._remove(conversation_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache size and hit/miss counters."""
+        return {
+            "conversations": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, conversation_id: str) -> None:
+        entry = self._entries.pop(conversation_id, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def _bump(self, conversation_id: str) -> None:
+        if len(self._versions) >= _MAX_VERSIONS:
+            # Histories loading now will not be cached, which is safe
+            self._reset_versions()
+        self._versions[conversation_id] = self._versions.get(conversation_id, 0) + 1
+
+    def _reset_versions(self) -> None:
+        self._versions.clear()
+        self._generation += 1
+
+    def _evict(self) -> None:
+        """Evict least recently used conversations until the cache fits its budget."""
+        while self._size > self.max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+
+
+conversation_cache = ConversationCache(max_bytes=settings.CONVERSATION_CACHE_MAX_BYTES)
@@ -1,40 +1,158 @@
-from typing import Dict, Optional, Type
+import asyncio
+import hashlib
+import importlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Type, Union
+
+from app.core.config import settings
+from app.core.tracing import span
 from app.services.base import BaseModelService
-from app.services.openai_service import OpenAIService
-from app.services.perplexity_service import PerplexityService
-from app.services.anthropic_service import AnthropicService
+
+# (provider_id, fingerprint of the provider name, API key and config)
+ServiceKey = Tuple[int, str]
+
+
+def config_fingerprint(provider_name: str, api_key: str, config: Optional[Dict]) -> str:
+    """Hash everything a service instance is built from, so a changed provider gets a new instance."""
+    payload = {"provider": provider_name.lower(), "api_key": api_key, "config": config or {}}
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def import_service_class(path: str) -> Type[BaseModelService]:
+    """Import a service class from a dotted path such as "app.services.openai_service.OpenAIService"."""
+    module_name, _, class_name = path.rpartition(".")
+    return getattr(importlib.import_module(module_name), class_name)
 
 
 class ModelServiceFactory:
-    _services: Dict[str, Type[BaseModelService]] = {
-        "openai": OpenAIService,
-        "perplexity": PerplexityService,
-        "anthropic": AnthropicService,
+    # Classes are given by dotted path and imported on first use, so that a worker only loads
+    # the SDKs of the providers it serves
+    _services: Dict[str, Union[str, Type[BaseModelService]]] = {
+        "openai": "app.services.openai_service.OpenAIService",
+        "perplexity": "app.services.perplexity_service.PerplexityService",
+        "anthropic": "app.services.anthropic_service.AnthropicService",
+    }
+
+    # Initialized services, least recently used first, with the time each was last used
+    _instances: "OrderedDict[ServiceKey, Tuple[BaseModelService, float]]" = OrderedDict()
+    # Held while a key is being initialized, so concurrent first requests share one initialization
+    _locks: Dict[ServiceKey, asyncio.Lock] = {}
+    max_instances: int = settings.SERVICE_CACHE_MAX_INSTANCES
+    idle_ttl: float = settings.SERVICE_CACHE_IDLE_TTL
+    _metrics: Dict[str, float] = {
+        "hits": 0, "misses": 0, "evictions": 0, "inits": 0, "init_failures": 0,
+        "init_seconds_total": 0.0, "init_seconds_max": 0.0,
     }
-    
-    _instances: Dict[int, BaseModelService] = {}
 
     @classmethod
-    def register_service(cls, name: str, service_class: Type[BaseModelService]) -> None:
-        """Register a new model service."""
+    def register_service(cls, name: str, service_class: Union[str, Type[BaseModelService]]) -> None:
+        """Register a new model service, as a class or as a dotted path imported on first use."""
         cls._services[name.lower()] = service_class
 
+    @classmethod
+    def get_service_class(cls, provider_name: str) -> Type[BaseModelService]:
+        """Get the service class registered for a provider name, importing it on first use."""
+        service_class = cls._services.get(provider_name.lower())
+        if not service_class:
+            raise ValueError(f"Unknown model provider: {provider_name}")
+        if isinstance(service_class, str):
+            service_class = cls._services[provider_name.lower()] = import_service_class(service_class)
+        return service_class
+
+    @classmethod
+    async def create_service(cls, provider_name: str, api_key: str, config: Optional[Dict] = None) -> BaseModelService:
+        """Create and initialize a model service without caching it, e.g. to validate a provider."""
+        service_class = cls.get_service_class(provider_name)
+        service = service_class(api_key=api_key, config=config)
+        service.provider_name = provider_name.lower()
+        await service.initialize_model()
+        return service
+
     @classmethod
     async def get_service(cls, provider_id: int, provider_name: str, api_key: str, config: Optional[Dict] = None) -> BaseModelService:
-        """Get or create a model service instance."""
-        if provider_id not in cls._instances:
-            service_class = cls._services.get(provider_name.lower())
-            if not service_class:
-                raise ValueError(f"Unknown model provider: {provider_name}")
-            
-            service = service_class(api_key=api_key, config=config)
-            await service.initialize_model()
-            cls._instances[provider_id] = service
-        
-        return cls._instances[provider_id]
+        """Get or create a model service instance for a provider's current configuration."""
+        key = (provider_id, config_fingerprint(provider_name, api_key, config))
+        service = cls._lookup(key)
+        if service is not None:
+            return service
+
+        lock = cls._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another request may have initialized it while we waited
+            service = cls._lookup(key)
+            if service is not None:
+                return service
+
+            cls._metrics["misses"] += 1
+            started = time.perf_counter()
+            try:
+                with span("service_init"):
+                    service = await cls.create_service(provider_name, api_key, config)
+            except Exception:
+                cls._metrics["init_failures"] += 1
+                raise
+            finally:
+                cls._locks.pop(key, None)
+            elapsed = time.perf_counter() - started
+            cls._metrics["inits"] += 1
+            cls._metrics["init_seconds_total"] += elapsed
+            cls._metrics["init_seconds_max"] = max(cls._metrics["init_seconds_max"], elapsed)
+
+            service.provider_id = provider_id
+            # Instances built from an older configuration of this provider are no longer reachable
+            for stale_key in [k for k in cls._instances if k[0] == provider_id]:
+                cls._evict(stale_key)
+            cls._instances[key] = (service, time.monotonic())
+            while len(cls._instances) > cls.max_instances:
+                cls._evict(next(iter(cls._instances)))
+        return service
 
     @classmethod
     def remove_service(cls, provider_id: int) -> None:
-        """Remove a model service instance."""
-        if provider_id in cls._instances:
-            del cls._instances[provider_id]
+        """Remove every model service instance of a provider."""
+        for key in [key for key in cls._instances if key[0] == provider_id]:
+            del cls._instances[key]
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._instances.clear()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """Get the instance count, hit/miss and eviction counters and initialization times."""
+        return {
+            "instances": len(cls._instances),
+            "initializing": len(cls._locks),
+            **cls._metrics,
+            "init_seconds_avg": cls._metrics["init_seconds_total"] / cls._metrics["inits"] if cls._metrics["inits"] else 0.0,
+        }
+
+    @classmethod
+    def _lookup(cls, key: ServiceKey) -> Optional[BaseModelService]:
+        """Get a cached instance and mark it used, dropping instances idle for longer than idle_ttl."""
+        now = time.monotonic()
+        while cls._instances:
+            oldest_key, (_, last_used) = next(iter(cls._instances.items()))
+            if now - last_used <= cls.idle_ttl:
+                break
+            cls._evict(oldest_key)
+
+        entry = cls._instances.get(key)
+        if entry is None:
+            return None
+        cls._metrics["hits"] += 1
+        cls._instances[key] = (entry[0], now)
+        cls._instances.move_to_end(key)
+        return entry[0]
+
+    @classmethod
+    def _evict(cls, key: ServiceKey) -> None:
+        del cls._instances[key]
+        cls._metrics["evictions"] += 1
+
+
+if settings.FAKE_PROVIDER_ENABLED:
+    ModelServiceFactory.register_service("fake", "app.services.fake_service.FakeModelService")
@@ -0,0 +1,69 @@
+import asyncio
+import random
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
+
+from app.services.base import BaseModelService
+
+FAKE_WORDS = (
+    "lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "do",
+    "eiusmod", "tempor", "incididunt", "ut", "labore", "et", "dolore", "magna", "aliqua",
+)
+
+
+class FakeProviderError(RuntimeError):
+    """A failure injected by the fake provider's error rate."""
+
+
+class FakeModelService(BaseModelService):
+    """Offline provider that simulates generation timing, for load tests without API keys.
+
+    Config:
+        ttft: seconds before the first token (default 0.2)
+        tokens_per_second: pace of the following tokens (default 50)
+        output_tokens: tokens per response (default 64)
+        error_rate: share of generations that fail before the first token (default 0)
+        seed: seeds the error draws, for reproducible runs
+    """
+
+    async def initialize_model(self) -> None:
+        """Read the simulation parameters; there is no model to build."""
+        self.ttft = float(self.config.get("ttft", 0.2))
+        self.tokens_per_second = float(self.config.get("tokens_per_second", 50.0))
+        self.output_tokens = int(self.config.get("output_tokens", 64))
+        self.error_rate = float(self.config.get("error_rate", 0.0))
+        self._random = random.Random(self.config.get("seed"))
+        if self.ttft < 0 or self.tokens_per_second <= 0 or self.output_tokens < 1:
+            raise ValueError("ttft must be >= 0, tokens_per_second > 0 and output_tokens >= 1")
+        if not 0.0 <= self.error_rate <= 1.0:
+            raise ValueError("error_rate must be between 0 and 1")
+
+    async def generate_response(self, message: str, messages: Optional[List[Dict[str, str]]] = None) -> str:
+        """Wait as long as streaming the whole response would take, then return it."""
+        self._maybe_fail()
+        await asyncio.sleep(self.ttft + (self.output_tokens - 1) / self.tokens_per_second)
+        return "".join(self._tokens())
+
+    async def generate_stream(self, message: str, messages: Optional[List[Dict[str, str]]] = None) -> AsyncGenerator[str, None]:
+        """Yield the first token after ttft and the rest at tokens_per_second."""
+        self._maybe_fail()
+        loop = asyncio.get_running_loop()
+        # Tokens are due on a fixed schedule, so time spent by the consumer does not add up
+        first_token_at = loop.time() + self.ttft
+        for index, token in enumerate(self._tokens()):
+            delay = first_token_at + index / self.tokens_per_second - loop.time()
+            await asyncio.sleep(max(delay, 0.0))
+            yield token
+
+    async def generate_batch(self, prompts: List[Tuple[str, Optional[List[Dict[str, str]]]]]) -> List[str]:
+        """Generate the batch's responses concurrently, like one multi-prompt upstream call."""
+        return list(await asyncio.gather(*(self.generate_response(message, messages) for message, messages in prompts)))
+
+    def _maybe_fail(self) -> None:
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise FakeProviderError("Simulated provider error")
+
+    def _tokens(self) -> List[str]:
+        return [
+            (" " if index else "") + FAKE_WORDS[index % len(FAKE_WORDS)]
+            for index in range(self.output_tokens)
+        ]
@@ -0,0 +1,240 @@
+import time
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from langchain_core.messages import BaseMessage
+
+from app.core.config import settings
+from app.core.metrics import generation_errors_total, generation_seconds, time_to_first_token_seconds, tokens_per_second
+from app.core.tracing import record_span, span
+from app.services.base import BaseModelService
+from app.services.rate_limiter import CHARS_PER_TOKEN, ProviderScheduler, estimate_tokens, rate_limiter
+from app.services.response_cache import response_cache, response_cache_key
+from app.services.single_flight import single_flight
+
+Messages = Optional[List[Union[Dict[str, str], BaseMessage]]]
+
+
+def _provider_name(service: BaseModelService) -> str:
+    return service.provider_name or type(service).__name__.lower()
+
+
+def _provider_key(service: BaseModelService) -> str:
+    """Identify the provider a service talks to, e.g. "openai:3"."""
+    key = _provider_name(service)
+    if service.provider_id is not None:
+        key = f"{key}:{service.provider_id}"
+    return key
+
+
+def _scheduler(service: BaseModelService) -> ProviderScheduler:
+    """Get the rate limiter scheduler for the provider a service talks to."""
+    return rate_limiter.scheduler_for(_provider_key(service), service.config)
+
+
+def _timed(service: BaseModelService, fn: Callable[[], Awaitable[Any]], mode: str) -> Callable[[], Awaitable[Any]]:
+    """Wrap an upstream call so its latency and throughput are recorded."""
+    provider = _provider_key(service)
+
+    async def call() -> Any:
+        started = time.perf_counter()
+        try:
+            result = await fn()
+        except Exception:
+            generation_errors_total.labels(provider, mode).inc()
+            raise
+        finally:
+            record_span("upstream", started, time.perf_counter() - started)
+        elapsed = time.perf_counter() - started
+        generation_seconds.labels(provider, mode).observe(elapsed)
+        responses = [result] if isinstance(result, str) else result
+        if elapsed > 0:
+            tokens_per_second.labels(provider, mode).observe(
+                sum(estimate_tokens(response) for response in responses) / elapsed
+            )
+        return result
+    return call
+
+
+async def _timed_stream(service: BaseModelService, stream: AsyncIterator[str]) -> AsyncGenerator[str, None]:
+    """Pass an upstream stream through, recording time to first token, latency and throughput."""
+    provider = _provider_key(service)
+    started = time.perf_counter()
+    first_token = None
+    text_length = 0
+    try:
+        async for chunk in stream:
+            if first_token is None:
+                first_token = time.perf_counter() - started
+                time_to_first_token_seconds.labels(provider).observe(first_token)
+                record_span("first_token", started, first_token)
+            text_length += len(chunk)
+            yield chunk
+    except Exception:
+        generation_errors_total.labels(provider, "stream").inc()
+        raise
+    elapsed = time.perf_counter() - started
+    record_span("upstream", started, elapsed)
+    generation_seconds.labels(provider, "stream").observe(elapsed)
+    if first_token is not None and elapsed > first_token:
+        tokens_per_second.labels(provider, "stream").observe(text_length / CHARS_PER_TOKEN / (elapsed - first_token))
+
+
+def _prompt_tokens(message: str, messages: Messages) -> int:
+    contents = [msg.content if isinstance(msg, BaseMessage) else msg["content"] for msg in messages or []]
+    return sum(estimate_tokens(content) for content in contents + [message])
+
+
+def _completion_tokens(service: BaseModelService) -> int:
+    return service.config.get("max_tokens") or settings.RATE_LIMIT_COMPLETION_TOKENS
+
+
+async def _call_upstream(
+    service: BaseModelService,
+    prompts: List[Tuple[str, Messages]],
+    fn: Callable[[], Awaitable[Any]],
+    priority: str,
+    mode: str = "response"
+) -> Any:
+    """Make an upstream call for some prompts, admitted by the provider's rate limiter when enabled."""
+    fn = _timed(service, fn, mode)
+    if not settings.RATE_LIMIT_ENABLED:
+        return await fn()
+    prompt_tokens = sum(_prompt_tokens(message, messages) for message, messages in prompts)
+
+    def used_tokens(result: Union[str, List[str]]) -> int:
+        responses = [result] if isinstance(result, str) else result
+        return prompt_tokens + sum(estimate_tokens(response) for response in responses)
+
+    return await _scheduler(service).run(
+        fn,
+        prompt_tokens + _completion_tokens(service) * len(prompts),
+        priority,
+        requests=len(prompts),
+        used_tokens=used_tokens
+    )
+
+
+def _stream_upstream(service: BaseModelService, message: str, messages: Messages, priority: str) -> AsyncIterator[str]:
+    """Open an upstream stream, admitted by the provider's rate limiter when enabled."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return _timed_stream(service, service.generate_stream(message, messages=messages))
+    completion_tokens = _completion_tokens(service)
+    return _scheduler(service).stream(
+        lambda: _timed_stream(service, service.generate_stream(message, messages=messages)),
+        _prompt_tokens(message, messages) + completion_tokens,
+        priority,
+        completion_tokens=completion_tokens
+    )
+
+
+def _response_cache_key(service: BaseModelService, message: str, messages: Messages) -> Optional[str]:
+    """Get the response cache key for a request, or None if its output is not deterministic."""
+    if not settings.RESPONSE_CACHE_ENABLED or service.config.get("temperature") != 0:
+        return None
+    return response_cache_key(_provider_name(service), service.config, message, messages)
+
+
+def _single_flight_key(service: BaseModelService, message: str, messages: Messages, cache_key: Optional[str]) -> str:
+    """Key identical requests to the same service instance."""
+    request_key = cache_key or response_cache_key(_provider_name(service), service.config, message, messages)
+    return f"{id(service)}:{request_key}"
+
+
+async def generate_response(
+    service: BaseModelService,
+    message: str,
+    messages: Messages = None,
+    priority: str = "normal"
+) -> str:
+    """Generate a response, serving deterministic requests from the response cache.
+
+    Identical requests that are already in flight share a single upstream call, which is
+    admitted by the provider's rate limiter at the given priority.
+    """
+    cache_key = _response_cache_key(service, message, messages)
+    if cache_key:
+        with span("response_cache"):
+            cached = await response_cache.get(cache_key, _provider_name(service))
+        if cached is not None:
+            return "".join(cached)
+
+    async def upstream() -> str:
+        response = await _call_upstream(
+            service,
+            [(message, messages)],
+            lambda: service.generate_response(message, messages=messages),
+            priority
+        )
+        if cache_key:
+            await response_cache.put(cache_key, [response])
+        return response
+
+    if not settings.SINGLE_FLIGHT_ENABLED:
+        return await upstream()
+    return await single_flight.do(_single_flight_key(service, message, messages, cache_key), upstream)
+
+
+async def generate_stream(
+    service: BaseModelService,
+    message: str,
+    messages: Messages = None,
+    priority: str = "normal"
+) -> AsyncGenerator[str, None]:
+    """Generate a streaming response, replaying cached responses chunk by chunk.
+
+    Identical streams that are already in flight are fanned out from one upstream stream.
+    """
+    cache_key = _response_cache_key(service, message, messages)
+    if cache_key:
+        with span("response_cache"):
+            cached = await response_cache.get(cache_key, _provider_name(service))
+        if cached is not None:
+            for chunk in cached:
+                yield chunk
+            return
+
+    async def upstream() -> AsyncGenerator[str, None]:
+        chunks = []
+        async for chunk in _stream_upstream(service, message, messages, priority):
+            chunks.append(chunk)
+            yield chunk
+        # Only streams that ran to completion are cached
+        if cache_key:
+            await response_cache.put(cache_key, chunks)
+
+    if settings.SINGLE_FLIGHT_ENABLED:
+        source = single_flight.stream(_single_flight_key(service, message, messages, cache_key), upstream)
+    else:
+        source = upstream()
+    async for chunk in source:
+        yield chunk
+
+
+async def generate_batch(
+    service: BaseModelService,
+    prompts: List[Tuple[str, Messages]],
+    priority: str = "normal"
+) -> List[str]:
+    """Generate responses for several independent prompts with one upstream batch call.
+
+    Cached responses are served first and only the remaining prompts are sent upstream.
+    """
+    responses: List[Optional[str]] = [None] * len(prompts)
+    cache_keys = [_response_cache_key(service, message, messages) for message, messages in prompts]
+    for index, cache_key in enumerate(cache_keys):
+        if cache_key:
+            cached = await response_cache.get(cache_key, _provider_name(service))
+            if cached is not None:
+                responses[index] = "".join(cached)
+
+    pending = [index for index, response in enumerate(responses) if response is None]
+    if pending:
+        upstream_prompts = [prompts[index] for index in pending]
+        generated = await _call_upstream(
+            service, upstream_prompts, lambda: service.generate_batch(upstream_prompts), priority, mode="batch"
+        )
+        for index, response in zip(pending, generated):
+            responses[index] = response
+            if cache_keys[index]:
+                await response_cache.put(cache_keys[index], [response])
+    return responses
@@ -0,0 +1,148 @@
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core.config import settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class _HostCounters:
+    """Request and connection setup counters for one upstream host."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connects = 0
+        self.tls_handshakes = 0
+
+    def on_trace(self, event_name: str) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.connects += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+
+class HTTPPool:
+    """Process-wide keep-alive HTTP clients, one per upstream host, shared by every model service.
+
+    Async clients serve the async SDK clients; sync clients serve LangChain models that only
+    call their SDK synchronously (from a worker thread). HTTP/2 is offered when the ``h2``
+    package is installed and negotiated with each host over ALPN.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        http2: bool = True,
+        host_limits: Optional[Dict[str, int]] = None
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.host_limits = host_limits or {}
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._sync_clients: Dict[str, httpx.Client] = {}
+        self._counters: Dict[str, _HostCounters] = {}
+
+    def async_client(self, base_url: str) -> httpx.AsyncClient:
+        """Get the shared async client for the host of ``base_url``."""
+        host = urlsplit(base_url).netloc
+        client = self._async_clients.get(host)
+        if client is None or client.is_closed:
+            counters = self._counters.setdefault(host, _HostCounters())
+
+            async def on_trace(event_name: str, info: Dict[str, Any]) -> None:
+                counters.on_trace(event_name)
+
+            async def on_request(request: httpx.Request) -> None:
+                counters.requests += 1
+                request.extensions["trace"] = on_trace
+
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self._limits(host),
+                event_hooks={"request": [on_request]}
+            )
+            self._async_clients[host] = client
+        return client
+
+    def client(self, base_url: str) -> httpx.Client:
+        """Get the shared sync client for the host of ``base_url``; httpx clients are thread-safe."""
+        host = urlsplit(base_url).netloc
+        client = self._sync_clients.get(host)
+        if client is None or client.is_closed:
+            counters = self._counters.setdefault(host, _HostCounters())
+
+            def on_trace(event_name: str, info: Dict[str, Any]) -> None:
+                counters.on_trace(event_name)
+
+            def on_request(request: httpx.Request) -> None:
+                counters.requests += 1
+                request.extensions["trace"] = on_trace
+
+            client = httpx.Client(
+                http2=self.http2,
+                limits=self._limits(host),
+                event_hooks={"request": [on_request]}
+            )
+            self._sync_clients[host] = client
+        return client
+
+    async def aclose(self) -> None:
+        """Close every client and its connections."""
+        for client in self._async_clients.values():
+            await client.aclose()
+        for client in self._sync_clients.values():
+            client.close()
+        self._async_clients.clear()
+        self._sync_clients.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-host pool utilisation and connection reuse counters."""
+        stats = {}
+        for host, counters in self._counters.items():
+            connections = (
+                _pool_connections(self._async_clients.get(host)) + _pool_connections(self._sync_clients.get(host))
+            )
+            idle = sum(1 for connection in connections if connection.is_idle())
+            stats[host] = {
+                "max_connections": self._limits(host).max_connections,
+                "connections": len(connections),
+                "active": len(connections) - idle,
+                "idle": idle,
+                "requests": counters.requests,
+                "connects": counters.connects,
+                "tls_handshakes": counters.tls_handshakes,
+            }
+        return stats
+
+    def _limits(self, host: str) -> httpx.Limits:
+        max_connections = self.host_limits.get(host, self.max_connections)
+        return httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(self.max_keepalive_connections, max_connections),
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+
+def _pool_connections(client: Optional[Union[httpx.AsyncClient, httpx.Client]]) -> List[Any]:
+    """Get the open connections of a client's default transport (httpcore internals)."""
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    return list(getattr(pool, "connections", []))
+
+
+http_pool = HTTPPool(
+    max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+    keepalive_expiry=settings.HTTP_POOL_KEEPALIVE_EXPIRY,
+    http2=settings.HTTP_POOL_HTTP2,
+    host_limits=settings.HTTP_POOL_HOST_LIMITS
+)
@@ -0,0 +1,141 @@
+import asyncio
+import json
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+# Called with the key of the changed entry, or None when every entry must be dropped
+Handler = Callable[[Optional[Any]], None]
+
+
+class InvalidationBus:
+    """Propagates cache invalidations between workers over Postgres LISTEN/NOTIFY.
+
+    Each worker holds one dedicated asyncpg connection that listens on ``channel`` and
+    sends the worker's own events, which it then ignores when they come back. Publishing
+    never waits for the database: events are queued and sent by a background task. While
+    the connection is down, events from other workers are missed, so every handler is
+    called with None after reconnecting to drop everything that may be stale.
+    """
+
+    def __init__(
+        self,
+        channel: str = settings.INVALIDATION_CHANNEL,
+        heartbeat: float = settings.INVALIDATION_HEARTBEAT,
+        reconnect_delay: float = settings.INVALIDATION_RECONNECT_DELAY,
+        max_queue: int = 1000
+    ):
+        self.channel = channel
+        self.heartbeat = heartbeat
+        self.reconnect_delay = reconnect_delay
+        self._handlers: Dict[str, Handler] = {}
+        self._max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._unsent: Optional[str] = None  # taken from the queue when the connection failed
+        self._task: Optional[asyncio.Task] = None
+        self._pid: Optional[int] = None  # backend PID of the connection, to skip our own events
+        self.connected = False
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.error: Optional[str] = None
+
+    def subscribe(self, kind: str, handler: Handler) -> None:
+        """Call handler with the key of every event of this kind published by another worker."""
+        self._handlers[kind] = handler
+
+    def publish(self, kind: str, key: Any) -> None:
+        """Tell the other workers that the entry of this kind and key has changed.
+
+        The caller invalidates its own caches itself. Does nothing until the bus is started.
+        """
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait(json.dumps({"kind": kind, "key": key}))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def start(self, dsn: str) -> None:
+        self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._task = asyncio.ensure_future(self._run(dsn))
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._queue = None
+        self._unsent = None
+        self.connected = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "published": self.published,
+            "received": self.received,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "reconnects": self.reconnects,
+            "error": self.error,
+        }
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        if pid == self._pid:
+            return
+        try:
+            event = json.loads(payload)
+            handler = self._handlers.get(event["kind"])
+        except (ValueError, KeyError, TypeError):
+            return
+        if handler is not None:
+            self.received += 1
+            handler(event.get("key"))
+
+    def _invalidate_all(self) -> None:
+        for handler in self._handlers.values():
+            handler(None)
+
+    async def _run(self, dsn: str) -> None:
+        import asyncpg
+
+        first = True
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                self._pid = connection.get_server_pid()
+                await connection.add_listener(self.channel, self._on_notification)
+                self.connected = True
+                self.error = None
+                if not first:
+                    self.reconnects += 1
+                    self._invalidate_all()
+                first = False
+                await self._send(connection)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.error = str(e) or type(e).__name__
+            finally:
+                self.connected = False
+                if connection is not None:
+                    connection.terminate()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _send(self, connection) -> None:
+        """Send queued events, checking the connection whenever none arrives for a heartbeat."""
+        while True:
+            if self._unsent is None:
+                try:
+                    self._unsent = await asyncio.wait_for(self._queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    await connection.execute("SELECT 1")
+                    continue
+            await connection.execute("SELECT pg_notify($1, $2)", self.channel, self._unsent)
+            self._unsent = None
+            self.published += 1
+
+
+invalidation_bus = InvalidationBus()
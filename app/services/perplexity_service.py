@@ -1,15 +1,18 @@
-from typing import AsyncGenerator, Dict, Any, Optional
+from typing import AsyncGenerator, Dict, Any, Optional, List
 import json
 
+import openai
 from langchain.chat_models import ChatPerplexity
-from langchain.schema import HumanMessage, SystemMessage
 
 from app.services.base import BaseModelService
+from app.services.http_pool import http_pool
+
+PERPLEXITY_API_BASE = "https://api.perplexity.ai"
 
 
 class PerplexityService(BaseModelService):
     async def initialize_model(self) -> None:
-        """Initialize the Perplexity chat model."""
+        """Initialize the Perplexity chat model on the shared HTTP connection pool."""
         model_name = self.config.get("model_name", "pplx-7b-chat")
         temperature = self.config.get("temperature", 0.7)
         streaming = self.config.get("streaming", False)
@@ -20,33 +23,25 @@ class PerplexityService(BaseModelService):
             temperature=temperature,
             streaming=streaming
         )
+        # ChatPerplexity only calls the sync SDK client, from a worker thread for async calls
+        self.model.client = openai.OpenAI(
+            api_key=self.api_key,
+            base_url=PERPLEXITY_API_BASE,
+            http_client=http_pool.client(PERPLEXITY_API_BASE)
+        )
 
-    async def generate_response(self, message: str) -> str:
+    async def generate_response(self, message: str, messages: Optional[List[Dict[str, str]]] = None) -> str:
         """Generate a response using the Perplexity chat model."""
-        messages = [
-            SystemMessage(content=self.config.get("system_message", "You are a helpful AI assistant.")),
-            HumanMessage(content=message)
-        ]
+        langchain_messages = self._build_langchain_messages(message, messages)
         
-        response = await self.model.agenerate([messages])
+        response = await self.model.agenerate([langchain_messages])
         return response.generations[0][0].text
 
-    async def generate_stream(self, message: str) -> AsyncGenerator[str, None]:
+    async def generate_stream(self, message: str, messages: Optional[List[Dict[str, str]]] = None) -> AsyncGenerator[str, None]:
         """Generate a streaming response using the Perplexity chat model."""
-        # Ensure streaming is enabled
-        if not self.model.streaming:
-            self.model = ChatPerplexity(
-                api_key=self.api_key,
-                model=self.config.get("model_name", "pplx-7b-chat"),
-                temperature=self.config.get("temperature", 0.7),
-                streaming=True
-            )
-
-        messages = [
-            SystemMessage(content=self.config.get("system_message", "You are a helpful AI assistant.")),
-            HumanMessage(content=message)
-        ]
-
-        async for chunk in await self.model.astream([messages]):
+        # astream streams whatever the model's streaming flag is, so the pooled client is kept
+        langchain_messages = self._build_langchain_messages(message, messages)
+
+        async for chunk in self.model.astream(langchain_messages):
             if chunk.content:
                 yield chunk.content
@@ -0,0 +1,65 @@
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.models import ModelProvider
+from app.schemas.schemas import ModelProviderInDB
+
+
+class ProviderCache:
+    """TTL cache of provider metadata, invalidated explicitly when a provider changes.
+
+    Entries are detached ``ModelProviderInDB`` snapshots rather than ORM instances, so they
+    can be shared between requests without being bound to a session.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[int, Tuple[float, ModelProviderInDB]] = {}
+        # Bumped on every invalidation so lookups racing with it do not store stale rows
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, provider_id: int, db: AsyncSession) -> Optional[ModelProviderInDB]:
+        """Get a provider, reading it from the database only when it is not cached."""
+        entry = self._entries.get(provider_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        generation = self._generation
+        stmt = select(ModelProvider).where(ModelProvider.id == provider_id)
+        result = await db.execute(stmt)
+        db_provider = result.scalar_one_or_none()
+        if db_provider is None:
+            self._entries.pop(provider_id, None)
+            return None
+
+        provider = ModelProviderInDB.model_validate(db_provider)
+        if generation == self._generation:
+            self._entries[provider_id] = (time.monotonic() + self.ttl, provider)
+        return provider
+
+    def invalidate(self, provider_id: Optional[int] = None) -> None:
+        """Drop one provider, or every provider when no ID is given."""
+        self._generation += 1
+        if provider_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(provider_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache size and hit/miss counters."""
+        return {
+            "providers": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+provider_cache = ProviderCache(ttl=settings.PROVIDER_CACHE_TTL)
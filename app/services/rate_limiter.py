@@ -0,0 +1,341 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+# Priority classes, most urgent first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request cannot be admitted within the queue bounds or keeps hitting upstream 429s."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_after_hint(error: BaseException) -> Optional[float]:
+    """Get the back-off an upstream 429 asks for, or None if the error is not a rate limit."""
+    response = getattr(error, "response", None)
+    status_code = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status_code != 429:
+        return None
+    headers = getattr(response, "headers", None) or {}
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(header)
+        if value is not None:
+            try:
+                return max(0.0, float(value) * scale)
+            except ValueError:
+                pass  # HTTP-date form, fall back to the default back-off
+    return 0.0
+
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the token count of some text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` per minute, holding at most one minute's worth.
+
+    A bucket without a rate is unlimited.
+    """
+
+    def __init__(self, rate: Optional[float]):
+        self.max_rate = rate
+        self.rate = rate
+        self.level = rate or 0.0
+        self._updated = time.monotonic()
+
+    def configure(self, rate: Optional[float]) -> None:
+        """Change the configured rate, keeping any reduction learned from 429s below it."""
+        if rate == self.max_rate:
+            return
+        self._refill(time.monotonic())
+        self.max_rate = rate
+        self.rate = None if rate is None else min(self.rate or rate, rate)
+        self.level = min(self.level, self.rate) if self.rate is not None else 0.0
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Get the seconds until ``amount`` can be taken; oversized requests wait for a full bucket."""
+        if self.rate is None:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.rate)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.rate
+
+    def take(self, amount: float) -> None:
+        if self.rate is not None:
+            self.level -= amount
+
+    def refund(self, amount: float) -> None:
+        """Return unused tokens, or charge extra ones when ``amount`` is negative."""
+        if self.rate is not None:
+            self.level = min(self.rate, self.level + amount)
+
+    def decrease(self, factor: float, floor: float) -> None:
+        """Multiplicatively decrease the rate, down to ``floor`` of the configured rate."""
+        if self.rate is not None:
+            self.rate = max(self.max_rate * floor, self.rate * factor)
+            self.level = min(self.level, 0.0)
+
+    def increase(self, fraction: float) -> None:
+        """Additively increase the rate back towards its maximum."""
+        if self.rate is not None and self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * fraction)
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self.level = min(self.rate, self.level + (now - self._updated) * self.rate / 60)
+        self._updated = now
+
+
+class ProviderScheduler:
+    """Admission control for one provider: RPM and TPM token buckets in front of a bounded priority queue.
+
+    Requests are admitted in priority order once both buckets can cover them. Upstream 429s
+    pause admission for the retry-after hint and halve the configured rates; every success
+    adds a little of the configured rate back (AIMD).
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_queue: int = 1000,
+        max_wait: float = 30.0,
+        max_retries: int = 2,
+        decrease_factor: float = 0.5,
+        increase_fraction: float = 0.05,
+        min_rate_fraction: float = 0.1
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.decrease_factor = decrease_factor
+        self.increase_fraction = increase_fraction
+        self.min_rate_fraction = min_rate_fraction
+        self.blocked_until = 0.0
+        self._queue: List[list] = []  # heap of [priority, sequence, enqueued_at, requests, tokens, future]
+        self._sequence = itertools.count()
+        self._waiting = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.admitted = 0
+        self.rejected = 0
+        self.rate_limited = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def configure(self, requests_per_minute: Optional[float], tokens_per_minute: Optional[float]) -> None:
+        self.requests.configure(requests_per_minute)
+        self.tokens.configure(tokens_per_minute)
+
+    async def acquire(self, tokens: int, priority: str = "normal", requests: int = 1) -> None:
+        """Wait until the request may be sent upstream."""
+        now = time.monotonic()
+        if not self._waiting and self._delay(requests, tokens, now) == 0:
+            self._grant(requests, tokens, now, now)
+            return
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise RateLimitExceeded("Rate limit queue is full", retry_after=max(1.0, self._delay(requests, tokens, now)))
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, [PRIORITIES[priority], next(self._sequence), now, requests, tokens, future])
+        self._waiting += 1
+        self._wake_dispatcher()
+        try:
+            await asyncio.wait_for(future, self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise RateLimitExceeded(
+                "Timed out waiting for the rate limit",
+                retry_after=max(1.0, self._delay(requests, tokens, time.monotonic()))
+            )
+        finally:
+            self._waiting -= 1
+
+    async def run(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        tokens: int,
+        priority: str = "normal",
+        requests: int = 1,
+        used_tokens: Optional[Callable[[Any], int]] = None
+    ) -> Any:
+        """Run an upstream call once admitted, re-queueing it when it is rate limited."""
+        for attempt in itertools.count():
+            await self.acquire(tokens, priority, requests)
+            try:
+                result = await fn()
+            except Exception as e:
+                self._on_error(e, attempt)
+                continue
+            self.record_success()
+            if used_tokens is not None:
+                self.tokens.refund(tokens - used_tokens(result))
+            return result
+
+    async def stream(
+        self,
+        fn: Callable[[], AsyncIterator[str]],
+        tokens: int,
+        priority: str = "normal",
+        completion_tokens: int = 0
+    ) -> AsyncGenerator[str, None]:
+        """Stream an upstream response once admitted; only streams that produced nothing are retried."""
+        for attempt in itertools.count():
+            await self.acquire(tokens, priority)
+            produced = 0  # characters
+            try:
+                async for chunk in fn():
+                    produced += len(chunk)
+                    yield chunk
+            except Exception as e:
+                if produced:
+                    raise
+                self._on_error(e, attempt)
+                continue
+            self.record_success()
+            self.tokens.refund(completion_tokens - (produced // CHARS_PER_TOKEN + 1))
+            return
+
+    def record_success(self) -> None:
+        self.requests.increase(self.increase_fraction)
+        self.tokens.increase(self.increase_fraction)
+
+    def record_rate_limited(self, retry_after: float) -> None:
+        now = time.monotonic()
+        self.rate_limited += 1
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+        self.requests.decrease(self.decrease_factor, self.min_rate_fraction)
+        self.tokens.decrease(self.decrease_factor, self.min_rate_fraction)
+        self._wake_dispatcher()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait times, current rates and admission counters."""
+        return {
+            "queue_depth": self._waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "rate_limited": self.rate_limited,
+            "wait_avg": self.wait_total / self.admitted if self.admitted else 0.0,
+            "wait_max": self.wait_max,
+            "requests_per_minute": self.requests.rate,
+            "tokens_per_minute": self.tokens.rate,
+        }
+
+    def close(self) -> None:
+        """Cancel the dispatcher and every queued request."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for *_, future in self._queue:
+            future.cancel()
+        self._queue.clear()
+
+    def _on_error(self, error: Exception, attempt: int) -> None:
+        """Record an upstream 429 so the caller retries it, re-raising anything else."""
+        retry_after = retry_after_hint(error)
+        if retry_after is None:
+            raise error
+        self.record_rate_limited(retry_after)
+        if attempt >= self.max_retries:
+            raise RateLimitExceeded("Upstream rate limit exceeded", retry_after=max(1.0, retry_after)) from error
+
+    def _delay(self, requests: int, tokens: int, now: float) -> float:
+        return max(
+            self.blocked_until - now,
+            self.requests.wait_time(requests, now),
+            self.tokens.wait_time(tokens, now),
+            0.0
+        )
+
+    def _grant(self, requests: int, tokens: int, enqueued_at: float, now: float) -> None:
+        self.requests.take(requests)
+        self.tokens.take(tokens)
+        self.admitted += 1
+        wait = now - enqueued_at
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+    def _wake_dispatcher(self) -> None:
+        if self._dispatcher is None or self._dispatcher.done():
+            if not self._queue:
+                return
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        self._wakeup.set()
+
+    async def _dispatch(self) -> None:
+        """Admit queued requests in priority order as the buckets refill."""
+        while self._queue:
+            _, _, enqueued_at, requests, tokens, future = self._queue[0]
+            if future.done():
+                # The waiter timed out or went away
+                heapq.heappop(self._queue)
+                continue
+            now = time.monotonic()
+            delay = self._delay(requests, tokens, now)
+            if delay == 0:
+                heapq.heappop(self._queue)
+                self._grant(requests, tokens, enqueued_at, now)
+                future.set_result(None)
+                continue
+            # Sleep until the head can be admitted, or a more urgent request or new rate arrives
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+class RateLimiter:
+    """Per-provider schedulers, with rates read from each provider's config."""
+
+    def __init__(self):
+        self._schedulers: Dict[str, ProviderScheduler] = {}
+
+    def scheduler_for(self, key: str, config: Dict[str, Any]) -> ProviderScheduler:
+        """Get the scheduler for a provider, applying rate changes from an updated config."""
+        requests_per_minute = config.get("requests_per_minute", settings.RATE_LIMIT_REQUESTS_PER_MINUTE)
+        tokens_per_minute = config.get("tokens_per_minute", settings.RATE_LIMIT_TOKENS_PER_MINUTE)
+        scheduler = self._schedulers.get(key)
+        if scheduler is None:
+            scheduler = ProviderScheduler(
+                requests_per_minute,
+                tokens_per_minute,
+                max_queue=settings.RATE_LIMIT_MAX_QUEUE,
+                max_wait=settings.RATE_LIMIT_MAX_WAIT,
+                max_retries=settings.RATE_LIMIT_MAX_RETRIES
+            )
+            self._schedulers[key] = scheduler
+        else:
+            scheduler.configure(requests_per_minute, tokens_per_minute)
+        return scheduler
+
+    def clear(self) -> None:
+        """Drop every scheduler, cancelling the requests still queued in them."""
+        for scheduler in self._schedulers.values():
+            scheduler.close()
+        self._schedulers.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-provider scheduler statistics."""
+        return {key: scheduler.stats() for key, scheduler in self._schedulers.items()}
+
+
+rate_limiter = RateLimiter()
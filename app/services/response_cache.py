@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from langchain_core.messages import BaseMessage
+
+from app.core.config import settings
+
+# Dict messages use chat roles, LangChain messages use types; normalise both to the latter
+_ROLE_TYPES = {"user": "human", "assistant": "ai", "system": "system"}
+
+
+def _message_key(message: Union[Dict[str, str], BaseMessage]) -> List[str]:
+    if isinstance(message, BaseMessage):
+        return [message.type, message.content]
+    return [_ROLE_TYPES.get(message["role"], message["role"]), message["content"]]
+
+
+def response_cache_key(
+    provider_name: str,
+    config: Dict[str, Any],
+    message: str,
+    messages: Optional[List[Union[Dict[str, str], BaseMessage]]] = None
+) -> str:
+    """Build a stable hash of everything that determines a generation's output."""
+    payload = {
+        "provider": provider_name,
+        "model_name": config.get("model_name"),
+        "temperature": config.get("temperature"),
+        "system_message": config.get("system_message"),
+        "max_tokens": config.get("max_tokens"),
+        "messages": [_message_key(msg) for msg in messages or []] + [["human", message]],
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+# Writes to the disk tier between purges of its expired rows
+PURGE_EVERY = 100
+
+
+class _DiskTier:
+    """SQLite-backed second cache tier that survives restarts."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._puts = 0
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, chunks TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_expires_at ON responses (expires_at)")
+            self._purge()
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[float, List[str]]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, chunks FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[0] <= time.time():
+            return None
+        return row[0], json.loads(row[1])
+
+    def put(self, key: str, expires_at: float, chunks: List[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, expires_at, chunks) VALUES (?, ?, ?)",
+                (key, expires_at, json.dumps(chunks))
+            )
+            self._puts += 1
+            if self._puts % PURGE_EVERY == 0:
+                self._purge()
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def _purge(self) -> None:
+        # Expired rows are already ignored by get; this only reclaims their space
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+
+
+class ResponseCache:
+    """LRU + TTL cache of generated responses, with an optional disk-backed tier.
+
+    Responses are stored as the list of chunks they were produced in, so a cached
+    streaming response can be replayed chunk by chunk.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self._disk = _DiskTier(disk_path) if disk_path else None
+        self._counters: Dict[str, List[int]] = {}  # provider -> [hits, misses]
+
+    async def get(self, key: str, provider_name: str) -> Optional[List[str]]:
+        """Get the cached chunks of a response, checking memory before disk."""
+        counters = self._counters.setdefault(provider_name, [0, 0])
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.time():
+            del self._entries[key]
+            entry = None
+        if entry is None and self._disk is not None:
+            entry = await asyncio.to_thread(self._disk.get, key)
+            if entry is not None:
+                self._store(key, entry)
+        if entry is None:
+            counters[1] += 1
+            return None
+        self._entries.move_to_end(key)
+        counters[0] += 1
+        return entry[1]
+
+    async def put(self, key: str, chunks: List[str]) -> None:
+        """Cache the chunks of a completed response."""
+        entry = (time.time() + self.ttl, list(chunks))
+        self._store(key, entry)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.put, key, *entry)
+
+    def clear(self) -> None:
+        """Drop every cached response, on disk as well."""
+        self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Get per-provider hit/miss counters and hit rates."""
+        return {
+            provider: {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            }
+            for provider, (hits, misses) in self._counters.items()
+        }
+
+    def _store(self, key: str, entry: Tuple[float, List[str]]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    disk_path=settings.RESPONSE_CACHE_DISK_PATH
+)
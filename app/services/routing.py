@@ -0,0 +1,145 @@
+import asyncio
+import time
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+class ProviderScore:
+    """EWMA latency and error rate observed for one provider."""
+
+    def __init__(self):
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.updated = time.monotonic()
+
+    def current_error_rate(self, now: float, half_life: float) -> float:
+        """Get the error rate, decayed for the time since the last observation so members recover."""
+        return self.error_rate * 0.5 ** ((now - self.updated) / half_life)
+
+    def record(self, latency: float, failed: bool, alpha: float, half_life: float) -> None:
+        now = time.monotonic()
+        self.error_rate = self.current_error_rate(now, half_life)
+        self.error_rate += alpha * ((1.0 if failed else 0.0) - self.error_rate)
+        # A failure says nothing about how fast the provider answers
+        if not failed:
+            self.latency = latency if self.latency is None else self.latency + alpha * (latency - self.latency)
+        self.requests += 1
+        self.updated = now
+
+
+class ProviderRouter:
+    """Routes requests between the members of a routing group by observed latency and error rate.
+
+    A member's score is its EWMA latency plus ``error_penalty`` seconds scaled by its EWMA
+    error rate; lower is better. Members without observations score zero so that each one
+    gets measured.
+    """
+
+    def __init__(self, alpha: float, error_penalty: float, error_half_life: float):
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self.error_half_life = error_half_life
+        self._scores: Dict[int, ProviderScore] = {}
+
+    def score(self, provider_id: int) -> float:
+        """Get the expected cost of sending a request to a provider, in seconds."""
+        stats = self._scores.get(provider_id)
+        if stats is None:
+            return 0.0
+        error_rate = stats.current_error_rate(time.monotonic(), self.error_half_life)
+        return (stats.latency or 0.0) + self.error_penalty * error_rate
+
+    def rank(self, provider_ids: List[int]) -> List[int]:
+        """Order providers best first; ties keep their order in the group."""
+        return sorted(provider_ids, key=self.score)
+
+    def record(self, provider_id: int, latency: float, failed: bool = False) -> None:
+        """Record the outcome of a request to a provider."""
+        stats = self._scores.setdefault(provider_id, ProviderScore())
+        stats.record(latency, failed, self.alpha, self.error_half_life)
+
+    async def run(
+        self,
+        calls: List[Tuple[int, Callable[[], Awaitable[Any]]]],
+        hedge_delay: Optional[float] = None
+    ) -> Tuple[int, Any, Dict[str, Any]]:
+        """Run a request on the first of ``calls``, hedging and failing over to the next ones.
+
+        If the running request has not finished after ``hedge_delay`` seconds, the next
+        member is sent the same request and whichever finishes first wins; the other is
+        cancelled. A failed request fails over to the next member straight away. Returns the
+        winning provider ID, its result and a record of the attempts made.
+        """
+        remaining = list(calls)
+        running: Dict[asyncio.Future, Tuple[int, float]] = {}
+        attempts: List[int] = []
+        hedged = False
+        error: Optional[BaseException] = None
+
+        def launch() -> None:
+            provider_id, fn = remaining.pop(0)
+            attempts.append(provider_id)
+            running[asyncio.ensure_future(fn())] = (provider_id, time.monotonic())
+
+        launch()
+        try:
+            while running:
+                timeout = hedge_delay if remaining and not hedged else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    launch()
+                    continue
+                for task in done:
+                    provider_id, started = running.pop(task)
+                    now = time.monotonic()
+                    if task.exception() is None:
+                        for loser_id, loser_started in running.values():
+                            # The loser is at least this slow, which is all we will learn about it
+                            self.record(loser_id, now - loser_started)
+                        self.record(provider_id, now - started)
+                        return provider_id, task.result(), {"attempts": attempts, "hedged": hedged}
+                    self.record(provider_id, now - started, failed=True)
+                    error = task.exception()
+                if not running and remaining:
+                    launch()
+            raise error
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def track_stream(self, provider_id: int, stream: AsyncIterator[str]) -> AsyncGenerator[str, None]:
+        """Pass a stream through, recording its latency and outcome for the provider."""
+        started = time.monotonic()
+        try:
+            async for chunk in stream:
+                yield chunk
+        except Exception:
+            self.record(provider_id, time.monotonic() - started, failed=True)
+            raise
+        self.record(provider_id, time.monotonic() - started)
+
+    def stats(self) -> Dict[int, Dict[str, Any]]:
+        """Get the latency, error rate and score of every provider seen."""
+        now = time.monotonic()
+        return {
+            provider_id: {
+                "latency": stats.latency,
+                "error_rate": stats.current_error_rate(now, self.error_half_life),
+                "requests": stats.requests,
+                "score": self.score(provider_id),
+            }
+            for provider_id, stats in self._scores.items()
+        }
+
+    def clear(self) -> None:
+        self._scores.clear()
+
+
+provider_router = ProviderRouter(
+    alpha=settings.ROUTING_EWMA_ALPHA,
+    error_penalty=settings.ROUTING_ERROR_PENALTY,
+    error_half_life=settings.ROUTING_ERROR_HALF_LIFE
+)
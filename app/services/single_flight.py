@@ -0,0 +1,153 @@
+import asyncio
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+
+class _Call:
+    """An in-flight upstream call shared by every waiter with the same key."""
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+# Chunks the upstream may run ahead of the fastest subscriber before it is paused
+READ_AHEAD = 16
+
+
+class _Broadcast:
+    """An in-flight upstream stream, buffered so each subscriber can read it from the start.
+
+    The upstream is read at the pace of the fastest subscriber, so a slow client slows
+    down the generation instead of the buffer.
+    """
+
+    def __init__(self, source: AsyncIterator[str], on_done: Callable[[], None]):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.read = 0  # chunks the fastest subscriber has consumed
+        self._changed = asyncio.Event()
+        self._consumed = asyncio.Event()
+        self._on_done = on_done
+        self._task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+                while len(self.chunks) - self.read >= READ_AHEAD:
+                    self._consumed.clear()
+                    await self._consumed.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._on_done()
+            self._notify()
+
+    def _notify(self) -> None:
+        # Wake current readers and give later ones a fresh event to wait on
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def subscribe(self) -> AsyncGenerator[str, None]:
+        """Read the stream from its first chunk, counting as a subscriber until closed."""
+        index = 0
+        self.subscribers += 1
+        try:
+            while True:
+                changed = self._changed
+                while index < len(self.chunks):
+                    yield self.chunks[index]
+                    index += 1
+                    if index > self.read:
+                        self.read = index
+                        self._consumed.set()
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                # Nobody is listening any more, so stop paying for the generation
+                self._on_done()
+                self._task.cancel()
+
+
+class SingleFlight:
+    """Coalesces identical in-flight generations into a single upstream call.
+
+    Non-streaming waiters share the result of one call. Streaming subscribers share one
+    upstream stream, each replaying the buffered output from the beginning. The upstream
+    call is cancelled once every waiter has gone away.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` unless an identical call is in flight, and return the shared result."""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget_call(key, call))
+            self.upstream_calls += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                self._forget_call(key, call)
+                call.task.cancel()
+
+    async def stream(self, key: str, fn: Callable[[], AsyncIterator[str]]) -> AsyncGenerator[str, None]:
+        """Subscribe to the in-flight stream for ``key``, starting ``fn`` if there is none.
+
+        Nothing is started or attached until the first chunk is requested, so a caller that
+        gives up before reading never holds an upstream open.
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast(fn(), on_done=lambda: self._forget_stream(key, broadcast))
+            self._streams[key] = broadcast
+            self.upstream_calls += 1
+        else:
+            self.coalesced += 1
+        # Attach in the same step that created the broadcast, before its pump can run
+        subscription = broadcast.subscribe()
+        try:
+            async for chunk in subscription:
+                yield chunk
+        finally:
+            await subscription.aclose()
+
+    def stats(self) -> Dict[str, int]:
+        """Get in-flight and coalescing counters."""
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+        }
+
+    def _forget_call(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _forget_stream(self, key: str, broadcast: _Broadcast) -> None:
+        if self._streams.get(key) is broadcast:
+            del self._streams[key]
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,109 @@
+import asyncio
+import re
+from typing import AsyncGenerator, AsyncIterator, List, Optional
+
+from app.core.config import settings
+
+_LINE_SEP = re.compile(r"\r\n|\r|\n")
+_SEP = "\r\n"
+
+
+def encode_event(data: str, event: str = "message", id: Optional[str] = None) -> bytes:
+    """Encode a server-sent event exactly as sse_starlette's ServerSentEvent would."""
+    lines = _LINE_SEP.split(data) if "\n" in data or "\r" in data else [data]
+    head = f"id: {id}{_SEP}event: {event}{_SEP}" if id is not None else f"event: {event}{_SEP}"
+    return (head + "".join(f"data: {line}{_SEP}" for line in lines) + _SEP).encode("utf-8")
+
+
+class CoalescingSSEWriter:
+    """Turns a stream of text chunks into pre-encoded SSE event bytes, several chunks per event.
+
+    Buffered chunks are flushed as one event once they reach ``max_bytes`` or the oldest has
+    waited ``flush_interval`` seconds, whichever comes first. The source is read by a separate
+    task, which stops reading once ``max_buffer_bytes`` are waiting for a slow client, so
+    backpressure reaches the upstream instead of the buffer growing without limit. With an
+    ``id_prefix``, events are numbered from 1 with IDs of the form ``<id_prefix>:<number>``.
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterator[str],
+        max_bytes: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_buffer_bytes: Optional[int] = None,
+        event: str = "message",
+        id_prefix: Optional[str] = None
+    ):
+        self.source = source
+        self.max_bytes = settings.SSE_COALESCE_BYTES if max_bytes is None else max_bytes
+        self.flush_interval = settings.SSE_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.max_buffer_bytes = max(
+            settings.SSE_MAX_BUFFER_BYTES if max_buffer_bytes is None else max_buffer_bytes, self.max_bytes, 1
+        )
+        self.event = event
+        self.id_prefix = id_prefix
+        self.events = 0
+        self.chunks = 0
+        self._buffer: List[str] = []
+        self._buffered_bytes = 0
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._changed: Optional[asyncio.Condition] = None
+
+    async def __aiter__(self) -> AsyncGenerator[bytes, None]:
+        self._changed = asyncio.Condition()
+        reader = asyncio.ensure_future(self._read())
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self._buffer or self._done)
+                    if self._buffer and not self._done and self._buffered_bytes < self.max_bytes:
+                        # Give more chunks until the flush interval to join this event
+                        try:
+                            await asyncio.wait_for(
+                                self._changed.wait_for(lambda: self._buffered_bytes >= self.max_bytes or self._done),
+                                self.flush_interval
+                            )
+                        except asyncio.TimeoutError:
+                            pass
+                    if not self._buffer:
+                        break
+                    data = self._take()
+                    self._changed.notify_all()
+                self.events += 1
+                event_id = f"{self.id_prefix}:{self.events}" if self.id_prefix is not None else None
+                yield encode_event(data, self.event, event_id)
+            if self._error is not None:
+                raise self._error
+        finally:
+            reader.cancel()
+
+    def _take(self) -> str:
+        """Take the buffered text for one event; without coalescing, only the oldest chunk."""
+        if self.max_bytes == 0:
+            data = self._buffer.pop(0)
+            self._buffered_bytes -= len(data.encode("utf-8"))
+            return data
+        data = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered_bytes = 0
+        return data
+
+    async def _read(self) -> None:
+        """Move chunks from the source into the buffer, pausing while the buffer is full."""
+        try:
+            async for chunk in self.source:
+                if not chunk:
+                    continue
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self._buffered_bytes < self.max_buffer_bytes)
+                    self._buffer.append(chunk)
+                    self._buffered_bytes += len(chunk.encode("utf-8"))
+                    self.chunks += 1
+                    self._changed.notify_all()
+        except Exception as e:
+            self._error = e
+        finally:
+            async with self._changed:
+                self._done = True
+                self._changed.notify_all()
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from uuid import uuid4
+
+from app.core.config import settings
+
+
+class ResumableStream:
+    """The numbered events of one generation, kept in a ring buffer for clients that reconnect.
+
+    Events are numbered from 1. The producer waits rather than evict an event no client has
+    been sent yet, so a client that reconnects with the last event ID it received can be
+    sent exactly the events it missed. With no client attached for ``resume_timeout``
+    seconds, the generation is cancelled.
+    """
+
+    def __init__(self, stream_id: str, capacity: int, resume_timeout: float):
+        self.id = stream_id
+        self.capacity = capacity
+        self.resume_timeout = resume_timeout
+        self.task: Optional[asyncio.Task] = None
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self.subscribers = 0
+        self.last_seq = 0  # newest published event
+        self.delivered = 0  # newest event sent to any client
+        self._events: Deque[Tuple[int, bytes]] = deque(maxlen=capacity)
+        self._changed = asyncio.Condition()
+        self._abandon_timer: Optional[asyncio.TimerHandle] = None
+
+    def can_replay(self, after: int) -> bool:
+        """Whether every event after ``after`` is still buffered or yet to come."""
+        return after <= self.last_seq and (not self._events or self._events[0][0] <= after + 1)
+
+    async def publish(self, seq: int, event: bytes) -> None:
+        """Buffer an encoded event, waiting while that would evict an event no client was sent."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: seq - self.delivered <= self.capacity)
+            self._events.append((seq, event))
+            self.last_seq = seq
+            self._changed.notify_all()
+
+    async def close(self) -> None:
+        async with self._changed:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._changed.notify_all()
+        self._cancel_abandon_timer()
+
+    async def subscribe(self, after: int = 0) -> AsyncGenerator[bytes, None]:
+        """Yield the events after ``after``, buffered ones first, until the generation ends."""
+        self.subscribers += 1
+        self._cancel_abandon_timer()
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self.last_seq > after or self.done)
+                    pending = [(seq, event) for seq, event in self._events if seq > after]
+                if not pending:
+                    return
+                for seq, event in pending:
+                    yield event
+                    after = seq
+                async with self._changed:
+                    self.delivered = max(self.delivered, after)
+                    self._changed.notify_all()
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers:
+                self.detach()
+
+    def detach(self) -> None:
+        """Start the countdown after which a generation with no client attached is cancelled."""
+        if self.done or self.task is None or self._abandon_timer is not None:
+            return
+        self._abandon_timer = asyncio.get_running_loop().call_later(self.resume_timeout, self._abandon)
+
+    def _abandon(self) -> None:
+        self._abandon_timer = None
+        if not self.subscribers and self.task is not None:
+            self.task.cancel()
+
+    def _cancel_abandon_timer(self) -> None:
+        if self._abandon_timer is not None:
+            self._abandon_timer.cancel()
+            self._abandon_timer = None
+
+
+class StreamRegistry:
+    """Running and recently finished streams of this process, by stream ID.
+
+    Generations run as tasks of their own, independent of the client connection, and stay
+    resumable for ``ttl`` seconds after they finish.
+    """
+
+    def __init__(self, capacity: int, ttl: float, resume_timeout: float):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.resume_timeout = resume_timeout
+        self._streams: Dict[str, ResumableStream] = {}
+        self.resumed = 0
+
+    def start(self, produce: Callable[[ResumableStream], Awaitable[None]]) -> ResumableStream:
+        """Register a new stream and start ``produce`` to publish its events."""
+        self._purge()
+        stream = ResumableStream(uuid4().hex, self.capacity, self.resume_timeout)
+        self._streams[stream.id] = stream
+
+        async def run() -> None:
+            try:
+                await produce(stream)
+            finally:
+                await stream.close()
+
+        stream.task = asyncio.ensure_future(run())
+        # Counts down until the first client attaches
+        stream.detach()
+        return stream
+
+    def get(self, stream_id: str) -> Optional[ResumableStream]:
+        """Get a stream that is running or finished less than ttl seconds ago."""
+        self._purge()
+        return self._streams.get(stream_id)
+
+    async def aclose(self) -> None:
+        """Cancel every running generation and wait for it to record its partial result."""
+        tasks = [stream.task for stream in self._streams.values() if stream.task is not None and not stream.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._streams.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of running and resumable finished streams and attached clients."""
+        self._purge()
+        running = [stream for stream in self._streams.values() if not stream.done]
+        return {
+            "running": len(running),
+            "finished": len(self._streams) - len(running),
+            "subscribers": sum(stream.subscribers for stream in self._streams.values()),
+            "resumed": self.resumed,
+        }
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        for stream_id in [
+            stream_id for stream_id, stream in self._streams.items()
+            if stream.done and now - stream.finished_at > self.ttl
+        ]:
+            del self._streams[stream_id]
+
+
+stream_registry = StreamRegistry(
+    capacity=settings.STREAM_REPLAY_BUFFER_EVENTS,
+    ttl=settings.STREAM_REPLAY_TTL,
+    resume_timeout=settings.STREAM_RESUME_TIMEOUT
+)
@@ -0,0 +1,142 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.models.models import ModelProvider
+from app.schemas.schemas import ModelProviderInDB
+from app.services.factory import ModelServiceFactory
+
+
+class WarmUp:
+    """Pays the cold-start costs of a new worker before it reports itself ready.
+
+    Opens database pool connections, initializes the model service of every provider
+    concurrently and, optionally, sends each a one-word probe so its upstream connection
+    is open. Failures are reported in ``stats()``, and a provider that fails to warm up is
+    left to be initialized by its first request; the worker becomes ready either way.
+    """
+
+    def __init__(
+        self,
+        db_connections: int = settings.WARMUP_DB_CONNECTIONS,
+        probe: bool = settings.WARMUP_PROBE,
+        timeout: float = settings.WARMUP_TIMEOUT
+    ):
+        self.db_connections = db_connections
+        self.probe = probe
+        self.timeout = timeout
+        self.ready = False
+        self.seconds: Optional[float] = None
+        self.connections_opened = 0
+        self.error: Optional[str] = None
+        self.providers: Dict[int, str] = {}  # provider ID -> "ready", "probed" or the error
+        self._task: Optional[asyncio.Task] = None
+
+    def start(
+        self,
+        engine: AsyncEngine,
+        session_factory: Callable[[], AsyncSession],
+        api_key_for: Callable[[ModelProviderInDB], str]
+    ) -> None:
+        """Warm up in the background, so the server accepts health checks meanwhile."""
+        self._task = asyncio.ensure_future(self.run(engine, session_factory, api_key_for))
+
+    def skip(self) -> None:
+        self.ready = True
+
+    async def run(
+        self,
+        engine: AsyncEngine,
+        session_factory: Callable[[], AsyncSession],
+        api_key_for: Callable[[ModelProviderInDB], str]
+    ) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._warm(engine, session_factory, api_key_for), self.timeout)
+        except asyncio.TimeoutError:
+            self.error = f"Did not finish within {self.timeout}s"
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+        finally:
+            self.seconds = time.perf_counter() - started
+            self.ready = True
+
+    async def aclose(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "seconds": self.seconds,
+            "error": self.error,
+            "db_connections": self.connections_opened,
+            "providers": dict(self.providers),
+        }
+
+    async def _warm(
+        self,
+        engine: AsyncEngine,
+        session_factory: Callable[[], AsyncSession],
+        api_key_for: Callable[[ModelProviderInDB], str]
+    ) -> None:
+        await self._open_connections(engine)
+        async with session_factory() as db:
+            result = await db.execute(select(ModelProvider).order_by(ModelProvider.id))
+            providers = [ModelProviderInDB.model_validate(row) for row in result.scalars().all()]
+        await asyncio.gather(*(self._warm_provider(provider, api_key_for) for provider in providers))
+
+    async def _open_connections(self, engine: AsyncEngine) -> None:
+        """Open connections concurrently and hold them together, so the pool keeps that many."""
+        all_settled = asyncio.Event()
+        settled = 0
+        opened = 0
+
+        def settle() -> None:
+            nonlocal settled
+            settled += 1
+            if settled == self.db_connections:
+                all_settled.set()
+
+        async def open_one() -> None:
+            nonlocal opened
+            connected = False
+            try:
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+                    opened += 1
+                    connected = True
+                    settle()
+                    await all_settled.wait()
+            finally:
+                if not connected:
+                    settle()
+
+        results = await asyncio.gather(*(open_one() for _ in range(self.db_connections)), return_exceptions=True)
+        self.connections_opened = opened
+        if results and not opened:
+            raise results[0]
+
+    async def _warm_provider(self, provider: ModelProviderInDB, api_key_for: Callable[[ModelProviderInDB], str]) -> None:
+        try:
+            service = await ModelServiceFactory.get_service(
+                provider_id=provider.id,
+                provider_name=provider.name,
+                api_key=api_key_for(provider),
+                config=provider.config
+            )
+            self.providers[provider.id] = "ready"
+            if self.probe:
+                await service.generate_response("ping")
+                self.providers[provider.id] = "probed"
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e) or type(e).__name__
+            self.providers[provider.id] = f"failed: {detail}"
+
+
+warm_up = WarmUp()
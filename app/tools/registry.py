@@ -1,4 +1,5 @@
 from typing import Dict, List, Type
+from app.core.tracing import span
 from app.tools.base import BaseTool, ToolDefinition
 
 
@@ -45,9 +46,10 @@ class ToolRegistry:
     @classmethod
     def get_tool_instance(cls, tool_id: str, provider_id: int) -> BaseTool:
         """Get a tool instance for a provider."""
-        if provider_id not in cls._instances or tool_id not in cls._instances[provider_id]:
-            return cls.create_tool_instance(tool_id, provider_id)
-        return cls._instances[provider_id][tool_id]
+        with span("tool_registry"):
+            if provider_id not in cls._instances or tool_id not in cls._instances[provider_id]:
+                return cls.create_tool_instance(tool_id, provider_id)
+            return cls._instances[provider_id][tool_id]
 
     @classmethod
     def get_provider_tools(cls, provider_id: int) -> List[ToolDefinition]:
@@ -64,3 +66,7 @@ class ToolRegistry:
         """Remove all tools for a provider."""
         if provider_id in cls._instances:
             del cls._instances[provider_id]
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._instances.clear()
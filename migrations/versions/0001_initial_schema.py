@@ -0,0 +1,66 @@
+"""Initial schema, as previously created by Base.metadata.create_all
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "modelprovider",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=50), nullable=False),
+        sa.Column("api_key", sa.String(length=255), nullable=False),
+        sa.Column("config", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("tool_ids", sa.JSON(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_modelprovider_id", "modelprovider", ["id"])
+    op.create_index("ix_modelprovider_name", "modelprovider", ["name"])
+
+    op.create_table(
+        "provider_tools",
+        sa.Column("provider_id", sa.Integer(), nullable=True),
+        sa.Column("tool_id", sa.String(length=50), nullable=True),
+        sa.ForeignKeyConstraint(["provider_id"], ["modelprovider.id"], ondelete="CASCADE"),
+    )
+
+    op.create_table(
+        "chathistory",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("conversation_id", sa.String(length=50), nullable=True),
+        sa.Column("model_provider_id", sa.Integer(), nullable=True),
+        sa.Column("user_message", sa.Text(), nullable=False),
+        sa.Column("assistant_message", sa.Text(), nullable=False),
+        sa.Column("chat_metadata", sa.JSON(), nullable=True),
+        sa.Column("tool_request", sa.JSON(), nullable=True),
+        sa.Column("tool_response", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["model_provider_id"], ["modelprovider.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_chathistory_id", "chathistory", ["id"])
+    op.create_index("ix_chathistory_conversation_id", "chathistory", ["conversation_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("chathistory")
+    op.drop_table("provider_tools")
+    op.drop_table("modelprovider")
@@ -0,0 +1,53 @@
+"""Store JSON columns as JSONB
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:05:00.000000
+
+Changing a column type rewrites the table under an ACCESS EXCLUSIVE lock, so unlike the
+index builds in 0003 this step is not online; schedule it for a quiet window on large tables.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JSON_COLUMNS = [
+    ("modelprovider", "config"),
+    ("modelprovider", "tool_ids"),
+    ("chathistory", "chat_metadata"),
+    ("chathistory", "tool_request"),
+    ("chathistory", "tool_response"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            postgresql_using=f"{column}::jsonb",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            postgresql_using=f"{column}::json",
+        )
@@ -0,0 +1,79 @@
+"""Composite indexes for the chat history access patterns
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:10:00.000000
+
+- (conversation_id, created_at) serves conversation context loading, which filters by
+  conversation and orders by creation time, without a sort step. It replaces the
+  single-column conversation_id index, which is a prefix of it.
+- (model_provider_id, created_at, id) serves the provider history endpoint, which orders
+  by (created_at DESC, id DESC) for keyset pagination; a backward index scan returns rows
+  in that order.
+
+The message text columns are deliberately not INCLUDEd: they are unbounded and would
+exceed the btree tuple size limit.
+
+The indexes are built and dropped CONCURRENTLY so the migration can run against a live
+table; that cannot happen inside a transaction, hence the autocommit blocks. A failed
+concurrent build leaves an INVALID index behind, which has to be dropped before re-running.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_chathistory_conversation_id_created_at",
+            "chathistory",
+            ["conversation_id", "created_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_chathistory_model_provider_id_created_at_id",
+            "chathistory",
+            ["model_provider_id", "created_at", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_chathistory_conversation_id",
+            table_name="chathistory",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_chathistory_conversation_id",
+            "chathistory",
+            ["conversation_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_chathistory_model_provider_id_created_at_id",
+            table_name="chathistory",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_chathistory_conversation_id_created_at",
+            table_name="chathistory",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,42 @@
+"""Routing groups of model providers
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 09:15:00.000000
+
+Member provider IDs are kept in a JSONB list, like modelprovider.tool_ids, so deleting a
+provider leaves its ID in any group; the router skips members that no longer exist.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "routinggroup",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=50), nullable=False),
+        sa.Column("provider_ids", postgresql.JSONB(), nullable=False),
+        sa.Column("hedge_delay", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        if_not_exists=True,
+    )
+    op.create_index("ix_routinggroup_id", "routinggroup", ["id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("routinggroup")
@@ -0,0 +1,36 @@
+"""Status of chat history rows
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 09:20:00.000000
+
+Streamed turns are inserted while they are generated and checkpointed until they finish, so
+each row records whether it is still streaming, complete, interrupted by the client or
+failed upstream. Existing rows are complete. Adding a column with a constant default only
+changes the catalog on PostgreSQL 11+, so this does not rewrite the table.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "chathistory",
+        sa.Column("status", sa.String(length=20), server_default="complete", nullable=False),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("chathistory", "status")
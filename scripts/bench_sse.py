@@ -0,0 +1,95 @@
+"""Benchmark SSE encoding of a fast token stream, one event per chunk versus coalesced.
+
+Each event goes through the byte conversion EventSourceResponse applies to every yielded
+item and is written to a loopback socket, as the server sends one body message per event.
+Reports events per second, tokens per second and CPU time per streamed token:
+
+    python scripts/bench_sse.py --tokens 50000 --coalesce-bytes 512
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Settings require database variables even though nothing here connects
+for name in ("POSTGRES_SERVER", "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB"):
+    os.environ.setdefault(name, "bench")
+
+from sse_starlette.event import ensure_bytes  # noqa: E402
+
+from app.services.sse_writer import CoalescingSSEWriter  # noqa: E402
+
+
+async def token_stream(tokens: int, token: str):
+    for _ in range(tokens):
+        yield token
+        await asyncio.sleep(0)  # chunks arrive from the network, one read at a time
+
+
+async def per_chunk(tokens: int, token: str):
+    """The previous event_generator: one dict event per provider chunk."""
+    async for chunk in token_stream(tokens, token):
+        yield {"event": "message", "data": chunk}
+
+
+async def coalesced(tokens: int, token: str, coalesce_bytes: int, flush_interval: float):
+    async for event in CoalescingSSEWriter(
+        token_stream(tokens, token), max_bytes=coalesce_bytes, flush_interval=flush_interval
+    ):
+        yield event
+
+
+async def drain_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    while await reader.read(65536):
+        pass
+    writer.close()
+
+
+async def measure(name: str, events, tokens: int) -> None:
+    server = await asyncio.start_server(drain_client, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    _, client = await asyncio.open_connection("127.0.0.1", port)
+
+    count = 0
+    sent = 0
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    async for event in events:
+        body = ensure_bytes(event, "\r\n")
+        client.write(body)
+        await client.drain()
+        sent += len(body)
+        count += 1
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+
+    client.close()
+    await client.wait_closed()
+    server.close()
+    await server.wait_closed()
+    print(
+        f"{name:<10} {count:>8} events {count / wall:>10,.0f} events/s {tokens / wall:>10,.0f} tokens/s "
+        f"{cpu / tokens * 1e6:>7.2f} us CPU/token {sent / 1024:>8,.0f} KiB"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=50000)
+    parser.add_argument("--token", default="tok ")
+    parser.add_argument("--coalesce-bytes", type=int, default=512)
+    parser.add_argument("--flush-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    await measure("per-chunk", per_chunk(args.tokens, args.token), args.tokens)
+    await measure(
+        "coalesced",
+        coalesced(args.tokens, args.token, args.coalesce_bytes, args.flush_interval),
+        args.tokens
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,156 @@
+"""Drive /chat/chat and /chat/chat/stream at a target concurrency and report throughput and latency.
+
+Runs offline against a local server with the fake provider enabled, so the numbers are
+the server's own overhead plus the simulated generation time:
+
+    FAKE_PROVIDER_ENABLED=true uvicorn app.main:app
+    python scripts/loadtest.py --concurrency 64 --requests 2000 --mode both \\
+        --fake-config '{"ttft": 0.1, "tokens_per_second": 100, "output_tokens": 50}'
+
+Without --provider-id a "fake" provider is created with --fake-config and deleted afterwards.
+Each request sends a distinct message unless --same-message is given, which measures
+single-flight sharing and the response cache instead of generation.
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+
+
+@dataclass
+class Results:
+    """Latencies in seconds of one mode's successful requests, and its failures by reason."""
+
+    latencies: List[float] = field(default_factory=list)
+    first_token: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+    started: float = 0.0
+    finished: float = 0.0
+
+    def error(self, reason: str) -> None:
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of the values, 0.0 for none."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+async def chat_once(client: httpx.AsyncClient, payload: dict, results: Results) -> None:
+    started = time.perf_counter()
+    try:
+        response = await client.post("/api/v1/chat/chat", json=payload)
+    except httpx.HTTPError as e:
+        results.error(type(e).__name__)
+        return
+    if response.status_code != 200:
+        results.error(f"HTTP {response.status_code}")
+        return
+    results.latencies.append(time.perf_counter() - started)
+
+
+async def stream_once(client: httpx.AsyncClient, payload: dict, results: Results) -> None:
+    started = time.perf_counter()
+    first_token: Optional[float] = None
+    event = "message"
+    try:
+        async with client.stream("POST", "/api/v1/chat/chat/stream", json=payload) as response:
+            if response.status_code != 200:
+                results.error(f"HTTP {response.status_code}")
+                return
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    if event == "error":
+                        results.error("error event")
+                        return
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                elif not line:
+                    event = "message"
+    except httpx.HTTPError as e:
+        results.error(type(e).__name__)
+        return
+    results.latencies.append(time.perf_counter() - started)
+    if first_token is not None:
+        results.first_token.append(first_token)
+
+
+async def run_mode(client: httpx.AsyncClient, mode: str, args: argparse.Namespace, provider_id: int) -> Results:
+    """Send args.requests requests from args.concurrency workers, each waiting for its previous response."""
+    results = Results()
+    remaining = iter(range(args.requests))
+    send = stream_once if mode == "stream" else chat_once
+
+    async def worker() -> None:
+        for index in remaining:
+            message = args.message if args.same_message else f"{args.message} #{mode}-{index}"
+            payload = {"message": message, "model_provider_id": provider_id, "stream": mode == "stream"}
+            await send(client, payload, results)
+
+    results.started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    results.finished = time.perf_counter()
+    return results
+
+
+def report(mode: str, results: Results) -> None:
+    elapsed = results.finished - results.started
+    done = len(results.latencies)
+    failed = sum(results.errors.values())
+    print(f"{mode}: {done} ok, {failed} failed in {elapsed:.2f}s ({done / elapsed if elapsed else 0.0:.1f} req/s)")
+    print(
+        f"  latency   p50 {percentile(results.latencies, 50) * 1000:8.1f} ms"
+        f"  p95 {percentile(results.latencies, 95) * 1000:8.1f} ms"
+        f"  p99 {percentile(results.latencies, 99) * 1000:8.1f} ms"
+    )
+    if results.first_token:
+        print(
+            f"  ttft      p50 {percentile(results.first_token, 50) * 1000:8.1f} ms"
+            f"  p95 {percentile(results.first_token, 95) * 1000:8.1f} ms"
+            f"  p99 {percentile(results.first_token, 99) * 1000:8.1f} ms"
+        )
+    for reason, count in sorted(results.errors.items()):
+        print(f"  error     {reason}: {count}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        provider_id = args.provider_id
+        if provider_id is None:
+            response = await client.post("/api/v1/providers/", json={
+                "name": "fake", "api_key": "fake", "config": json.loads(args.fake_config)
+            })
+            response.raise_for_status()
+            provider_id = response.json()["id"]
+        try:
+            modes = ["chat", "stream"] if args.mode == "both" else [args.mode]
+            for mode in modes:
+                report(mode, await run_mode(client, mode, args, provider_id))
+        finally:
+            if args.provider_id is None:
+                await client.delete(f"/api/v1/providers/{provider_id}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mode", choices=["chat", "stream", "both"], default="both")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per mode")
+    parser.add_argument("--provider-id", type=int, help="an existing provider to target")
+    parser.add_argument("--fake-config", default="{}", help="config of the fake provider created for the run")
+    parser.add_argument("--message", default="Load test message")
+    parser.add_argument("--same-message", action="store_true")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    asyncio.run(main(parser.parse_args()))
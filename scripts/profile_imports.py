@@ -0,0 +1,77 @@
+"""Report the cold-start import cost of the application, from fresh interpreters.
+
+Runs ``python -X importtime -c "import app.main"`` and lists the modules with the largest
+cumulative and self import times, plus the total per top-level package:
+
+    python scripts/profile_imports.py --top 25
+    python scripts/profile_imports.py --module app.services.factory
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child_env() -> Dict[str, str]:
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE="1")
+    # Settings require database variables even though importing connects to nothing
+    for name in ("POSTGRES_SERVER", "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB"):
+        env.setdefault(name, "profile")
+    return env
+
+
+def wall_time(module: str) -> float:
+    """Seconds to import the module in a fresh interpreter."""
+    code = f"import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=child_env(), capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    """(module, self microseconds, cumulative microseconds) of every module imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=child_env(), capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main(args: argparse.Namespace) -> None:
+    best = min(wall_time(args.module) for _ in range(args.repeat))
+    rows = import_times(args.module)
+    print(f"import {args.module}: {best * 1000:.0f} ms (best of {args.repeat}), {len(rows)} modules")
+
+    print(f"\nTop {args.top} by cumulative time:")
+    for name, _, cumulative in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    print(f"\nTop {args.top} by self time:")
+    for name, self_us, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    packages: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        packages[name.split(".")[0]] += self_us
+    print(f"\nTop {args.top} packages by total self time:")
+    for package, total in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {total / 1000:8.1f} ms  {package}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters timed for the wall time")
+    main(parser.parse_args())
@@ -0,0 +1,146 @@
+"""Timing harness for the micro-benchmarks, with baselines stored in baselines.json.
+
+Each benchmark is timed as the best of several rounds, per call, and divided by the time
+of a fixed reference workload measured in rounds alternating with it. Baselines hold that relative
+figure, so they carry over between machines of different speed; a benchmark fails when
+its relative time exceeds its baseline by more than the configured threshold.
+
+    pytest tests/benchmarks --run-benchmarks      # compare with the baselines
+    pytest tests/benchmarks --update-baselines    # record new baselines
+"""
+import asyncio
+import gc
+import inspect
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pytest
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+DEFAULT_THRESHOLD = 1.5  # allowed slowdown factor, unless a benchmark sets its own
+ROUNDS = 5
+MIN_ROUND_SECONDS = 0.05
+
+
+def _reference_workload() -> None:
+    """Pure Python dict, string and sort work, comparable to the code under test."""
+    rows = [{"role": "user" if i % 2 else "assistant", "content": f"message {i}"} for i in range(200)]
+    sorted(rows, key=lambda row: row["content"])
+    "".join(row["content"] for row in rows)
+
+
+def _runner(fn: Callable[[], Any]) -> Tuple[Callable[[int], None], Optional[asyncio.AbstractEventLoop]]:
+    """A function calling fn the given number of times, on a private event loop for coroutine functions."""
+    if inspect.iscoroutinefunction(fn):
+        loop = asyncio.new_event_loop()
+
+        async def run_many(number: int) -> None:
+            for _ in range(number):
+                await fn()
+
+        return lambda number: loop.run_until_complete(run_many(number)), loop
+
+    def run(number: int) -> None:
+        for _ in range(number):
+            fn()
+    return run, None
+
+
+def _calibrate(run: Callable[[int], None]) -> int:
+    """Calls per round, so a round is long enough to be above timer noise."""
+    run(1)  # warm up caches and lazy imports
+    number = 1
+    while True:
+        started = time.perf_counter()
+        run(number)
+        elapsed = time.perf_counter() - started
+        if elapsed >= MIN_ROUND_SECONDS:
+            return number
+        number = max(number * 2, int(number * MIN_ROUND_SECONDS * 1.2 / max(elapsed, 1e-9)))
+
+
+def _time_round(run: Callable[[int], None], number: int) -> float:
+    started = time.perf_counter()
+    run(number)
+    return (time.perf_counter() - started) / number
+
+
+def measure(fn: Callable[[], Any], rounds: int = ROUNDS) -> Tuple[float, float]:
+    """Best seconds per call of fn and of the reference workload, over alternating rounds.
+
+    Interleaving the rounds exposes both to the same machine load, so their ratio stays
+    stable when the machine speeds up or slows down during the session.
+    """
+    run, loop = _runner(fn)
+    reference_run, _ = _runner(_reference_workload)
+    # As in timeit, collections triggered by earlier allocations would land on random rounds
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        number = _calibrate(run)
+        reference_number = _calibrate(reference_run)
+        best = reference = float("inf")
+        for _ in range(rounds):
+            best = min(best, _time_round(run, number))
+            reference = min(reference, _time_round(reference_run, reference_number))
+        return best, reference
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+        if loop is not None:
+            loop.close()
+
+
+class BenchmarkSession:
+    """Baselines and the results measured so far."""
+
+    def __init__(self, update: bool):
+        self.update = update
+        self.data: Dict[str, Any] = {"threshold": DEFAULT_THRESHOLD, "benchmarks": {}}
+        if BASELINES_PATH.exists():
+            self.data = json.loads(BASELINES_PATH.read_text())
+        self.results: Dict[str, Dict[str, float]] = {}
+
+    def check(self, name: str, seconds: float, reference: float) -> None:
+        relative = seconds / reference
+        self.results[name] = {"seconds": seconds, "relative": relative}
+        if self.update:
+            return
+        baseline = self.data["benchmarks"].get(name)
+        if baseline is None:
+            pytest.skip(f"No baseline for {name}; record one with --update-baselines")
+        threshold = baseline.get("threshold", self.data.get("threshold", DEFAULT_THRESHOLD))
+        if relative > baseline["relative"] * threshold:
+            pytest.fail(
+                f"{name} regressed: {seconds * 1e6:.2f} us per call, {relative / baseline['relative']:.2f}x "
+                f"its baseline relative to the reference workload (threshold {threshold}x)"
+            )
+
+    def save(self) -> None:
+        benchmarks = self.data.setdefault("benchmarks", {})
+        for name, result in sorted(self.results.items()):
+            entry = benchmarks.setdefault(name, {})
+            entry["relative"] = float(f"{result['relative']:.3g}")
+            entry["seconds"] = float(f"{result['seconds']:.3g}")
+        self.data["benchmarks"] = dict(sorted(benchmarks.items()))
+        BASELINES_PATH.write_text(json.dumps(self.data, indent=2) + "\n")
+
+
+@pytest.fixture(scope="session")
+def benchmark_session(request):
+    session = BenchmarkSession(update=request.config.getoption("--update-baselines"))
+    yield session
+    if session.update and session.results:
+        session.save()
+
+
+@pytest.fixture
+def benchmark(request, benchmark_session):
+    """Time a callable, or a coroutine function, and compare it with the test's baseline."""
+    def run(fn: Callable[[], Any]) -> float:
+        seconds, reference = measure(fn)
+        benchmark_session.check(request.node.name, seconds, reference)
+        return seconds
+    return run
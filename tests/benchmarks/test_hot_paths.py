@@ -0,0 +1,124 @@
+from datetime import datetime
+
+import pytest
+
+from app.api.v1 import chat as chat_module
+from app.models.models import ChatHistory
+from app.schemas.schemas import ModelProviderBase
+from app.services.conversation_cache import conversation_cache
+from app.services.fake_service import FakeModelService
+from app.tools.calculator import CalculatorTool
+from app.tools.registry import ToolRegistry
+
+pytestmark = pytest.mark.benchmark
+
+HISTORY_SIZES = [100, 1000, 10000]  # messages, two per turn
+
+
+def make_messages(count: int):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Message {i} of the conversation, a sentence long."}
+        for i in range(count)
+    ]
+
+
+def make_rows(count: int):
+    return [
+        ChatHistory(
+            id=i + 1,
+            model_provider_id=1,
+            conversation_id="bench",
+            user_message=f"Question {i} of the conversation, a sentence long.",
+            assistant_message=f"Answer {i} of the conversation, a little longer than the question.",
+            status="complete",
+            created_at=datetime(2024, 1, 1, 0, 0, i % 60)
+        )
+        for i in range(count // 2)
+    ]
+
+
+@pytest.fixture
+def service():
+    return FakeModelService(api_key="fake", config={"system_message": "You are a benchmark."})
+
+
+@pytest.mark.parametrize("size", HISTORY_SIZES)
+def test_convert_messages_to_langchain_format(benchmark, service, size):
+    messages = make_messages(size)
+    benchmark(lambda: service._convert_messages_to_langchain_format(messages))
+
+
+@pytest.mark.parametrize("size", HISTORY_SIZES)
+def test_build_prompt_from_history(benchmark, service, size):
+    messages = make_messages(size)
+    benchmark(lambda: service._build_langchain_messages("The current message", messages))
+
+
+@pytest.mark.parametrize("size", HISTORY_SIZES)
+def test_conversation_context_from_rows(benchmark, monkeypatch, size):
+    """Context assembly in chat() on a conversation cache miss, with the rows already fetched."""
+    rows = make_rows(size)
+
+    async def get_conversation_history(conversation_id, db):
+        return rows
+
+    monkeypatch.setattr(chat_module, "get_conversation_history", get_conversation_history)
+
+    async def assemble():
+        conversation_cache.invalidate("bench")
+        return await chat_module.get_conversation_messages("bench", None)
+
+    try:
+        benchmark(assemble)
+    finally:
+        conversation_cache.invalidate("bench")
+
+
+@pytest.mark.parametrize("size", HISTORY_SIZES)
+def test_conversation_context_cached(benchmark, size):
+    """Context assembly in chat() on a conversation cache hit, followed by prompt building."""
+    service = FakeModelService(api_key="fake")
+    conversation_cache.put("bench", service._convert_messages_to_langchain_format(make_messages(size)))
+
+    async def assemble():
+        messages = await chat_module.get_conversation_messages("bench", None)
+        return service._build_langchain_messages("The current message", messages)
+
+    try:
+        benchmark(assemble)
+    finally:
+        conversation_cache.invalidate("bench")
+
+
+def test_chat_history_response(benchmark):
+    chat_history = make_rows(2)[0]
+    chat_history.chat_metadata = {"routing": {"group_id": 1, "provider_id": 2, "attempts": [2], "hedged": False}}
+    provider = ModelProviderBase(name="openai", config={"model_name": "gpt-4", "temperature": 0.7}, tool_ids=["calculator"])
+    benchmark(lambda: chat_module.build_chat_history_response(chat_history, provider))
+
+
+def test_tool_registry_lookup(benchmark):
+    ToolRegistry.create_tool_instance("calculator", provider_id=999)
+    try:
+        benchmark(lambda: ToolRegistry.get_tool_instance("calculator", 999))
+    finally:
+        ToolRegistry.remove_provider_tools(999)
+
+
+def test_tool_registry_provider_tools(benchmark):
+    ToolRegistry.create_tool_instance("calculator", provider_id=999)
+    try:
+        benchmark(lambda: ToolRegistry.get_provider_tools(999))
+    finally:
+        ToolRegistry.remove_provider_tools(999)
+
+
+@pytest.mark.parametrize("operation", ["add", "divide"])
+def test_calculator_execute(benchmark, operation):
+    tool = CalculatorTool(provider_id=1)
+    parameters = {"operation": operation, "x": "12.5", "y": 4}
+
+    async def execute():
+        return await tool.execute(parameters)
+
+    benchmark(execute)
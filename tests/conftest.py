@@ -16,6 +16,29 @@ test_engine = create_async_engine(TEST_DATABASE_URL, echo=True)
 TestingSessionLocal = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-benchmarks", action="store_true", help="run the micro-benchmarks and compare them with their baselines"
+    )
+    parser.addoption(
+        "--update-baselines", action="store_true", help="run the micro-benchmarks and store their results as baselines"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: micro-benchmark, skipped unless --run-benchmarks is given")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip benchmarks by default; their timings are only meaningful on a quiet machine."""
+    if config.getoption("--run-benchmarks") or config.getoption("--update-baselines"):
+        return
+    skip = pytest.mark.skip(reason="needs --run-benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture(scope="session")
 def event_loop():
     """Create an instance of the default event loop for each test case."""
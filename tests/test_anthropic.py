@@ -59,7 +59,7 @@ async def test_anthropic_service_streaming(anthropic_service):
 
         await anthropic_service.initialize_model()
         chunks = []
-        async for chunk in await anthropic_service.generate_stream("Test message"):
+        async for chunk in anthropic_service.generate_stream("Test message"):
             chunks.append(chunk)
         
         assert chunks == ["Hello", " from", " Claude!"]
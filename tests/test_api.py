@@ -1,8 +1,16 @@
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
 
+from app.api.v1.chat import decode_history_cursor, encode_history_cursor
+from app.core.config import settings
 from app.main import app
+from app.models.models import ChatHistory
 
 
 @pytest.mark.asyncio
@@ -109,3 +117,114 @@ async def test_chat_stream(test_provider, db_session):
         )
     assert response.status_code == 200
     assert response.headers["content-type"] == "text/event-stream"
+
+
+@pytest.mark.asyncio
+async def test_chat_history_pagination(test_provider, db_session):
+    for i in range(3):
+        db_session.add(ChatHistory(
+            model_provider_id=test_provider.id,
+            conversation_id="paginated",
+            user_message=f"Message {i}",
+            assistant_message=f"Reply {i}"
+        ))
+    await db_session.commit()
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        first = await ac.get(
+            f"/api/v1/chat/history/{test_provider.id}",
+            params={"conversation_id": "paginated", "limit": 2}
+        )
+        second = await ac.get(
+            f"/api/v1/chat/history/{test_provider.id}",
+            params={"conversation_id": "paginated", "limit": 2, "after": first.headers["X-Next-Cursor"]}
+        )
+    assert [row["user_message"] for row in first.json()] == ["Message 2", "Message 1"]
+    assert [row["user_message"] for row in second.json()] == ["Message 0"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+@pytest.mark.asyncio
+async def test_chat_history_stream(test_provider, test_chat_history, db_session):
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.get(f"/api/v1/chat/history/{test_provider.id}", params={"stream": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert any(row["user_message"] == "Hello" for row in rows)
+
+
+def test_history_cursor_round_trip():
+    chat_history = ChatHistory(id=42, created_at=datetime(2024, 1, 2, 3, 4, 5, 678))
+    cursor = encode_history_cursor(chat_history)
+    assert decode_history_cursor(cursor) == (datetime(2024, 1, 2, 3, 4, 5, 678), 42)
+
+
+def test_history_cursor_rejects_garbage():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_history_cursor("not-a-cursor")
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_chat_batch(test_provider, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test-key")
+    test_provider.name = "openai"
+    await db_session.commit()
+
+    with patch("app.services.base.BaseModelService.generate_batch", new=AsyncMock(return_value=["One", "Two"])):
+        async with AsyncClient(app=app, base_url="http://test") as ac:
+            response = await ac.post(
+                "/api/v1/chat/batch",
+                json={
+                    "items": [
+                        {"message": "First", "model_provider_id": test_provider.id},
+                        {"message": "Second", "model_provider_id": test_provider.id},
+                        {"message": "Lost", "model_provider_id": 999999}
+                    ]
+                }
+            )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert {"index": 2, "error": "Provider not found"} in lines
+    chats = {line["index"]: line["chat"] for line in lines if "chat" in line}
+    assert chats[0]["assistant_message"] == "One"
+    assert chats[1]["assistant_message"] == "Two"
+    assert lines[-1] == {"persisted": 2}
+
+
+@pytest.mark.asyncio
+async def test_chat_with_routing_group(test_provider, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test-key")
+    test_provider.name = "openai"
+    await db_session.commit()
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post(
+            "/api/v1/routing-groups/",
+            json={"name": "gpt", "provider_ids": [test_provider.id, 999999]}
+        )
+        assert response.status_code == 400
+
+        response = await ac.post(
+            "/api/v1/routing-groups/",
+            json={"name": "gpt", "provider_ids": [test_provider.id], "hedge_delay": 0.5}
+        )
+        assert response.status_code == 200
+        group = response.json()
+
+        with patch("app.services.openai_service.OpenAIService.generate_response", new=AsyncMock(return_value="Routed")):
+            response = await ac.post(
+                "/api/v1/chat/chat",
+                json={"message": "Hello", "routing_group_id": group["id"], "chat_metadata": {"user_id": "123"}}
+            )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["assistant_message"] == "Routed"
+    assert data["chat_metadata"]["user_id"] == "123"
+    routing = data["chat_metadata"]["routing"]
+    assert routing["routing_group_id"] == group["id"]
+    assert routing["provider_id"] == test_provider.id
+    assert routing["attempts"] == [test_provider.id]
+    assert routing["hedged"] is False
@@ -0,0 +1,111 @@
+import asyncio
+import functools
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1 import chat as chat_module
+from app.api.v1 import chat_ws
+from app.core.config import settings
+from app.database.stream_recorder import StreamRecorder
+from app.main import app
+from app.schemas.schemas import ModelProviderInDB
+from app.services.single_flight import READ_AHEAD
+from tests.test_stream_recorder import FakeSessionFactory
+
+PROVIDER = ModelProviderInDB(
+    id=1,
+    name="openai",
+    api_key="test-key",
+    config={"model_name": "gpt-3.5-turbo"},
+    tool_ids=[],
+    created_at=datetime.utcnow(),
+    updated_at=datetime.utcnow()
+)
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+@pytest.fixture
+def ws_client(monkeypatch):
+    """A client whose chat turns use a fake provider lookup and fake persistence."""
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "test-key")
+    produced = {}
+
+    async def generate_stream(self, message, messages=None):
+        for index in range(int(message)):
+            produced[message] = index + 1
+            await asyncio.sleep(0.001)
+            yield f"{message}.{index} "
+
+    async def get_provider(provider_id, db):
+        return PROVIDER if provider_id == 1 else None
+
+    recorder = functools.partial(StreamRecorder, session_factory=FakeSessionFactory(), checkpoint_interval=60)
+    with patch.object(chat_ws, "AsyncSessionLocal", FakeSession), \
+            patch.object(chat_module, "StreamRecorder", recorder), \
+            patch.object(chat_module.provider_cache, "get", get_provider), \
+            patch("app.services.openai_service.OpenAIService.generate_stream", generate_stream):
+        yield TestClient(app), produced
+
+
+def chat_frame(turn_id: str, message: str, **extra):
+    return {"type": "chat", "id": turn_id, "request": {"message": message, "model_provider_id": 1, "stream": True}, **extra}
+
+
+def test_concurrent_turns_are_multiplexed(ws_client):
+    client, _ = ws_client
+    with client.websocket_connect("/api/v1/chat/ws") as ws:
+        ws.send_json(chat_frame("a", "3"))
+        ws.send_json(chat_frame("b", "2"))
+
+        chunks = {"a": [], "b": []}
+        done = set()
+        while len(done) < 2:
+            frame = ws.receive_json()
+            if frame["type"] == "chunk":
+                chunks[frame["id"]].append(frame["data"])
+            else:
+                assert frame["type"] == "done"
+                done.add(frame["id"])
+
+    assert "".join(chunks["a"]) == "3.0 3.1 3.2 "
+    assert "".join(chunks["b"]) == "2.0 2.1 "
+
+
+def test_turn_pauses_without_credits_and_can_be_cancelled(ws_client):
+    client, produced = ws_client
+    with client.websocket_connect("/api/v1/chat/ws") as ws:
+        ws.send_json(chat_frame("a", "50", credits=2))
+        assert [ws.receive_json()["seq"] for _ in range(2)] == [1, 2]
+        time.sleep(0.1)
+        # Generation stops a bounded read-ahead past the window instead of running to the end
+        assert produced["50"] <= 2 + READ_AHEAD + 2
+
+        ws.send_json({"type": "credit", "id": "a", "credits": 1})
+        assert ws.receive_json()["seq"] == 3
+
+        ws.send_json({"type": "cancel", "id": "a"})
+        assert ws.receive_json() == {"type": "cancelled", "id": "a"}
+
+
+def test_errors_are_reported_per_turn(ws_client):
+    client, _ = ws_client
+    with client.websocket_connect("/api/v1/chat/ws") as ws:
+        ws.send_json({"type": "chat", "id": "a", "request": {"message": "1", "model_provider_id": 2, "stream": True}})
+        assert ws.receive_json() == {"type": "error", "id": "a", "status_code": 404, "detail": "Provider not found"}
+
+        ws.send_json({"type": "chat", "id": "b", "request": {"message": "1"}})
+        assert ws.receive_json()["status_code"] == 422
+
+        ws.send_text("not json")
+        assert ws.receive_json()["status_code"] == 400
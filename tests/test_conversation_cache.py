@@ -0,0 +1,96 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.services.conversation_cache import ConversationCache
+
+
+def test_conversation_cache_miss_then_hit():
+    cache = ConversationCache(max_bytes=1024 * 1024)
+    assert cache.get("conv-1") is None
+
+    messages = [HumanMessage(content="Hello"), AIMessage(content="Hi there!")]
+    cache.put("conv-1", messages)
+
+    assert cache.get("conv-1") == messages
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_conversation_cache_append_turn():
+    cache = ConversationCache(max_bytes=1024 * 1024)
+    cache.put("conv-1", [HumanMessage(content="Hello"), AIMessage(content="Hi there!")])
+    handed_out = cache.get("conv-1")
+
+    cache.append_turn("conv-1", "How are you?", "Fine, thanks.")
+
+    messages = cache.get("conv-1")
+    assert [m.content for m in messages] == ["Hello", "Hi there!", "How are you?", "Fine, thanks."]
+    assert isinstance(messages[2], HumanMessage)
+    assert isinstance(messages[3], AIMessage)
+    # Lists already handed out must not change under in-flight requests
+    assert len(handed_out) == 2
+
+
+def test_conversation_cache_append_turn_skips_uncached_conversations():
+    cache = ConversationCache(max_bytes=1024 * 1024)
+
+    cache.append_turn("conv-1", "Hello", "Hi there!")
+    assert cache.get("conv-1") is None
+
+    cache.append_turn("conv-2", "Hello", "Hi there!", create=True)
+    assert [m.content for m in cache.get("conv-2")] == ["Hello", "Hi there!"]
+
+
+def test_conversation_cache_evicts_least_recently_used():
+    cache = ConversationCache(max_bytes=4000)
+    cache.put("conv-1", [HumanMessage(content="a" * 1000)])
+    cache.put("conv-2", [HumanMessage(content="b" * 1000)])
+    cache.get("conv-1")
+
+    cache.put("conv-3", [HumanMessage(content="c" * 1000)])
+
+    assert cache.get("conv-2") is None
+    assert cache.get("conv-1") is not None
+    assert cache.get("conv-3") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 4000
+
+
+def test_conversation_cache_skips_oversized_conversations():
+    cache = ConversationCache(max_bytes=1000)
+    cache.put("conv-1", [HumanMessage(content="a" * 5000)])
+
+    assert cache.get("conv-1") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_conversation_cache_skips_histories_loaded_before_a_change():
+    cache = ConversationCache(max_bytes=1024 * 1024)
+    version = cache.version("conv-1")
+
+    # A turn saved while the history loads is skipped by append_turn, as nothing is cached yet
+    cache.append_turn("conv-1", "How are you?", "Fine, thanks.")
+    cache.put("conv-1", [HumanMessage(content="Hello"), AIMessage(content="Hi there!")], version)
+    assert cache.get("conv-1") is None
+
+    cache.put("conv-1", [HumanMessage(content="Hello")], cache.version("conv-1"))
+    assert cache.get("conv-1") is not None
+
+    version = cache.version("conv-1")
+    cache.invalidate()
+    cache.put("conv-1", [HumanMessage(content="Hello")], version)
+    assert cache.get("conv-1") is None
+
+
+@pytest.mark.asyncio
+async def test_history_loaded_during_a_save_is_not_cached(monkeypatch):
+    from app.api.v1 import chat
+
+    async def load_while_a_turn_is_saved(conversation_id, db):
+        chat.conversation_cache.append_turn(conversation_id, "How are you?", "Fine, thanks.")
+        return []
+
+    monkeypatch.setattr(chat, "get_conversation_history", load_while_a_turn_is_saved)
+
+    assert await chat.get_conversation_messages("conv-racing", db=None) == []
+    assert chat.conversation_cache.get("conv-racing") is None
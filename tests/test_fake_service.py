@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from app.services.factory import ModelServiceFactory
+from app.services.fake_service import FakeModelService, FakeProviderError
+
+
+async def make_service(**config) -> FakeModelService:
+    service = FakeModelService(api_key="fake", config=config)
+    await service.initialize_model()
+    return service
+
+
+@pytest.mark.asyncio
+async def test_stream_is_paced_by_ttft_and_tokens_per_second():
+    service = await make_service(ttft=0.05, tokens_per_second=200, output_tokens=11)
+
+    started = time.perf_counter()
+    arrivals = []
+    chunks = []
+    async for chunk in service.generate_stream("hi"):
+        arrivals.append(time.perf_counter() - started)
+        chunks.append(chunk)
+
+    assert len(chunks) == 11
+    assert "".join(chunks).split() == [chunk.strip() for chunk in chunks]
+    assert arrivals[0] >= 0.05
+    # Ten more tokens at 200/s take 50ms after the first
+    assert arrivals[-1] - arrivals[0] >= 0.045
+
+
+@pytest.mark.asyncio
+async def test_response_takes_as_long_as_the_stream():
+    service = await make_service(ttft=0.02, tokens_per_second=100, output_tokens=4)
+
+    started = time.perf_counter()
+    response = await service.generate_response("hi")
+
+    assert time.perf_counter() - started >= 0.05
+    assert response == "lorem ipsum dolor sit"
+    assert await service.generate_batch([("a", None), ("b", None)]) == [response, response]
+
+
+@pytest.mark.asyncio
+async def test_error_rate_fails_before_the_first_token():
+    service = await make_service(ttft=0, error_rate=1.0)
+
+    with pytest.raises(FakeProviderError):
+        await service.generate_response("hi")
+    with pytest.raises(FakeProviderError):
+        async for _ in service.generate_stream("hi"):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_error_rate_is_reproducible_with_a_seed():
+    async def outcomes():
+        service = await make_service(ttft=0, tokens_per_second=1e6, output_tokens=1, error_rate=0.5, seed=7)
+        results = []
+        for _ in range(20):
+            try:
+                await service.generate_response("hi")
+                results.append(True)
+            except FakeProviderError:
+                results.append(False)
+        return results
+
+    first = await outcomes()
+    assert first == await outcomes()
+    assert True in first and False in first
+
+
+@pytest.mark.asyncio
+async def test_invalid_config_is_rejected():
+    with pytest.raises(ValueError):
+        await make_service(tokens_per_second=0)
+    with pytest.raises(ValueError):
+        await make_service(error_rate=2)
+
+
+@pytest.mark.asyncio
+async def test_registered_service_is_created_by_the_factory():
+    ModelServiceFactory.register_service("fake", FakeModelService)
+    try:
+        service = await ModelServiceFactory.create_service("fake", "fake", {"ttft": 0, "output_tokens": 2})
+    finally:
+        ModelServiceFactory._services.pop("fake")
+
+    assert isinstance(service, FakeModelService)
+    assert await service.generate_response("hi") == "lorem ipsum"
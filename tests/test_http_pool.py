@@ -0,0 +1,56 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.services.http_pool import HTTPPool
+
+
+@asynccontextmanager
+async def keep_alive_server():
+    """Minimal HTTP/1.1 server that keeps connections open between requests."""
+    async def handle(reader, writer):
+        while await reader.readuntil(b"\r\n\r\n"):
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nContent-Type: text/plain\r\n\r\nok")
+            await writer.drain()
+
+    async def handle_safely(reader, writer):
+        try:
+            await handle(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    server = await asyncio.start_server(handle_safely, "127.0.0.1", 0)
+    yield f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    server.close()
+
+
+def test_clients_are_shared_per_host():
+    pool = HTTPPool(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60, host_limits={"b.example": 2})
+
+    assert pool.async_client("https://a.example/v1") is pool.async_client("https://a.example")
+    assert pool.async_client("https://a.example") is not pool.async_client("https://b.example")
+    assert pool.client("https://a.example") is pool.client("https://a.example/v1")
+    assert pool._limits("b.example").max_connections == 2
+    assert pool._limits("b.example").max_keepalive_connections == 2
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused():
+    pool = HTTPPool(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60, http2=False)
+    async with keep_alive_server() as base_url:
+        client = pool.async_client(base_url)
+        for _ in range(3):
+            response = await client.get(f"{base_url}/ping")
+            assert response.text == "ok"
+
+    host = base_url.split("//")[1]
+    stats = pool.stats()[host]
+    assert stats["requests"] == 3
+    assert stats["connects"] == 1
+    assert stats["connections"] == 1
+    assert stats["idle"] == 1
+    assert stats["max_connections"] == 10
+
+    await pool.aclose()
+    assert pool.async_client(base_url) is not client
@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import asyncpg
+import pytest
+
+from app.api.v1.providers import evict_provider
+from app.services.factory import ModelServiceFactory
+from app.services.invalidation import InvalidationBus
+from app.tools.registry import ToolRegistry
+
+
+class FakeConnection:
+    """Delivers pg_notify calls to every listener, like a Postgres backend with this PID."""
+
+    listeners = []
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.executed = []
+        self.fail = False
+
+    def get_server_pid(self):
+        return self.pid
+
+    async def add_listener(self, channel, callback):
+        FakeConnection.listeners.append((self, channel, callback))
+
+    async def execute(self, query, *args):
+        if self.fail:
+            raise ConnectionError("connection lost")
+        self.executed.append((query, args))
+        if "pg_notify" in query:
+            channel, payload = args
+            for connection, listening, callback in list(FakeConnection.listeners):
+                if listening == channel:
+                    callback(connection, self.pid, channel, payload)
+
+    def terminate(self):
+        FakeConnection.listeners = [entry for entry in FakeConnection.listeners if entry[0] is not self]
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    FakeConnection.listeners = []
+    opened = []
+
+    async def connect(dsn):
+        connection = FakeConnection(pid=100 + len(opened))
+        opened.append(connection)
+        return connection
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    return opened
+
+
+async def started_bus(received):
+    bus = InvalidationBus(heartbeat=0.05, reconnect_delay=0.01)
+    bus.subscribe("provider", received.append)
+    bus.start("postgresql://test")
+    await asyncio.sleep(0.02)
+    return bus
+
+
+@pytest.mark.asyncio
+async def test_events_reach_other_workers_only(connections):
+    first_received, second_received = [], []
+    first = await started_bus(first_received)
+    second = await started_bus(second_received)
+    try:
+        first.publish("provider", 7)
+        await asyncio.sleep(0.02)
+
+        assert second_received == [7]
+        assert first_received == []
+        assert first.stats()["published"] == 1
+        assert second.stats()["received"] == 1
+    finally:
+        await first.aclose()
+        await second.aclose()
+
+
+@pytest.mark.asyncio
+async def test_unknown_and_malformed_events_are_ignored(connections):
+    received = []
+    bus = await started_bus(received)
+    try:
+        bus._on_notification(None, 1, bus.channel, json.dumps({"kind": "other", "key": 1}))
+        bus._on_notification(None, 1, bus.channel, "not json")
+
+        assert received == []
+        assert bus.stats()["received"] == 0
+    finally:
+        await bus.aclose()
+
+
+@pytest.mark.asyncio
+async def test_reconnect_invalidates_everything_and_resends(connections):
+    received = []
+    bus = await started_bus(received)
+    try:
+        connections[0].fail = True
+        bus.publish("provider", 3)
+        await asyncio.sleep(0.1)
+
+        assert len(connections) == 2
+        assert received == [None]
+        assert bus.stats()["reconnects"] == 1
+        assert bus.stats()["connected"]
+        assert connections[1].executed[0] == ("SELECT pg_notify($1, $2)", (bus.channel, json.dumps({"kind": "provider", "key": 3})))
+    finally:
+        await bus.aclose()
+
+
+def test_publish_before_start_is_a_no_op():
+    bus = InvalidationBus()
+
+    bus.publish("provider", 1)
+
+    assert bus.stats()["queued"] == 0
+
+
+def test_evict_provider_drops_services_and_tools():
+    ToolRegistry.create_tool_instance("calculator", provider_id=998)
+    ModelServiceFactory._instances[(998, "fingerprint")] = (object(), 0.0)
+
+    evict_provider(998)
+
+    assert ToolRegistry.get_provider_tools(998) == []
+    assert not [key for key in ModelServiceFactory._instances if key[0] == 998]
+
+
+def test_queued_turns_are_published_once_written(monkeypatch):
+    from app.api.v1 import chat
+
+    published = []
+    monkeypatch.setattr(chat.invalidation_bus, "publish", lambda kind, key: published.append((kind, key)))
+
+    chat.record_turn("conv-queued", "Hello", "Hi", queued=True)
+    assert published == []
+
+    chat.publish_written_turns([{"conversation_id": "conv-queued"}, {"conversation_id": "conv-queued"}])
+    chat.record_turn("conv-saved", "Hello", "Hi")
+
+    assert published == [("conversation", "conv-queued"), ("conversation", "conv-saved")]
+    chat.conversation_cache.invalidate("conv-queued")
+    chat.conversation_cache.invalidate("conv-saved")
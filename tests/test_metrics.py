@@ -0,0 +1,91 @@
+import pytest
+
+from app.core.metrics import (
+    Gauge, MetricsRegistry, generation_errors_total, generation_seconds, time_to_first_token_seconds
+)
+from app.services import generation
+from app.services.base import BaseModelService
+
+
+class EchoService(BaseModelService):
+    """Local fake provider that echoes the message, or fails when asked to."""
+
+    provider_name = "echo"
+
+    async def initialize_model(self) -> None:
+        pass
+
+    async def generate_response(self, message, messages=None):
+        if message == "fail":
+            raise RuntimeError("upstream failed")
+        return f"echo: {message}"
+
+    async def generate_stream(self, message, messages=None):
+        yield "echo: "
+        yield message
+
+
+def test_render_uses_prometheus_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ["path"])
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    requests.labels('/a"b').inc()
+    requests.labels('/a"b').inc(2)
+    latency.labels().observe(0.1)
+    latency.labels().observe(5)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{path="/a\\"b"} 3',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 1',
+        'latency_seconds_bucket{le="+Inf"} 2',
+        "latency_seconds_sum 5.1",
+        "latency_seconds_count 2",
+    ]
+
+
+def test_collectors_are_rendered_at_scrape_time():
+    registry = MetricsRegistry()
+    size = {"value": 1}
+
+    def collect():
+        # Collectors build fresh, unregistered metrics on every scrape
+        gauge = Gauge("queue_size", "Queue size")
+        gauge.labels().set(size["value"])
+        return [gauge]
+
+    registry.register_collector(collect)
+    size["value"] = 7
+    assert "queue_size 7" in registry.render()
+
+
+def test_labels_must_match_label_names():
+    registry = MetricsRegistry()
+    with pytest.raises(ValueError):
+        registry.counter("errors_total", "Errors", ["provider"]).labels()
+    with pytest.raises(ValueError):
+        registry.counter("errors_total", "Errors again")
+
+
+@pytest.mark.asyncio
+async def test_generation_records_latency_and_time_to_first_token(monkeypatch):
+    monkeypatch.setattr(generation.settings, "SINGLE_FLIGHT_ENABLED", False)
+    service = EchoService("test-key")
+    service.provider_id = 7
+    stream_latency = generation_seconds.labels("echo:7", "stream")
+    response_latency = generation_seconds.labels("echo:7", "response")
+    first_token = time_to_first_token_seconds.labels("echo:7")
+    errors = generation_errors_total.labels("echo:7", "response")
+    before = (stream_latency.count, response_latency.count, first_token.count, errors.value)
+
+    assert await generation.generate_response(service, "Hi") == "echo: Hi"
+    assert [chunk async for chunk in generation.generate_stream(service, "Hi")] == ["echo: ", "Hi"]
+    with pytest.raises(RuntimeError):
+        await generation.generate_response(service, "fail")
+
+    after = (stream_latency.count, response_latency.count, first_token.count, errors.value)
+    assert [a - b for a, b in zip(after, before)] == [1, 1, 1, 1]
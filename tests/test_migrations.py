@@ -0,0 +1,88 @@
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from app.database.base import Base
+from app.database.migrations import BASELINE_REVISION, get_alembic_config, upgrade_to_head
+from app.models.models import ChatHistory
+from tests.conftest import test_engine
+
+
+async def explain(db_session, stmt) -> str:
+    """EXPLAIN a statement with sequential scans, bitmap scans and sorts discouraged."""
+    await db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    await db_session.execute(text("SET LOCAL enable_bitmapscan = off"))
+    sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    result = await db_session.execute(text(f"EXPLAIN {sql}"))
+    return "\n".join(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_conversation_history_uses_composite_index(db_session):
+    stmt = (
+        select(ChatHistory)
+        .where(ChatHistory.conversation_id == "conversation")
+        .order_by(ChatHistory.created_at.asc())
+    )
+    plan = await explain(db_session, stmt)
+    assert "ix_chathistory_conversation_id_created_at" in plan
+    assert "Sort" not in plan
+
+
+@pytest.mark.asyncio
+async def test_provider_history_page_uses_composite_index(db_session):
+    stmt = (
+        select(ChatHistory)
+        .where(ChatHistory.model_provider_id == 1)
+        .order_by(ChatHistory.created_at.desc(), ChatHistory.id.desc())
+        .limit(100)
+    )
+    plan = await explain(db_session, stmt)
+    assert "Index Scan Backward using ix_chathistory_model_provider_id_created_at_id" in plan
+    assert "Sort" not in plan
+
+
+def create_legacy_schema(connection) -> None:
+    """Create the schema of a database that predates migrations: the baseline, unversioned."""
+    Base.metadata.drop_all(connection)
+    connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    connection.commit()
+    command.upgrade(get_alembic_config(connection), BASELINE_REVISION)
+    connection.execute(text("DROP TABLE alembic_version"))
+    connection.commit()
+
+
+@pytest.mark.asyncio
+async def test_migrations_upgrade_legacy_schema_to_models():
+    async with test_engine.connect() as conn:
+        await conn.run_sync(create_legacy_schema)
+        await conn.execute(text(
+            "INSERT INTO modelprovider (id, name, api_key, config, tool_ids) "
+            "VALUES (1, 'openai', 'key', '{\"model_name\": \"gpt-4\"}', '[\"calculator\"]')"
+        ))
+        await conn.execute(text(
+            "INSERT INTO chathistory (conversation_id, model_provider_id, user_message, assistant_message, chat_metadata) "
+            "VALUES ('legacy', 1, 'Hello', 'Hi', '{\"source\": \"legacy\"}')"
+        ))
+        await conn.commit()
+
+        await conn.run_sync(upgrade_to_head)
+        diffs = await conn.run_sync(
+            lambda sync_conn: compare_metadata(MigrationContext.configure(sync_conn), Base.metadata)
+        )
+        row = (await conn.execute(text(
+            "SELECT chat_metadata ->> 'source' AS source, status FROM chathistory WHERE conversation_id = 'legacy'"
+        ))).one()
+
+        # Leave the schema as the test_db fixture builds it for the other tests
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.execute(text("DROP TABLE alembic_version"))
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.commit()
+
+    assert diffs == []
+    assert row.source == "legacy"
+    assert row.status == "complete"
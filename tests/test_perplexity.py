@@ -57,11 +57,13 @@ async def test_perplexity_service_streaming(perplexity_service):
 
         await perplexity_service.initialize_model()
         chunks = []
-        async for chunk in await perplexity_service.generate_stream("Test message"):
+        async for chunk in perplexity_service.generate_stream("Test message"):
             chunks.append(chunk)
         
         assert chunks == ["Hello", " World", "!"]
         mock_stream.assert_called_once()
+        # One conversation, passed as a flat list of messages
+        assert [m.content for m in mock_stream.call_args.args[0]] == ["You are a test assistant.", "Test message"]
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,118 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.models import ModelProvider
+from app.services.provider_cache import ProviderCache
+
+
+class FakeResult:
+    def __init__(self, provider):
+        self._provider = provider
+
+    def scalar_one_or_none(self):
+        return self._provider
+
+
+class FakeSession:
+    """Counts provider lookups and serves a single provider row."""
+
+    def __init__(self, provider=None):
+        self.provider = provider
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        return FakeResult(self.provider)
+
+
+def make_provider(name: str = "openai") -> ModelProvider:
+    return ModelProvider(
+        id=1,
+        name=name,
+        api_key="test-key",
+        config={"model_name": "gpt-3.5-turbo"},
+        tool_ids=["calculator"],
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow()
+    )
+
+
+@pytest.mark.asyncio
+async def test_provider_cache_serves_repeated_lookups_from_memory():
+    cache = ProviderCache(ttl=60)
+    db = FakeSession(make_provider())
+
+    first = await cache.get(1, db)
+    second = await cache.get(1, db)
+
+    assert first is second
+    assert first.name == "openai"
+    assert first.tool_ids == ["calculator"]
+    assert db.queries == 1
+    assert cache.stats() == {"providers": 1, "hits": 1, "misses": 1}
+
+
+@pytest.mark.asyncio
+async def test_provider_cache_invalidate():
+    cache = ProviderCache(ttl=60)
+    db = FakeSession(make_provider())
+    await cache.get(1, db)
+
+    db.provider = make_provider(name="anthropic")
+    cache.invalidate(1)
+
+    assert (await cache.get(1, db)).name == "anthropic"
+    assert db.queries == 2
+
+
+@pytest.mark.asyncio
+async def test_provider_cache_expires_entries():
+    cache = ProviderCache(ttl=0)
+    db = FakeSession(make_provider())
+
+    await cache.get(1, db)
+    await cache.get(1, db)
+
+    assert db.queries == 2
+
+
+@pytest.mark.asyncio
+async def test_provider_cache_does_not_cache_missing_providers():
+    cache = ProviderCache(ttl=60)
+    db = FakeSession()
+
+    assert await cache.get(1, db) is None
+    db.provider = make_provider()
+    assert await cache.get(1, db) is not None
+
+
+class FakeWriteSession(FakeSession):
+    async def commit(self):
+        pass
+
+    async def refresh(self, instance):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_update_provider_evicts_the_services_chat_uses(monkeypatch):
+    from app.api.v1 import providers
+    from app.schemas.schemas import ModelProviderUpdate
+    from app.services.factory import ModelServiceFactory
+
+    created = []
+
+    async def create_service(provider_name, api_key, config):
+        created.append((provider_name, api_key, config))
+
+    monkeypatch.setattr(ModelServiceFactory, "create_service", create_service)
+    ModelServiceFactory._instances[(1, "env-key fingerprint")] = (object(), 0.0)
+
+    await providers.update_provider(1, ModelProviderUpdate(name="openai", config={"model_name": "gpt-4"}), FakeWriteSession(make_provider()))
+
+    assert created == [("openai", "test-key", {"model_name": "gpt-4"})]
+    assert not [key for key in ModelServiceFactory._instances if key[0] == 1]
@@ -0,0 +1,157 @@
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+
+from app.services import generation
+from app.services.base import BaseModelService
+from app.services.rate_limiter import ProviderScheduler, RateLimitExceeded, TokenBucket, rate_limiter
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.status_code = 429
+        self.headers = headers
+
+
+class FakeRateLimitError(Exception):
+    """Shaped like the 429 errors raised by the OpenAI and Anthropic clients."""
+
+    def __init__(self, headers):
+        super().__init__("Rate limit reached")
+        self.status_code = 429
+        self.response = FakeResponse(headers)
+
+
+class RateLimitedService(BaseModelService):
+    """Local fake provider that answers 429 to its first ``failures`` calls."""
+
+    provider_name = "fake-429"
+
+    def __init__(self, failures: int, api_key: str = "test-key", config=None):
+        super().__init__(api_key, config)
+        self.failures = failures
+        self.calls = 0
+
+    async def initialize_model(self) -> None:
+        pass
+
+    async def generate_response(self, message, messages=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise FakeRateLimitError({"retry-after-ms": "10"})
+        return f"echo: {message}"
+
+    async def generate_stream(self, message, messages=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise FakeRateLimitError({"retry-after": "0"})
+        yield "echo: "
+        yield message
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def fresh_rate_limiter():
+    rate_limiter.clear()
+    yield rate_limiter
+    # Cancel dispatchers while the test's event loop is still running
+    rate_limiter.clear()
+    await asyncio.sleep(0)
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(600)
+    bucket.take(600)
+    now = bucket._updated
+
+    assert bucket.wait_time(60, now) == pytest.approx(6.0)
+    # Requests larger than the bucket wait for a full bucket instead of forever
+    assert bucket.wait_time(6000, now) == pytest.approx(60.0)
+    assert TokenBucket(None).wait_time(10 ** 9, now) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_queued_requests_are_admitted_by_priority():
+    scheduler = ProviderScheduler()
+    scheduler.blocked_until = time.monotonic() + 0.05
+    admitted = []
+
+    async def request(priority):
+        await scheduler.acquire(tokens=1, priority=priority)
+        admitted.append(priority)
+
+    tasks = [asyncio.ensure_future(request(priority)) for priority in ["low", "normal", "high", "normal"]]
+    await asyncio.sleep(0)
+    assert scheduler.stats()["queue_depth"] == 4
+
+    await asyncio.gather(*tasks)
+    assert admitted == ["high", "normal", "normal", "low"]
+    assert scheduler.stats()["wait_max"] > 0
+
+
+@pytest.mark.asyncio
+async def test_queue_is_bounded():
+    scheduler = ProviderScheduler(max_queue=1, max_wait=0.05)
+    scheduler.blocked_until = time.monotonic() + 60
+
+    waiting = asyncio.ensure_future(scheduler.acquire(tokens=1))
+    await asyncio.sleep(0)
+    with pytest.raises(RateLimitExceeded, match="queue is full"):
+        await scheduler.acquire(tokens=1)
+    with pytest.raises(RateLimitExceeded, match="Timed out"):
+        await waiting
+    assert scheduler.stats()["rejected"] == 2
+    scheduler.close()
+    await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_429_backs_off_and_retries_through_the_queue():
+    service = RateLimitedService(failures=1, config={"requests_per_minute": 600, "tokens_per_minute": 100000})
+    service.provider_id = 1
+
+    started = time.monotonic()
+    assert await generation.generate_response(service, "Hi") == "echo: Hi"
+
+    assert service.calls == 2
+    assert time.monotonic() - started >= 0.01  # the retry-after hint was honoured
+    stats = rate_limiter.stats()["fake-429:1"]
+    assert stats["rate_limited"] == 1
+    # Halved on the 429, then one additive step back up on the success
+    assert stats["requests_per_minute"] == 330
+    assert stats["tokens_per_minute"] == 55000
+
+
+@pytest.mark.asyncio
+async def test_stream_429_is_retried_before_the_first_chunk():
+    service = RateLimitedService(failures=1)
+
+    chunks = [chunk async for chunk in generation.generate_stream(service, "Hi")]
+
+    assert chunks == ["echo: ", "Hi"]
+    assert rate_limiter.stats()["fake-429"]["rate_limited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_persistent_429_surfaces_as_rate_limit_exceeded():
+    service = RateLimitedService(failures=10)
+
+    with pytest.raises(RateLimitExceeded, match="Upstream rate limit"):
+        await generation.generate_response(service, "Hi")
+    assert service.calls == 3  # the first attempt and two retries
+
+
+@pytest.mark.asyncio
+async def test_other_errors_are_not_retried():
+    scheduler = ProviderScheduler()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        raise RuntimeError("bad request")
+
+    with pytest.raises(RuntimeError, match="bad request"):
+        await scheduler.run(upstream, tokens=1)
+    assert len(calls) == 1
+    assert scheduler.stats()["rate_limited"] == 0
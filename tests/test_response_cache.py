@@ -0,0 +1,128 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.core.config import settings
+from app.services import generation
+from app.services.base import BaseModelService
+from app.services.response_cache import PURGE_EVERY, ResponseCache, _DiskTier, response_cache, response_cache_key
+
+
+class CountingService(BaseModelService):
+    """Model service that records how often it reaches the "upstream" model."""
+
+    provider_name = "counting"
+
+    def __init__(self, api_key: str = "test-key", config=None):
+        super().__init__(api_key, config)
+        self.calls = 0
+
+    async def initialize_model(self) -> None:
+        pass
+
+    async def generate_response(self, message, messages=None):
+        self.calls += 1
+        return f"echo: {message}"
+
+    async def generate_stream(self, message, messages=None):
+        self.calls += 1
+        for chunk in ["echo", ": ", message]:
+            yield chunk
+
+
+@pytest.fixture
+def enabled_response_cache(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    response_cache.clear()
+    yield response_cache
+    response_cache.clear()
+
+
+def test_response_cache_key_is_stable_across_message_formats():
+    config = {"model_name": "gpt-3.5-turbo", "temperature": 0}
+    as_dicts = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello!"}]
+    as_langchain = [HumanMessage(content="Hi"), AIMessage(content="Hello!")]
+
+    key = response_cache_key("openai", config, "How are you?", as_dicts)
+    assert key == response_cache_key("openai", dict(reversed(list(config.items()))), "How are you?", as_langchain)
+    assert key != response_cache_key("anthropic", config, "How are you?", as_dicts)
+    assert key != response_cache_key("openai", {**config, "max_tokens": 10}, "How are you?", as_dicts)
+    assert key != response_cache_key("openai", config, "How are you?")
+
+
+@pytest.mark.asyncio
+async def test_response_cache_lru_and_ttl():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    await cache.put("a", ["A"])
+    await cache.put("b", ["B"])
+    await cache.get("a", "openai")
+    await cache.put("c", ["C"])
+
+    assert await cache.get("b", "openai") is None
+    assert await cache.get("a", "openai") == ["A"]
+
+    expired = ResponseCache(max_entries=2, ttl=0)
+    await expired.put("a", ["A"])
+    assert await expired.get("a", "openai") is None
+
+
+@pytest.mark.asyncio
+async def test_response_cache_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "responses.sqlite")
+    await ResponseCache(max_entries=10, ttl=60, disk_path=path).put("a", ["Hello", " world"])
+
+    restarted = ResponseCache(max_entries=10, ttl=60, disk_path=path)
+    assert await restarted.get("a", "openai") == ["Hello", " world"]
+    assert restarted.stats()["openai"] == {"hits": 1, "misses": 0, "hit_rate": 1.0}
+
+
+def test_response_cache_disk_tier_purges_expired_rows_periodically(tmp_path):
+    disk = _DiskTier(str(tmp_path / "responses.sqlite"))
+    disk.put("expired", 0.0, ["old"])
+
+    def rows():
+        return disk._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    for index in range(PURGE_EVERY - 2):
+        disk.put(str(index), float("inf"), ["new"])
+    assert rows() == PURGE_EVERY - 1
+
+    disk.put("last", float("inf"), ["new"])
+    assert rows() == PURGE_EVERY - 1
+    assert disk.get("expired") is None
+    plan = disk._conn.execute("EXPLAIN QUERY PLAN DELETE FROM responses WHERE expires_at <= 0").fetchall()
+    assert "ix_responses_expires_at" in str(plan)
+
+
+@pytest.mark.asyncio
+async def test_generation_caches_deterministic_responses(enabled_response_cache):
+    service = CountingService(config={"temperature": 0})
+
+    assert await generation.generate_response(service, "Hi") == "echo: Hi"
+    assert await generation.generate_response(service, "Hi") == "echo: Hi"
+
+    assert service.calls == 1
+    assert enabled_response_cache.stats()["counting"]["hit_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_generation_skips_cache_for_sampled_requests(enabled_response_cache):
+    service = CountingService(config={"temperature": 0.7})
+
+    await generation.generate_response(service, "Hi")
+    await generation.generate_response(service, "Hi")
+
+    assert service.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_generation_replays_cached_streams(enabled_response_cache):
+    service = CountingService(config={"temperature": 0})
+
+    first = [chunk async for chunk in generation.generate_stream(service, "Hi")]
+    second = [chunk async for chunk in generation.generate_stream(service, "Hi")]
+
+    assert first == second == ["echo", ": ", "Hi"]
+    assert service.calls == 1
+    # A cached non-streaming request is served from the streamed response too
+    assert await generation.generate_response(service, "Hi") == "echo: Hi"
+    assert service.calls == 1
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from app.services.routing import ProviderRouter
+
+
+def make_router(**kwargs) -> ProviderRouter:
+    return ProviderRouter(**{"alpha": 0.5, "error_penalty": 10.0, "error_half_life": 60.0, **kwargs})
+
+
+def respond(result, delay: float = 0.0, cancelled: asyncio.Event = None):
+    async def call():
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if cancelled is not None:
+                cancelled.set()
+            raise
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return call
+
+
+def test_rank_prefers_fast_reliable_members():
+    router = make_router()
+    router.record(1, 2.0)
+    router.record(2, 0.5)
+    router.record(3, 0.1, failed=True)
+
+    # Unmeasured members go first so they get measured; failures outweigh speed
+    assert router.rank([1, 2, 3, 4]) == [4, 2, 1, 3]
+
+    router.record(1, 0.0)
+    assert router.score(1) == pytest.approx(1.0)
+
+
+def test_error_rate_decays_while_idle():
+    router = make_router()
+    router.record(1, 0.1, failed=True)
+    assert router.score(1) == pytest.approx(5.0, rel=1e-3)
+
+    router._scores[1].updated -= 60
+    assert router.score(1) == pytest.approx(2.5, rel=1e-3)
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_and_loser_is_cancelled():
+    router = make_router()
+    cancelled = asyncio.Event()
+
+    provider_id, result, outcome = await router.run(
+        [(1, respond("slow", delay=10, cancelled=cancelled)), (2, respond("fast", delay=0.01))],
+        hedge_delay=0.01
+    )
+
+    assert (provider_id, result) == (2, "fast")
+    assert outcome == {"attempts": [1, 2], "hedged": True}
+    await asyncio.sleep(0)
+    assert cancelled.is_set()
+    assert router.stats()[1]["requests"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    router = make_router()
+
+    provider_id, result, outcome = await router.run(
+        [(1, respond("primary")), (2, respond("secondary"))], hedge_delay=1.0
+    )
+
+    assert (provider_id, result) == (1, "primary")
+    assert outcome == {"attempts": [1], "hedged": False}
+    assert 2 not in router.stats()
+
+
+@pytest.mark.asyncio
+async def test_failed_member_fails_over_immediately():
+    router = make_router()
+
+    provider_id, result, outcome = await router.run(
+        [(1, respond(RuntimeError("down"))), (2, respond("ok"))], hedge_delay=None
+    )
+
+    assert (provider_id, result) == (2, "ok")
+    assert outcome == {"attempts": [1, 2], "hedged": False}
+    assert router.stats()[1]["error_rate"] > 0
+    assert router.rank([1, 2]) == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_last_error_is_raised_when_every_member_fails():
+    router = make_router()
+
+    with pytest.raises(RuntimeError, match="second"):
+        await router.run([(1, respond(RuntimeError("first"))), (2, respond(RuntimeError("second")))])
+
+
+@pytest.mark.asyncio
+async def test_track_stream_records_outcome():
+    router = make_router()
+
+    async def stream():
+        yield "a"
+        raise RuntimeError("cut off")
+
+    with pytest.raises(RuntimeError):
+        [chunk async for chunk in router.track_stream(7, stream())]
+    assert router.stats()[7]["error_rate"] == pytest.approx(0.5)
@@ -0,0 +1,104 @@
+import asyncio
+import signal
+
+import pytest
+import uvicorn
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import server
+from app.core.config import settings
+from app.main import app
+
+
+class FakeRegistry:
+    def __init__(self, running: int):
+        self.running = running
+
+    def stats(self):
+        return {"running": self.running}
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = FakeRegistry(running=1)
+    monkeypatch.setattr("app.services.stream_registry.stream_registry", registry)
+    return registry
+
+
+def test_config_falls_back_without_uvloop_and_httptools(monkeypatch):
+    monkeypatch.setattr(server.importlib.util, "find_spec", lambda name: None)
+    monkeypatch.setattr(settings, "SERVER_KEEPALIVE_TIMEOUT", 42)
+
+    config = server.build_config(FastAPI())
+
+    assert (config.loop, config.http) == ("asyncio", "h11")
+    assert config.timeout_keep_alive == 42
+
+
+@pytest.mark.asyncio
+async def test_exit_waits_for_running_streams(registry):
+    draining_app = FastAPI()
+    instance = server.DrainingServer(uvicorn.Config(draining_app))
+
+    instance.handle_exit(signal.SIGTERM, None)
+    await asyncio.sleep(0.15)
+    assert draining_app.state.draining
+    assert not instance.should_exit
+
+    registry.running = 0
+    await asyncio.sleep(0.15)
+    assert instance.should_exit
+
+
+@pytest.mark.asyncio
+async def test_drain_gives_up_after_its_timeout(registry, monkeypatch):
+    monkeypatch.setattr(settings, "SHUTDOWN_DRAIN_TIMEOUT", 0.1)
+    instance = server.DrainingServer(uvicorn.Config(FastAPI()))
+
+    instance.handle_exit(signal.SIGTERM, None)
+    await asyncio.sleep(0.3)
+
+    assert instance.should_exit
+    assert registry.running == 1
+
+
+@pytest.mark.asyncio
+async def test_second_signal_stops_draining(registry):
+    instance = server.DrainingServer(uvicorn.Config(FastAPI()))
+
+    instance.handle_exit(signal.SIGTERM, None)
+    instance.handle_exit(signal.SIGTERM, None)
+
+    assert instance.should_exit
+    instance._draining.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await instance._draining
+
+
+def test_ready_reports_draining(monkeypatch):
+    monkeypatch.setattr(app.state, "draining", True, raising=False)
+
+    response = TestClient(app).get("/ready")
+
+    assert response.status_code == 503
+    assert response.json() == {"status": "draining"}
+
+
+def test_serve_prepares_the_database_once_before_forking(monkeypatch):
+    calls = []
+
+    def run(coroutine):
+        assert coroutine.cr_code is server.prepare_database.__code__
+        coroutine.close()
+        calls.append(("prepare", settings.RUN_MIGRATIONS_ON_STARTUP))
+
+    monkeypatch.setattr(settings, "WORKERS", 2)
+    monkeypatch.setattr(settings, "RUN_MIGRATIONS_ON_STARTUP", True)
+    # The real asyncio.run would leave the test session without an event loop
+    monkeypatch.setattr(server.asyncio, "run", run)
+    monkeypatch.setattr(server.Supervisor, "run", lambda self: calls.append(("fork", settings.RUN_MIGRATIONS_ON_STARTUP)))
+
+    server.serve()
+
+    assert calls == [("prepare", True), ("fork", False)]
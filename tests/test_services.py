@@ -1,10 +1,38 @@
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, patch
 
+from app.services.base import BaseModelService
 from app.services.openai_service import OpenAIService
 from app.services.factory import ModelServiceFactory
 
 
+class SlowInitService(BaseModelService):
+    """Model service whose initialization yields to the event loop and is counted."""
+
+    inits = 0
+
+    async def initialize_model(self) -> None:
+        type(self).inits += 1
+        await asyncio.sleep(0.01)
+
+    async def generate_response(self, message, messages=None):
+        return message
+
+    async def generate_stream(self, message, messages=None):
+        yield message
+
+
+@pytest.fixture
+def slow_services(monkeypatch):
+    monkeypatch.setitem(ModelServiceFactory._services, "slow", SlowInitService)
+    monkeypatch.setattr(SlowInitService, "inits", 0)
+    ModelServiceFactory.clear()
+    yield SlowInitService
+    ModelServiceFactory.clear()
+
+
 @pytest.fixture
 def openai_service():
     return OpenAIService(
@@ -40,6 +68,26 @@ async def test_openai_service_generate_response(openai_service):
         mock_generate.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_openai_service_generate_batch(openai_service):
+    with patch('langchain.chat_models.ChatOpenAI.agenerate') as mock_generate:
+        mock_response = AsyncMock()
+        mock_response.generations = [[AsyncMock(text="First")], [AsyncMock(text="Second")]]
+        mock_generate.return_value = mock_response
+
+        await openai_service.initialize_model()
+        responses = await openai_service.generate_batch([
+            ("First message", None),
+            ("Second message", [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello"}])
+        ])
+
+        assert responses == ["First", "Second"]
+        mock_generate.assert_called_once()
+        prompts = mock_generate.call_args.args[0]
+        assert [len(prompt) for prompt in prompts] == [2, 4]
+        assert prompts[1][-1].content == "Second message"
+
+
 @pytest.mark.asyncio
 async def test_model_service_factory():
     service = await ModelServiceFactory.get_service(
@@ -71,3 +119,49 @@ async def test_model_service_factory_unknown_provider():
             provider_name="unknown",
             api_key="test-key"
         )
+
+
+@pytest.mark.asyncio
+async def test_model_service_factory_initializes_once_under_concurrency(slow_services):
+    services = await asyncio.gather(*(
+        ModelServiceFactory.get_service(provider_id=7, provider_name="slow", api_key="key") for _ in range(10)
+    ))
+
+    assert all(service is services[0] for service in services)
+    assert slow_services.inits == 1
+    assert ModelServiceFactory.stats()["instances"] == 1
+
+
+@pytest.mark.asyncio
+async def test_model_service_factory_notices_config_changes(slow_services):
+    old = await ModelServiceFactory.get_service(provider_id=7, provider_name="slow", api_key="key", config={"temperature": 0})
+    new = await ModelServiceFactory.get_service(provider_id=7, provider_name="slow", api_key="key", config={"temperature": 1})
+
+    assert new is not old
+    assert new.config == {"temperature": 1}
+    # The instance built from the old configuration is dropped
+    assert ModelServiceFactory.stats()["instances"] == 1
+
+
+@pytest.mark.asyncio
+async def test_model_service_factory_evicts_lru_and_idle(slow_services, monkeypatch):
+    monkeypatch.setattr(ModelServiceFactory, "max_instances", 2)
+    first = await ModelServiceFactory.get_service(provider_id=1, provider_name="slow", api_key="key")
+    await ModelServiceFactory.get_service(provider_id=2, provider_name="slow", api_key="key")
+    assert await ModelServiceFactory.get_service(provider_id=1, provider_name="slow", api_key="key") is first
+    await ModelServiceFactory.get_service(provider_id=3, provider_name="slow", api_key="key")
+
+    # Provider 2 was the least recently used
+    assert {key[0] for key in ModelServiceFactory._instances} == {1, 3}
+
+    monkeypatch.setattr(ModelServiceFactory, "idle_ttl", 0)
+    await ModelServiceFactory.get_service(provider_id=4, provider_name="slow", api_key="key")
+    assert {key[0] for key in ModelServiceFactory._instances} == {4}
+
+
+@pytest.mark.asyncio
+async def test_model_service_factory_create_service_is_not_cached(slow_services):
+    service = await ModelServiceFactory.create_service(provider_name="slow", api_key="key")
+
+    assert isinstance(service, SlowInitService)
+    assert ModelServiceFactory.stats()["instances"] == 0
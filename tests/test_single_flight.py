@@ -0,0 +1,171 @@
+import asyncio
+
+import pytest
+
+from app.services import generation
+from app.services.base import BaseModelService
+from app.services.single_flight import READ_AHEAD, SingleFlight
+
+
+class GatedService(BaseModelService):
+    """Model service whose upstream calls block until the test releases them."""
+
+    provider_name = "gated"
+
+    def __init__(self, api_key: str = "test-key", config=None):
+        super().__init__(api_key, config)
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def initialize_model(self) -> None:
+        pass
+
+    async def generate_response(self, message, messages=None):
+        self.calls += 1
+        await self.release.wait()
+        return f"echo: {message}"
+
+    async def generate_stream(self, message, messages=None):
+        self.calls += 1
+        yield "echo"
+        await self.release.wait()
+        yield ": "
+        yield message
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_upstream_call():
+    service = GatedService()
+    waiters = [asyncio.ensure_future(generation.generate_response(service, "Hi")) for _ in range(5)]
+    other = asyncio.ensure_future(generation.generate_response(service, "Bye"))
+    await asyncio.sleep(0)
+
+    service.release.set()
+
+    assert await asyncio.gather(*waiters) == ["echo: Hi"] * 5
+    assert await other == "echo: Bye"
+    assert service.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_subscribers_replay_from_the_beginning():
+    service = GatedService()
+    first = generation.generate_stream(service, "Hi")
+    assert await first.__anext__() == "echo"
+
+    # A subscriber joining mid-stream still sees the buffered first chunk
+    late = asyncio.ensure_future(_collect(generation.generate_stream(service, "Hi")))
+    await asyncio.sleep(0)
+    service.release.set()
+
+    assert ["echo"] + [chunk async for chunk in first] == ["echo", ": ", "Hi"]
+    assert await late == ["echo", ": ", "Hi"]
+    assert service.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_upstream_is_cancelled_when_every_waiter_leaves():
+    flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def upstream():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiters = [asyncio.ensure_future(flight.do("key", upstream)) for _ in range(2)]
+    await started.wait()
+    waiters[0].cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+
+    waiters[1].cancel()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert cancelled.is_set()
+    assert flight.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_errors_reach_every_subscriber():
+    flight = SingleFlight()
+
+    async def upstream():
+        yield "partial"
+        raise RuntimeError("upstream failed")
+
+    results = await asyncio.gather(
+        *(_collect(flight.stream("key", upstream)) for _ in range(2)), return_exceptions=True
+    )
+    for result in results:
+        assert isinstance(result, RuntimeError) and str(result) == "upstream failed"
+    assert flight.stats() == {"in_flight": 0, "upstream_calls": 1, "coalesced": 1}
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+@pytest.mark.asyncio
+async def test_stream_upstream_is_read_at_the_subscribers_pace():
+    flight = SingleFlight()
+    produced = 0
+
+    async def upstream():
+        nonlocal produced
+        for index in range(100):
+            produced += 1
+            yield str(index)
+
+    stream = flight.stream("key", upstream)
+    assert await stream.__anext__() == "0"
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+    assert produced <= READ_AHEAD + 2
+    assert [chunk async for chunk in stream] == [str(index) for index in range(1, 100)]
+
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_never_starts_or_leaks_the_upstream():
+    flight = SingleFlight()
+    started = False
+
+    async def upstream():
+        nonlocal started
+        started = True
+        yield "chunk"
+
+    stream = flight.stream("key", upstream)
+    await stream.aclose()
+    await asyncio.sleep(0)
+
+    assert not started
+    assert flight.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_closing_a_stream_mid_read_cancels_the_upstream():
+    flight = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def upstream():
+        try:
+            yield "first"
+            await asyncio.sleep(10)
+            yield "never"
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    stream = flight.stream("key", upstream)
+    assert await stream.__anext__() == "first"
+    await stream.aclose()
+    await asyncio.sleep(0)
+
+    assert cancelled.is_set()
+    assert flight.stats()["in_flight"] == 0
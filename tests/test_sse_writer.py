@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from sse_starlette.sse import ServerSentEvent
+
+from app.services.sse_writer import CoalescingSSEWriter, encode_event
+
+
+async def chunks_of(*chunks, delay: float = 0.0):
+    for chunk in chunks:
+        if delay:
+            await asyncio.sleep(delay)
+        yield chunk
+
+
+def event_data(event: bytes) -> str:
+    lines = event.decode().split("\r\n")
+    return "\n".join(line[len("data: "):] for line in lines if line.startswith("data: "))
+
+
+async def collect(writer):
+    return [event async for event in writer]
+
+
+@pytest.mark.parametrize("data", ["Hello", "", "two\nlines", "crlf\r\nand\rcr", "trailing\n"])
+def test_encode_event_matches_sse_starlette(data):
+    assert encode_event(data) == ServerSentEvent(data, event="message").encode()
+    assert encode_event(data, id="s:1") == ServerSentEvent(data, event="message", id="s:1").encode()
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_coalesced_up_to_max_bytes():
+    chunks = [f"tok{i} " for i in range(100)]
+    writer = CoalescingSSEWriter(chunks_of(*chunks), max_bytes=64, flush_interval=1.0)
+
+    events = await collect(writer)
+
+    assert "".join(event_data(event) for event in events) == "".join(chunks)
+    assert len(events) < len(chunks) / 5
+    assert writer.events == len(events)
+    assert writer.chunks == len(chunks)
+
+
+@pytest.mark.asyncio
+async def test_slow_chunks_are_flushed_after_the_interval():
+    writer = CoalescingSSEWriter(chunks_of("a", "b", delay=0.05), max_bytes=1024, flush_interval=0.01)
+
+    assert [event_data(event) for event in await collect(writer)] == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_zero_max_bytes_sends_every_chunk():
+    writer = CoalescingSSEWriter(chunks_of("a", "b", "c"), max_bytes=0, flush_interval=1.0)
+
+    assert [event_data(event) for event in await collect(writer)] == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_slow_client_applies_backpressure():
+    produced = 0
+
+    async def endless():
+        nonlocal produced
+        while True:
+            produced += 1
+            yield "x" * 10
+
+    writer = CoalescingSSEWriter(endless(), max_bytes=10, flush_interval=0, max_buffer_bytes=100)
+    events = writer.__aiter__()
+    await events.__anext__()
+    # The client stops reading; the reader must stop once the buffer is full
+    for _ in range(50):
+        await asyncio.sleep(0)
+    stalled_at = produced
+    for _ in range(50):
+        await asyncio.sleep(0)
+
+    assert produced == stalled_at
+    # At most one flushed event's worth plus one full buffer was read
+    assert produced <= 2 * 10 + 2
+    await events.aclose()
+
+
+@pytest.mark.asyncio
+async def test_source_errors_are_raised_after_buffered_chunks():
+    async def failing():
+        yield "partial"
+        raise RuntimeError("upstream failed")
+
+    received = []
+    with pytest.raises(RuntimeError, match="upstream failed"):
+        async for event in CoalescingSSEWriter(failing(), max_bytes=1024, flush_interval=1.0):
+            received.append(event_data(event))
+    assert received == ["partial"]
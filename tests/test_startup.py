@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Seconds to import app.main in a fresh interpreter; importing every provider SDK takes about twice this
+STARTUP_BUDGET = float(os.environ.get("STARTUP_BUDGET_SECONDS", "1.5"))
+# Provider SDKs and tooling that only load on first use
+LAZY_MODULES = ["openai", "anthropic", "langchain_community", "langchain.chat_models", "alembic"]
+
+
+def import_app_main() -> dict:
+    code = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        "import app.main\n"
+        "print(json.dumps({'seconds': time.perf_counter() - started, 'modules': sorted(sys.modules)}))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    for name in ("POSTGRES_SERVER", "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB"):
+        env.setdefault(name, "startup")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_provider_sdks_are_not_imported_at_startup():
+    modules = set(import_app_main()["modules"])
+
+    assert [name for name in LAZY_MODULES if name in modules] == []
+
+
+def test_startup_stays_within_budget():
+    # The best of a few runs, so one slow start on a busy machine does not fail the test
+    seconds = min(import_app_main()["seconds"] for _ in range(3))
+
+    assert seconds <= STARTUP_BUDGET, f"import app.main took {seconds:.2f}s, over the {STARTUP_BUDGET}s budget"
@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.database.stream_recorder import StreamRecorder
+from app.models.models import ChatHistory
+
+
+class FakeSessionFactory:
+    """Stands in for AsyncSessionLocal and records the row state at every commit."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.writes = []
+        self.open_sessions = 0
+        self._added = None
+        self._updated = None
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        self.open_sessions += 1
+        return self
+
+    async def __aexit__(self, *args):
+        self.open_sessions -= 1
+        return False
+
+    def add(self, chat_history):
+        self._added = chat_history
+
+    async def execute(self, statement):
+        self._updated = statement.compile().params
+
+    async def commit(self):
+        await asyncio.sleep(self.delay)
+        if self._added is not None:
+            self._added.id = 1
+            self.writes.append(("insert", self._added.status, self._added.assistant_message))
+        else:
+            self.writes.append(("update", self._updated["status"], self._updated["assistant_message"]))
+        self._added = self._updated = None
+
+
+def make_chat_history() -> ChatHistory:
+    return ChatHistory(
+        model_provider_id=1,
+        conversation_id="conv-1",
+        user_message="Hello",
+        assistant_message="",
+        status="streaming",
+        created_at=datetime.utcnow()
+    )
+
+
+@pytest.mark.asyncio
+async def test_partial_text_is_checkpointed_then_finished():
+    sessions = FakeSessionFactory()
+    recorder = StreamRecorder(make_chat_history(), session_factory=sessions, checkpoint_interval=0)
+
+    recorder.append("Hi")
+    await asyncio.sleep(0.01)
+    recorder.append(" there")
+    await asyncio.sleep(0.01)
+    recorder.checkpoint_interval = 60
+    recorder.append("!")
+    await recorder.finish("complete", tool_request={"tool": "calculator"})
+
+    assert sessions.writes == [
+        ("insert", "streaming", "Hi"),
+        ("update", "streaming", "Hi there"),
+        ("update", "complete", "Hi there!"),
+    ]
+    assert recorder.checkpoints == 2
+    assert recorder.chat_history.tool_request == {"tool": "calculator"}
+    assert sessions.open_sessions == 0
+
+
+@pytest.mark.asyncio
+async def test_short_stream_is_written_once():
+    sessions = FakeSessionFactory()
+    recorder = StreamRecorder(make_chat_history(), session_factory=sessions, checkpoint_interval=60)
+
+    recorder.append("Hi")
+    await recorder.finish("complete")
+
+    assert sessions.writes == [("insert", "complete", "Hi")]
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_without_output_is_not_stored():
+    sessions = FakeSessionFactory()
+    recorder = StreamRecorder(make_chat_history(), session_factory=sessions, checkpoint_interval=60)
+
+    await recorder.finish("failed")
+
+    assert sessions.writes == []
+
+
+@pytest.mark.asyncio
+async def test_final_write_survives_a_cancelled_stream():
+    sessions = FakeSessionFactory(delay=0.05)
+    recorder = StreamRecorder(make_chat_history(), session_factory=sessions, checkpoint_interval=60)
+    recorder.append("partial")
+
+    task = asyncio.ensure_future(recorder.finish("interrupted"))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0.1)
+
+    assert sessions.writes == [("insert", "interrupted", "partial")]
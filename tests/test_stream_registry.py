@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from app.services.stream_registry import StreamRegistry
+
+
+def make_registry(**kwargs) -> StreamRegistry:
+    return StreamRegistry(**{"capacity": 4, "ttl": 60.0, "resume_timeout": 5.0, **kwargs})
+
+
+def producer(count: int, delay: float = 0.0):
+    async def produce(stream):
+        for seq in range(1, count + 1):
+            if delay:
+                await asyncio.sleep(delay)
+            await stream.publish(seq, f"event {seq}".encode())
+    return produce
+
+
+async def collect(events, limit: int = None):
+    received = []
+    async for event in events:
+        received.append(event.decode())
+        if len(received) == limit:
+            break
+    return received
+
+
+@pytest.mark.asyncio
+async def test_subscriber_receives_every_event():
+    registry = make_registry()
+    stream = registry.start(producer(10))
+
+    assert await collect(stream.subscribe()) == [f"event {seq}" for seq in range(1, 11)]
+    assert stream.done
+
+
+@pytest.mark.asyncio
+async def test_reconnect_replays_only_missed_events():
+    registry = make_registry()
+    stream = registry.start(producer(8, delay=0.001))
+
+    first = stream.subscribe()
+    assert await collect(first, limit=3) == ["event 1", "event 2", "event 3"]
+    await first.aclose()
+
+    resumed = registry.get(stream.id)
+    assert resumed.can_replay(3)
+    assert await collect(resumed.subscribe(3)) == [f"event {seq}" for seq in range(4, 9)]
+
+
+@pytest.mark.asyncio
+async def test_producer_waits_instead_of_evicting_unsent_events():
+    registry = make_registry(capacity=4)
+    stream = registry.start(producer(100))
+    await asyncio.sleep(0.01)
+
+    # Nobody was sent anything, so the buffer holds the first events and the producer waits
+    assert stream.last_seq == 4
+    assert await collect(stream.subscribe(), limit=2) == ["event 1", "event 2"]
+    stream.task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_evicted_events_cannot_be_replayed():
+    registry = make_registry(capacity=2)
+    stream = registry.start(producer(6))
+
+    assert len(await collect(stream.subscribe())) == 6
+    assert stream.can_replay(4)
+    assert not stream.can_replay(1)
+    assert not stream.can_replay(7)
+
+
+@pytest.mark.asyncio
+async def test_abandoned_generation_is_cancelled():
+    registry = make_registry(resume_timeout=0.01)
+    cancelled = asyncio.Event()
+
+    async def produce(stream):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    stream = registry.start(produce)
+    await asyncio.sleep(0.05)
+
+    assert cancelled.is_set()
+    assert stream.done
+
+
+@pytest.mark.asyncio
+async def test_finished_streams_expire_after_ttl():
+    registry = make_registry(ttl=0.0)
+    stream = registry.start(producer(1))
+    await collect(stream.subscribe())
+    await asyncio.sleep(0.01)
+
+    assert registry.get(stream.id) is None
+    assert registry.stats()["finished"] == 0
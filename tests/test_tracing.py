@@ -0,0 +1,80 @@
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.tracing import JSONLTraceExporter, TracingMiddleware, record_span, span
+
+
+def make_app(**options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, **options)
+
+    @app.get("/work")
+    async def work():
+        with span("lookup"):
+            await asyncio.sleep(0.01)
+        with span("db"):
+            pass
+        with span("db"):
+            pass
+        return {"ok": True}
+
+    return app
+
+
+def test_span_is_a_no_op_outside_a_request():
+    with span("untraced"):
+        pass
+    record_span("untraced", 0.0, 1.0)
+
+
+def test_server_timing_header_sums_spans_per_name():
+    response = TestClient(make_app()).get("/work")
+
+    assert response.status_code == 200
+    timings = {}
+    for entry in response.headers["server-timing"].split(", "):
+        name, duration = entry.split(";dur=")
+        timings[name] = float(duration)
+    assert list(timings) == ["lookup", "db", "total"]
+    assert timings["lookup"] >= 10.0
+    assert timings["total"] >= timings["lookup"]
+
+
+def test_server_timing_can_be_disabled():
+    response = TestClient(make_app(server_timing=False)).get("/work")
+
+    assert "server-timing" not in response.headers
+
+
+def test_sampled_traces_are_exported_as_jsonl(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = JSONLTraceExporter(str(path))
+    client = TestClient(make_app(sample_rate=1.0, exporter=exporter))
+
+    client.get("/work")
+    client.get("/work")
+    for _ in range(100):
+        if exporter.exported == 2:
+            break
+        time.sleep(0.01)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 2
+    assert records[0]["method"] == "GET"
+    assert records[0]["path"] == "/work"
+    assert records[0]["status"] == 200
+    assert [span["name"] for span in records[0]["spans"]] == ["lookup", "db", "db"]
+    assert records[0]["spans"][0]["duration_ms"] >= 10.0
+
+
+def test_unsampled_traces_are_not_exported(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    client = TestClient(make_app(sample_rate=0.0, exporter=JSONLTraceExporter(str(path))))
+
+    client.get("/work")
+
+    assert not path.exists()
@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.models import ModelProvider
+from app.services.factory import ModelServiceFactory
+from app.services.fake_service import FakeModelService
+from app.services.warmup import WarmUp, warm_up
+
+
+class FakeEngine:
+    """Counts connections open at once; the first ``failures`` connects fail."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.open = 0
+        self.max_open = 0
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, engine: FakeEngine):
+        self.engine = engine
+
+    async def __aenter__(self):
+        await asyncio.sleep(0)
+        if self.engine.failures:
+            self.engine.failures -= 1
+            raise ConnectionError("connection refused")
+        self.engine.open += 1
+        self.engine.max_open = max(self.engine.max_open, self.engine.open)
+        return self
+
+    async def __aexit__(self, *args):
+        self.engine.open -= 1
+        return False
+
+    async def execute(self, statement):
+        pass
+
+
+class FakeSession:
+    def __init__(self, providers):
+        self.providers = providers
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, statement):
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.providers))
+
+
+def make_provider(provider_id: int, name: str) -> ModelProvider:
+    now = datetime.utcnow()
+    return ModelProvider(
+        id=provider_id, name=name, api_key="key", config={"ttft": 0, "output_tokens": 1},
+        tool_ids=[], created_at=now, updated_at=now
+    )
+
+
+@pytest.fixture
+def fake_services(monkeypatch):
+    monkeypatch.setitem(ModelServiceFactory._services, "fake", FakeModelService)
+    ModelServiceFactory.clear()
+    yield
+    ModelServiceFactory.clear()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_connections_and_initializes_every_provider(fake_services):
+    engine = FakeEngine()
+    sessions = FakeSession([make_provider(1, "fake"), make_provider(2, "fake"), make_provider(3, "unknown")])
+    warm = WarmUp(db_connections=4, probe=True, timeout=5)
+
+    await warm.run(engine, sessions, lambda provider: provider.api_key)
+
+    assert warm.ready
+    assert engine.max_open == 4 and engine.open == 0
+    stats = warm.stats()
+    assert stats["db_connections"] == 4
+    assert stats["providers"][1] == stats["providers"][2] == "probed"
+    assert stats["providers"][3].startswith("failed: Unknown model provider")
+    assert ModelServiceFactory.stats()["instances"] == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_connections_do_not_hold_up_the_others(fake_services):
+    engine = FakeEngine(failures=2)
+    warm = WarmUp(db_connections=5, probe=False, timeout=5)
+
+    await warm.run(engine, FakeSession([]), lambda provider: provider.api_key)
+
+    assert warm.ready and warm.error is None
+    assert warm.connections_opened == 3
+    assert engine.open == 0
+
+
+@pytest.mark.asyncio
+async def test_warm_up_becomes_ready_when_the_database_is_down(fake_services):
+    warm = WarmUp(db_connections=2, probe=False, timeout=5)
+
+    await warm.run(FakeEngine(failures=2), FakeSession([]), lambda provider: provider.api_key)
+
+    assert warm.ready
+    assert warm.error == "connection refused"
+
+
+def test_ready_endpoint_waits_for_warm_up(monkeypatch):
+    monkeypatch.setattr(warm_up, "ready", False)
+    client = TestClient(app)
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"status": "warming_up"}
+
+    warm_up.skip()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
@@ -0,0 +1,198 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+from app.database.writer import ChatHistoryWriter
+from app.models.models import ChatHistory
+
+
+class FakeResult:
+    def __init__(self, values):
+        self._values = values
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._values
+
+
+class FakeSessionFactory:
+    """Stands in for AsyncSessionLocal and records every executed batch."""
+
+    def __init__(self, fail: bool = False, bad_ids=()):
+        self.fail = fail
+        self.bad_ids = set(bad_ids)
+        self.batches = []
+        self.next_id = 1
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, statement, params=None):
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        if isinstance(params, list):
+            if any(row["id"] in self.bad_ids for row in params):
+                raise ValueError("invalid row")
+            self.batches.append(params)
+            return FakeResult([])
+        ids = list(range(self.next_id, self.next_id + params["count"]))
+        self.next_id += params["count"]
+        return FakeResult(ids)
+
+    async def commit(self):
+        pass
+
+
+def make_chat_history(writer_id: int, conversation_id: str = "conv-1") -> ChatHistory:
+    return ChatHistory(
+        id=writer_id,
+        model_provider_id=1,
+        conversation_id=conversation_id,
+        user_message="Hello",
+        assistant_message="Hi there!",
+        created_at=datetime.utcnow()
+    )
+
+
+@pytest.mark.asyncio
+async def test_writer_flushes_full_batches():
+    sessions = FakeSessionFactory()
+    writer = ChatHistoryWriter(sessions, batch_size=3, flush_interval=10)
+    await writer.start()
+
+    for _ in range(3):
+        await writer.enqueue(make_chat_history(await writer.reserve_id()))
+    await asyncio.sleep(0.01)
+
+    assert [len(batch) for batch in sessions.batches] == [3]
+    assert [row["id"] for row in sessions.batches[0]] == [1, 2, 3]
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_writer_flushes_on_interval_and_stop():
+    sessions = FakeSessionFactory()
+    writer = ChatHistoryWriter(sessions, batch_size=100, flush_interval=0.01)
+    await writer.start()
+
+    await writer.enqueue(make_chat_history(1))
+    assert writer.pending_rows("conv-1")[0]["id"] == 1
+    await asyncio.sleep(0.05)
+    assert [len(batch) for batch in sessions.batches] == [1]
+    assert writer.pending_rows("conv-1") == []
+
+    await writer.enqueue(make_chat_history(2))
+    await writer.stop()
+    assert [len(batch) for batch in sessions.batches] == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_writer_spools_failed_batches_and_replays_them(tmp_path):
+    spool_path = str(tmp_path / "spool.jsonl")
+    failing = FakeSessionFactory(fail=True)
+    writer = ChatHistoryWriter(failing, batch_size=10, flush_interval=0.01, spool_path=spool_path)
+    await writer.start()
+    await writer.enqueue(make_chat_history(1))
+    await writer.enqueue(make_chat_history(2))
+    await writer.stop()
+    assert writer.stats()["rows_spooled"] == 2
+
+    sessions = FakeSessionFactory()
+    writer = ChatHistoryWriter(sessions, batch_size=10, spool_path=spool_path)
+    await writer.start()
+    await writer.stop()
+
+    assert [row["id"] for row in sessions.batches[0]] == [1, 2]
+    assert isinstance(sessions.batches[0][0]["created_at"], datetime)
+    assert not (tmp_path / "spool.jsonl").exists()
+
+
+@pytest.mark.asyncio
+async def test_writer_replays_worker_spools_unless_replay_is_left_to_the_parent(tmp_path):
+    spool_path = str(tmp_path / "spool.jsonl")
+    for number, row_id in [(0, 1), (1, 2)]:
+        worker = ChatHistoryWriter(FakeSessionFactory(fail=True), spool_path=f"{spool_path}.worker{number}")
+        await worker._write([{key: getattr(make_chat_history(row_id), key) for key in ("id", "conversation_id", "created_at")}])
+
+    sessions = FakeSessionFactory()
+    worker = ChatHistoryWriter(sessions, spool_path=f"{spool_path}.worker0")
+    worker.replay_on_start = False
+    await worker.start()
+    await worker.stop()
+    assert sessions.batches == []
+
+    writer = ChatHistoryWriter(sessions, batch_size=10, spool_path=spool_path)
+    await writer.start()
+    await writer.stop()
+
+    assert sorted(row["id"] for batch in sessions.batches for row in batch) == [1, 2]
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_writer_reports_committed_batches_only():
+    written = []
+    writer = ChatHistoryWriter(FakeSessionFactory(), batch_size=10, flush_interval=0.01)
+    writer.on_written = written.append
+    await writer.start()
+    await writer.enqueue(make_chat_history(1))
+    await writer.stop()
+
+    failing = ChatHistoryWriter(FakeSessionFactory(fail=True), batch_size=10, flush_interval=0.01)
+    failing.on_written = written.append
+    await failing.start()
+    await failing.enqueue(make_chat_history(2))
+    await failing.stop()
+
+    assert [[row["id"] for row in batch] for batch in written] == [[1]]
+
+
+@pytest.mark.asyncio
+async def test_spooled_rows_stay_pending_until_a_retry_writes_them(tmp_path):
+    sessions = FakeSessionFactory(fail=True)
+    writer = ChatHistoryWriter(
+        sessions, batch_size=10, flush_interval=0.01, spool_path=str(tmp_path / "spool.jsonl"),
+        spool_retry_interval=0.05
+    )
+    await writer.start()
+    await writer.enqueue(make_chat_history(1))
+    await asyncio.sleep(0.03)
+
+    assert writer.stats()["rows_spooled"] == 1
+    assert [row["id"] for row in writer.pending_rows("conv-1")] == [1]
+
+    sessions.fail = False
+    await asyncio.sleep(0.1)
+
+    assert [[row["id"] for row in batch] for batch in sessions.batches] == [[1]]
+    assert writer.pending_rows("conv-1") == []
+    assert list(tmp_path.iterdir()) == []
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_replay_retries_a_failed_batch_row_by_row(tmp_path):
+    spool_path = str(tmp_path / "spool.jsonl")
+    failing = ChatHistoryWriter(FakeSessionFactory(fail=True), batch_size=10, spool_path=spool_path)
+    await failing._write([
+        {key: getattr(make_chat_history(row_id), key) for key in ("id", "conversation_id", "created_at")}
+        for row_id in (1, 2, 3)
+    ])
+
+    sessions = FakeSessionFactory(bad_ids={2})
+    writer = ChatHistoryWriter(sessions, batch_size=10, spool_path=spool_path)
+    await writer.replay_spool()
+
+    assert [[row["id"] for row in batch] for batch in sessions.batches] == [[1], [3]]
+    with open(spool_path) as spool:
+        assert [json.loads(line)["id"] for line in spool] == [2]